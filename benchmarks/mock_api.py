@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Firecrawl and OpenAI APIs used by the benchmarks
+
+Implements POST /v1/map, /v1/scrape and /v1/chat/completions with
+configurable latency distributions, error / 429 rates and page sizes, so
+the generators can be measured without spending API credits.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+SITE_URL = "https://bench.sidetool.local"
+
+BOILERPLATE_HEADER = "[Home](/) | [Blog](/blog) | [Pricing](/pricing) | [Docs](/docs)\n\nWe use cookies to improve your experience. [Accept](#)"
+BOILERPLATE_FOOTER = "© Sidetool. All rights reserved. [Privacy](/privacy) | [Terms](/terms)"
+
+WORDS = (
+    "agents automation workflow sidetool ai model prompt data customer team build ship product "
+    "integration api pricing growth content search llm launch scale deploy feature users insight"
+).split()
+
+
+@dataclass
+class EndpointProfile:
+    """Latency (lognormal around a median) and failure rates for one endpoint"""
+    median_ms: float
+    sigma: float = 0.5
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 0.5
+    
+    def sample_latency(self, rng: random.Random) -> float:
+        return rng.lognormvariate(0, self.sigma) * self.median_ms / 1000.0
+
+
+@dataclass
+class MockConfig:
+    map: EndpointProfile = field(default_factory=lambda: EndpointProfile(median_ms=200))
+    scrape: EndpointProfile = field(default_factory=lambda: EndpointProfile(median_ms=40))
+    chat: EndpointProfile = field(default_factory=lambda: EndpointProfile(median_ms=30))
+    page_kb: float = 8.0
+    page_kb_sigma: float = 0.6
+    description_rate: float = 0.5
+    seed: int = 7
+
+
+def render_page(url: str, config: MockConfig) -> Dict:
+    """Deterministic markdown page for a URL, with shared nav / footer boilerplate"""
+    rng = random.Random(f"{config.seed}:{url}")
+    target = int(rng.lognormvariate(0, config.page_kb_sigma) * config.page_kb * 1024)
+    slug = url.rstrip('/').rsplit('/', 1)[-1] or 'home'
+    title = slug.replace('-', ' ').title()
+    
+    parts = [BOILERPLATE_HEADER, f"# {title}"]
+    size = sum(len(p) for p in parts)
+    section = 0
+    while size < target:
+        section += 1
+        heading = f"## Section {section}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}"
+        paragraph = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))).capitalize() + '.'
+        parts.extend([heading, paragraph])
+        size += len(heading) + len(paragraph)
+    parts.append(BOILERPLATE_FOOTER)
+    
+    metadata = {'title': title, 'sourceURL': url}
+    if rng.random() < config.description_rate:
+        metadata['description'] = f"{title} page on the benchmark site."
+    return {'markdown': '\n\n'.join(parts), 'metadata': metadata}
+
+
+class MockServer:
+    """Runs the mock API on a background thread and records what it served"""
+    
+    def __init__(self, config: Optional[MockConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.config.seed)
+        self.requests: Dict[str, int] = {'map': 0, 'scrape': 0, 'chat': 0}
+        self.failures: Dict[str, int] = {'error': 0, 'throttle': 0}
+        self.served_latency: Dict[str, List[float]] = {'map': [], 'scrape': [], 'chat': []}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+    
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+    
+    async def _respond(self, endpoint: str, body) -> web.Response:
+        profile: EndpointProfile = getattr(self.config, endpoint)
+        self.requests[endpoint] += 1
+        delay = profile.sample_latency(self.rng)
+        await asyncio.sleep(delay)
+        self.served_latency[endpoint].append(delay)
+        
+        roll = self.rng.random()
+        if roll < profile.throttle_rate:
+            self.failures['throttle'] += 1
+            return web.json_response({'error': 'Rate limit exceeded'}, status=429,
+                                     headers={'Retry-After': str(profile.retry_after)})
+        if roll < profile.throttle_rate + profile.error_rate:
+            self.failures['error'] += 1
+            return web.json_response({'error': 'Internal error'}, status=500)
+        return web.json_response(body)
+    
+    async def handle_map(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        limit = int(payload.get('limit') or 100)
+        site = (payload.get('url') or SITE_URL).rstrip('/')
+        links = [f"{site}/blog/post-{i}" if i % 3 else f"{site}/page-{i}" for i in range(limit)]
+        return await self._respond('map', {'success': True, 'links': links})
+    
+    async def handle_scrape(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        data = render_page(payload['url'], self.config)
+        formats = payload.get('formats') or ['markdown']
+        if 'html' in formats:
+            data['html'] = f"<html><body><pre>{data['markdown']}</pre></body></html>"
+        return await self._respond('scrape', {'success': True, 'data': data})
+    
+    async def handle_chat(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        prompt = payload['messages'][-1]['content']
+        word = WORDS[len(prompt) % len(WORDS)]
+        content = f"Title: {word.title()} Overview Page\nDescription: Explains how Sidetool handles {word} for growing teams."
+        if (payload.get('response_format') or {}).get('type') == 'json_object':
+            # Batched summaries: one entry per "URL: ..." line in the prompt
+            content = json.dumps({'pages': [
+                {'url': url, 'title': f"{word.title()} Overview Page",
+                 'description': f"Explains how Sidetool handles {word} for growing teams."}
+                for url in re.findall(r'^URL: (\S+)$', prompt, re.M)
+            ]})
+        return await self._respond('chat', {
+            'id': f"chatcmpl-{self.requests['chat']}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4o-mini'),
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': content}
+            }],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 20, 'total_tokens': len(prompt) // 4 + 20}
+        })
+    
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post('/v1/map', self.handle_map)
+        app.router.add_post('/v1/scrape', self.handle_scrape)
+        app.router.add_post('/v1/chat/completions', self.handle_chat)
+        return app
+    
+    async def _serve(self):
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+    
+    def start(self) -> 'MockServer':
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._serve())
+            self._loop.run_forever()
+        
+        self._thread = threading.Thread(target=run, name='mock-api', daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+    
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(10)
+    
+    def reset(self):
+        for key in self.requests:
+            self.requests[key] = 0
+            self.served_latency[key] = []
+        for key in self.failures:
+            self.failures[key] = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the mock Firecrawl / OpenAI API on its own')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--scrape-ms', type=float, default=40, help='Median scrape latency')
+    parser.add_argument('--chat-ms', type=float, default=30, help='Median chat completion latency')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of responses that are 429s')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of responses that are 500s')
+    parser.add_argument('--page-kb', type=float, default=8.0, help='Median page size in KB')
+    args = parser.parse_args()
+    
+    config = MockConfig(
+        scrape=EndpointProfile(args.scrape_ms, error_rate=args.error_rate, throttle_rate=args.throttle_rate),
+        chat=EndpointProfile(args.chat_ms, error_rate=args.error_rate, throttle_rate=args.throttle_rate),
+        page_kb=args.page_kb
+    )
+    server = MockServer(config, port=args.port).start()
+    print(f"Mock API listening on {server.url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for both llms.txt generators
+
+Starts the local mock API (benchmarks/mock_api.py), runs
+SidetoolLLMSTxtGenerator.generate and SidetoolLLMsGenerator.generate_llms_files
+against it at several site sizes, and reports throughput, per-stage p50/p99
+latency and peak memory. Each run happens in a fresh process so peak RSS
+belongs to that run alone.
+
+    python benchmarks/run_benchmarks.py --sizes 50 500 5000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_api import SITE_URL, EndpointProfile, MockConfig, MockServer
+
+GENERATORS = ('llmstxt', 'blog')
+STAGES = ('map', 'scrape', 'summarize')
+DEFAULT_CASE_TIMEOUT = 1800.0
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def timed(method, samples: List[float]):
+    """Wrap a bound method (sync or async) so every call's duration lands in `samples`"""
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+    else:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+    return wrapper
+
+
+def run_case(generator: str, size: int, api_url: str, options: Dict, results: multiprocessing.Queue):
+    """Child process: run one generator once and report timings and peak RSS"""
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    output_dir = tempfile.mkdtemp(prefix=f"bench-{generator}-{size}-")
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        if generator == 'llmstxt':
+            from generate_sidetool_llmstxt import SidetoolLLMSTxtGenerator
+            
+            gen = SidetoolLLMSTxtGenerator(
+                'bench-key', 'bench-key',
+                max_urls=size,
+                concurrency=options['concurrency'],
+                summary_concurrency=options['summary_concurrency'],
+                firecrawl_rate=options['rate'],
+                openai_rate=options['rate'],
+                firecrawl_api_url=api_url,
+                openai_api_url=api_url,
+                base_url=SITE_URL
+            )
+            gen.map_website = timed(gen.map_website, samples['map'])
+            gen.scrape_url = timed(gen.scrape_url, samples['scrape'])
+            gen.request_completion = timed(gen.request_completion, samples['summarize'])
+            asyncio.run(gen.generate(output_dir=output_dir))
+        else:
+            from generate_sidetool_blog import SidetoolLLMsGenerator
+            
+            gen = SidetoolLLMsGenerator(
+                {'firecrawl': 'bench-key', 'openai': 'bench-key'},
+                firecrawl_rate=options['rate'],
+                openai_rate=options['rate'],
+                firecrawl_api_url=api_url,
+                openai_api_url=api_url,
+                base_url=SITE_URL
+            )
+            gen.map_site = timed(gen.map_site, samples['map'])
+            gen.scrape_url = timed(gen.scrape_url, samples['scrape'])
+            gen.generate_summary = timed(gen.generate_summary, samples['summarize'])
+            gen.generate_llms_files(max_urls=size, output_dir=output_dir)
+            gen.close()
+        elapsed = time.perf_counter() - start
+    
+    output_bytes = sum(
+        os.path.getsize(os.path.join(output_dir, name))
+        for name in os.listdir(output_dir)
+        if os.path.isfile(os.path.join(output_dir, name))
+    )
+    results.put({
+        'generator': generator,
+        'urls': size,
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(size / elapsed, 2) if elapsed else 0.0,
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'output_bytes': output_bytes,
+        'stages': {
+            stage: {
+                'calls': len(values),
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p99_ms': round(percentile(values, 99) * 1000, 1)
+            }
+            for stage, values in samples.items()
+        }
+    })
+
+
+def wait_for_result(proc: multiprocessing.Process, results: multiprocessing.Queue, timeout: float) -> Optional[Dict]:
+    """The child's result row, or None if it exits without one or runs past `timeout` seconds"""
+    give_up = time.monotonic() + timeout
+    while time.monotonic() < give_up:
+        try:
+            return results.get(timeout=min(1.0, max(0.0, give_up - time.monotonic())))
+        except queue.Empty:
+            if not proc.is_alive():
+                break
+    try:
+        # A child that just exited may have left its row in the pipe
+        return results.get(timeout=1.0) if not proc.is_alive() else None
+    except queue.Empty:
+        return None
+
+
+def print_table(rows: List[Dict]):
+    header = f"{'generator':<9} {'urls':>6} {'wall s':>8} {'pages/s':>8} {'peak MB':>8}"
+    for stage in STAGES:
+        header += f" {stage + ' p50/p99 ms':>24}"
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        if 'error' in row:
+            print(f"{row['generator']:<9} {row['urls']:>6} FAILED: {row['error']}")
+            continue
+        line = (f"{row['generator']:<9} {row['urls']:>6} {row['seconds']:>8.2f} "
+                f"{row['pages_per_second']:>8.2f} {row['peak_rss_mb']:>8.1f}")
+        for stage in STAGES:
+            s = row['stages'][stage]
+            cell = f"{s['p50_ms']:.0f} / {s['p99_ms']:.0f} ({s['calls']})"
+            line += f" {cell:>24}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the llms.txt generators against a local mock API')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500, 5000], help='Site sizes (URL counts) to run')
+    parser.add_argument('--generators', nargs='+', choices=GENERATORS, default=list(GENERATORS))
+    parser.add_argument('--scrape-ms', type=float, default=40, help='Median mock scrape latency')
+    parser.add_argument('--chat-ms', type=float, default=30, help='Median mock chat completion latency')
+    parser.add_argument('--sigma', type=float, default=0.5, help='Lognormal spread of mock latencies')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of mock responses that are 429s')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of mock responses that are 500s')
+    parser.add_argument('--page-kb', type=float, default=8.0, help='Median mock page size in KB')
+    parser.add_argument('--rate', type=float, default=500.0, help='Starting request rate handed to the generators')
+    parser.add_argument('--concurrency', type=int, default=10, help='Scrape concurrency for the async generator')
+    parser.add_argument('--summary-concurrency', type=int, default=5, help='Summary concurrency for the async generator')
+    parser.add_argument('--case-timeout', type=float, default=DEFAULT_CASE_TIMEOUT,
+                        help=f'Seconds one run may take before it is stopped and reported as failed (default: {DEFAULT_CASE_TIMEOUT:g})')
+    parser.add_argument('--json-out', type=str, help='Also write the results as JSON to this path')
+    args = parser.parse_args()
+    
+    config = MockConfig(
+        scrape=EndpointProfile(args.scrape_ms, args.sigma, args.error_rate, args.throttle_rate),
+        chat=EndpointProfile(args.chat_ms, args.sigma, args.error_rate, args.throttle_rate),
+        page_kb=args.page_kb
+    )
+    options = {
+        'rate': args.rate,
+        'concurrency': args.concurrency,
+        'summary_concurrency': args.summary_concurrency
+    }
+    
+    server = MockServer(config).start()
+    ctx = multiprocessing.get_context('spawn')
+    rows = []
+    try:
+        for size in args.sizes:
+            for generator in args.generators:
+                print(f"Running {generator} with {size} URLs...", flush=True)
+                server.reset()
+                results = ctx.Queue()
+                proc = ctx.Process(target=run_case, args=(generator, size, server.url, options, results))
+                proc.start()
+                row = wait_for_result(proc, results, args.case_timeout)
+                if row is None:
+                    if proc.is_alive():
+                        error = f"timed out after {args.case_timeout:g}s"
+                        proc.terminate()
+                    else:
+                        error = f"exited with code {proc.exitcode} without a result"
+                    print(f"  FAILED: {error}", flush=True)
+                    row = {'generator': generator, 'urls': size, 'error': error}
+                proc.join()
+                row['mock'] = {'requests': dict(server.requests), 'failures': dict(server.failures)}
+                rows.append(row)
+    finally:
+        server.stop()
+    
+    print()
+    print_table(rows)
+    
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nWrote {args.json_out}")
+    if any('error' in row for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Generate llms.txt files for many sites in one process
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+from generate_sidetool_llmstxt import (
+    SCRAPE_TIMEOUT, SidetoolLLMSTxtGenerator, build_firecrawl_session, make_openai_client
+)
+from llmstxt.boilerplate import default_workers
+from llmstxt.cache import DEFAULT_CACHE_PATH, SummaryCache
+from llmstxt.deadline import Deadline
+from llmstxt.discovery import DEFAULT_FOCUS_PATHS
+from llmstxt.http import FIRECRAWL_API_URL, OPENAI_API_URL
+from llmstxt.journal import DEFAULT_JOURNAL_PATH, RunJournal
+from llmstxt.scheduler import CrawlScheduler
+from llmstxt.scrape import DEFAULT_URL_DEADLINE
+from llmstxt.shards import DEFAULT_SHARD_BYTES
+from llmstxt.state import DEFAULT_STATE_PATH, PageStateStore
+from llmstxt.summarize import DEFAULT_MIN_CONFIDENCE, SUMMARIZER_MODES
+
+if TYPE_CHECKING:
+    import aiohttp
+    from openai import AsyncOpenAI
+
+
+def normalize_site(site: str) -> str:
+    """Accept bare domains as well as full URLs"""
+    site = site.strip()
+    if '://' not in site:
+        site = f"https://{site}"
+    return site.rstrip('/')
+
+
+def read_sites(sites: List[str], sites_file: Optional[str]) -> List[str]:
+    """Collect sites from the command line and an optional file, dropping blanks, comments and duplicates"""
+    if sites_file:
+        with open(sites_file, 'r', encoding='utf-8') as f:
+            sites = sites + [line for line in f if line.strip() and not line.lstrip().startswith('#')]
+    return list(dict.fromkeys(normalize_site(site) for site in sites))
+
+
+class BatchRunner:
+    """Run one generator per site concurrently, all sharing a CrawlScheduler
+    
+    Between `open()` and `close()` the sites also share one cleanup process
+    pool, one OpenAI client and one keep-alive Firecrawl session, so no site
+    pays for its own pools or TLS handshakes.
+    """
+    
+    def __init__(self, firecrawl_api_key: str, openai_api_key: Optional[str], scheduler: CrawlScheduler,
+                 output_root: str = './sites', max_sites: int = 8, max_urls: int = 50,
+                 summary_concurrency: int = 5, summary_cache: Optional[SummaryCache] = None,
+                 state_store: Optional[PageStateStore] = None, resume: bool = False,
+                 full_text: bool = True, dedup: bool = True, boilerplate: bool = True,
+                 cleanup_workers: Optional[int] = None, prompt_tokens: Optional[int] = None,
+                 summary_batch: int = 1, summarizer: str = 'openai',
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE, deadline: Optional[Deadline] = None,
+                 precompress: bool = True, hedge: bool = True, url_deadline: float = DEFAULT_URL_DEADLINE,
+                 shards: bool = False, shard_bytes: int = DEFAULT_SHARD_BYTES,
+                 focus_paths: Optional[List[str]] = None, metrics_dir: Optional[str] = None, verbose: bool = False,
+                 firecrawl_api_url: str = FIRECRAWL_API_URL, openai_api_url: str = OPENAI_API_URL):
+        self.firecrawl_api_key = firecrawl_api_key
+        self.openai_api_key = openai_api_key
+        self.scheduler = scheduler
+        self.output_root = output_root
+        self.max_sites = max(1, max_sites)
+        self.max_urls = max_urls
+        self.summary_concurrency = summary_concurrency
+        self.summary_cache = summary_cache
+        self.state_store = state_store
+        self.resume = resume
+        self.full_text = full_text
+        self.dedup = dedup
+        self.boilerplate = boilerplate
+        self.cleanup_workers = default_workers() if cleanup_workers is None else cleanup_workers
+        self.prompt_tokens = prompt_tokens
+        self.summary_batch = summary_batch
+        self.summarizer = summarizer
+        self.min_confidence = min_confidence
+        # One budget for the whole batch; sites still waiting when it runs out keep their old files
+        self.deadline = deadline
+        self.precompress = precompress
+        self.hedge = hedge
+        self.url_deadline = url_deadline
+        self.shards = shards
+        self.shard_bytes = shard_bytes
+        self.focus_paths = focus_paths
+        self.executor: Optional[Executor] = None
+        self.openai_client: Optional['AsyncOpenAI'] = None
+        self.firecrawl_http: Optional['aiohttp.ClientSession'] = None
+        self.metrics_dir = metrics_dir
+        self.verbose = verbose
+        self.firecrawl_api_url = firecrawl_api_url
+        self.openai_api_url = openai_api_url
+    
+    def make_generator(self, site: str, **overrides) -> SidetoolLLMSTxtGenerator:
+        """Generator for one site with the batch settings, or `overrides` of any of them"""
+        domain = urlparse(site).netloc
+        settings = dict(
+            firecrawl_api_key=self.firecrawl_api_key,
+            openai_api_key=self.openai_api_key,
+            max_urls=self.max_urls,
+            verbose=self.verbose,
+            concurrency=self.scheduler.per_domain_limit,
+            summary_concurrency=self.summary_concurrency,
+            summary_cache=self.summary_cache,
+            state_store=self.state_store,
+            journal=RunJournal(DEFAULT_JOURNAL_PATH.format(generator=domain), resume=self.resume),
+            base_url=site,
+            scheduler=self.scheduler,
+            dedup=self.dedup,
+            boilerplate=self.boilerplate,
+            cleanup_workers=0,
+            executor=self.executor,
+            prompt_tokens=self.prompt_tokens,
+            summary_batch=self.summary_batch,
+            summarizer=self.summarizer,
+            min_confidence=self.min_confidence,
+            deadline=self.deadline,
+            precompress=self.precompress,
+            hedge=self.hedge,
+            url_deadline=self.url_deadline,
+            shards=self.shards,
+            shard_bytes=self.shard_bytes,
+            focus_paths=self.focus_paths,
+            firecrawl_api_url=self.firecrawl_api_url,
+            openai_api_url=self.openai_api_url,
+            openai_client=self.openai_client,
+            firecrawl_http=self.firecrawl_http
+        )
+        settings.update(overrides)
+        return SidetoolLLMSTxtGenerator(**settings)
+    
+    async def open(self):
+        """Create the cleanup pool and API clients shared by every site"""
+        if self.cleanup_workers > 0 and (self.dedup or self.boilerplate) and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.cleanup_workers)
+        if self.openai_api_key and self.openai_client is None:
+            self.openai_client = make_openai_client(self.openai_api_key, self.openai_api_url)
+        if self.firecrawl_http is None:
+            self.firecrawl_http = build_firecrawl_session(self.firecrawl_api_key, self.scheduler.global_limit, SCRAPE_TIMEOUT)
+    
+    async def close(self):
+        if self.firecrawl_http:
+            await self.firecrawl_http.close()
+            self.firecrawl_http = None
+        if self.openai_client:
+            await self.openai_client.close()
+            self.openai_client = None
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+    
+    def close_stores(self):
+        """Close the summary cache and page state databases"""
+        if self.summary_cache:
+            self.summary_cache.close()
+        if self.state_store:
+            self.state_store.close()
+    
+    async def run_site(self, site: str, sites_slot: asyncio.Semaphore, full_text: Optional[bool] = None,
+                       **overrides) -> Dict:
+        """Generate one site's files; failures are reported, not raised, so other sites keep going"""
+        async with sites_slot:
+            generator = self.make_generator(site, **overrides)
+            output_dir = os.path.join(self.output_root, generator.domain)
+            started = time.monotonic()
+            error = None
+            try:
+                await generator.generate(output_dir=output_dir, full_text=self.full_text if full_text is None else full_text)
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                print(f"Error generating {site}: {error}")
+            
+            if self.metrics_dir:
+                os.makedirs(self.metrics_dir, exist_ok=True)
+                generator.metrics.write(os.path.join(self.metrics_dir, f"{generator.domain}.json"))
+            
+            counters = generator.metrics.report()['counters']
+            return {
+                'site': site,
+                'output_dir': output_dir,
+                'published': counters.get('pages.published', 0),
+                'failed': counters.get('pages.failed', 0),
+                'omitted': counters.get('pages.omitted', 0),
+                'seconds': time.monotonic() - started,
+                'error': error
+            }
+    
+    async def run(self, sites: List[str]) -> List[Dict]:
+        sites_slot = asyncio.Semaphore(self.max_sites)
+        await self.open()
+        try:
+            return await asyncio.gather(*(self.run_site(normalize_site(site), sites_slot) for site in sites))
+        finally:
+            await self.close()
+
+
+def print_summary(results: List[Dict], scheduler: CrawlScheduler, seconds: float):
+    print("=" * 70)
+    print(f"{'site':<40} {'pages':>7} {'failed':>7} {'omitted':>8} {'wall s':>9}")
+    for result in results:
+        status = f"  ({result['error']})" if result['error'] else ''
+        print(f"{urlparse(result['site']).netloc:<40} {result['published']:>7} {result['failed']:>7} "
+              f"{result['omitted']:>8} {result['seconds']:>9.1f}{status}")
+    total = sum(result['published'] for result in results)
+    print(f"Published {total} pages across {len(results)} sites in {seconds:.1f}s "
+          f"({total / max(seconds, 1e-9):.2f} pages/s)")
+    print(f"Rate limits reached {scheduler.firecrawl_limiter.describe()}; {scheduler.openai_limiter.describe()}")
+
+
+def add_runner_arguments(parser: argparse.ArgumentParser):
+    """Options shared by the batch CLI and the generation service"""
+    parser.add_argument('--output-root', type=str, default='./sites',
+                        help='Each site is written to <output-root>/<domain> (default: ./sites)')
+    parser.add_argument('--max-urls', type=int, default=50,
+                        help='Maximum number of URLs to process per site (default: 50)')
+    parser.add_argument('--global-concurrency', type=int, default=20,
+                        help='Firecrawl requests in flight across all sites (default: 20)')
+    parser.add_argument('--per-site-concurrency', type=int, default=5,
+                        help='Firecrawl requests in flight for any one site (default: 5)')
+    parser.add_argument('--summary-concurrency', type=int, default=10,
+                        help='OpenAI summary requests in flight across all sites (default: 10)')
+    parser.add_argument('--tokens-per-minute', type=int, default=200000,
+                        help='OpenAI tokens-per-minute budget shared by all sites (default: 200000)')
+    parser.add_argument('--firecrawl-rate', type=float, default=5.0,
+                        help='Starting Firecrawl request rate per second; adapts to 429s (default: 5)')
+    parser.add_argument('--openai-rate', type=float, default=10.0,
+                        help='Starting OpenAI request rate per second; adapts to 429s (default: 10)')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Summary cache database (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call OpenAI instead of reusing cached summaries')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only re-scrape pages whose sitemap lastmod / ETag changed since the last run')
+    parser.add_argument('--state-path', type=str, default=DEFAULT_STATE_PATH,
+                        help=f'Per-URL state used by --incremental (default: {DEFAULT_STATE_PATH})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip pages already finished by an interrupted run of each site')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Summarize and publish near-duplicate pages separately')
+    parser.add_argument('--no-boilerplate', action='store_true',
+                        help='Keep nav, footer and other blocks repeated across pages')
+    parser.add_argument('--cleanup-workers', type=int, default=None,
+                        help='Processes for page analysis and boilerplate cleanup, shared by all sites (default: one per core)')
+    parser.add_argument('--prompt-tokens', type=int, default=None,
+                        help='Token budget for the page excerpt in each summary prompt (default: per model)')
+    parser.add_argument('--summary-batch', type=int, default=1,
+                        help='Pages summarized per OpenAI request (default: 1)')
+    parser.add_argument('--summarizer', choices=SUMMARIZER_MODES, default='openai',
+                        help='openai, local (offline, no OpenAI key needed) or hybrid (default: openai)')
+    parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE,
+                        help=f'Local summaries below this confidence go to the LLM in hybrid mode (default: {DEFAULT_MIN_CONFIDENCE})')
+    parser.add_argument('--no-full-text', action='store_true',
+                        help='Only generate llms.txt, skip llms-full.txt')
+    parser.add_argument('--no-precompress', action='store_true',
+                        help='Skip the gzip and brotli copies of each llms-full.txt')
+    parser.add_argument('--shards', action='store_true',
+                        help='Also publish each llms-full.txt as content-hashed shards plus a manifest')
+    parser.add_argument('--shard-kb', type=int, default=DEFAULT_SHARD_BYTES // 1024,
+                        help=f'Largest shard size in KB (default: {DEFAULT_SHARD_BYTES // 1024})')
+    parser.add_argument('--url-deadline', type=float, default=DEFAULT_URL_DEADLINE,
+                        help=f'Seconds one page may take across all scrape attempts (default: {DEFAULT_URL_DEADLINE:g})')
+    parser.add_argument('--no-hedge', action='store_true',
+                        help='Never send a duplicate request for a scrape slower than its URL class\'s p95')
+    parser.add_argument('--focus-paths', nargs='*', default=DEFAULT_FOCUS_PATHS,
+                        help='Paths ranked first under --deadline, highest priority first')
+    parser.add_argument('--metrics-dir', type=str,
+                        help='Write each site\'s run metrics to <metrics-dir>/<domain>.json')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable verbose logging')
+
+
+def runner_from_args(args: argparse.Namespace, max_sites: int, deadline: Optional[Deadline] = None) -> BatchRunner:
+    """BatchRunner configured from `add_runner_arguments` options; exits if the API keys are missing"""
+    firecrawl_key = os.getenv('FIRECRAWL_API_KEY')
+    openai_key = os.getenv('OPENAI_API_KEY')
+    if not firecrawl_key or (not openai_key and args.summarizer != 'local'):
+        print("Error: FIRECRAWL_API_KEY and OPENAI_API_KEY must be set")
+        sys.exit(1)
+    
+    scheduler = CrawlScheduler(
+        global_limit=args.global_concurrency,
+        per_domain_limit=args.per_site_concurrency,
+        firecrawl_rate=args.firecrawl_rate,
+        openai_rate=args.openai_rate,
+        summary_concurrency=args.summary_concurrency,
+        tokens_per_minute=args.tokens_per_minute
+    )
+    return BatchRunner(
+        firecrawl_key,
+        openai_key,
+        scheduler,
+        output_root=args.output_root,
+        max_sites=max_sites,
+        max_urls=args.max_urls,
+        summary_concurrency=args.summary_concurrency,
+        summary_cache=None if args.no_cache else SummaryCache(args.cache_path),
+        state_store=PageStateStore(args.state_path) if args.incremental else None,
+        resume=args.resume,
+        full_text=not args.no_full_text,
+        dedup=not args.no_dedup,
+        boilerplate=not args.no_boilerplate,
+        cleanup_workers=args.cleanup_workers,
+        prompt_tokens=args.prompt_tokens,
+        summary_batch=args.summary_batch,
+        summarizer=args.summarizer,
+        min_confidence=args.min_confidence,
+        deadline=deadline,
+        precompress=not args.no_precompress,
+        hedge=not args.no_hedge,
+        url_deadline=args.url_deadline,
+        shards=args.shards,
+        shard_bytes=args.shard_kb * 1024,
+        focus_paths=args.focus_paths,
+        metrics_dir=args.metrics_dir,
+        verbose=args.verbose
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate llms.txt files for many sites with a shared scheduler')
+    parser.add_argument('sites', nargs='*',
+                        help='Sites to generate (bare domains or URLs)')
+    parser.add_argument('--sites-file', type=str,
+                        help='File with one site per line; blank lines and # comments are ignored')
+    parser.add_argument('--max-sites', type=int, default=8,
+                        help='Sites generated at the same time (default: 8)')
+    parser.add_argument('--deadline', type=float,
+                        help='Seconds the whole batch may take; each site publishes what it finished in time '
+                             'and lists the rest in llms-omitted.json')
+    add_runner_arguments(parser)
+    
+    args = parser.parse_args()
+    load_dotenv()
+    deadline = Deadline(args.deadline) if args.deadline else None
+    
+    sites = read_sites(args.sites, args.sites_file)
+    if not sites:
+        parser.error('no sites given')
+    
+    runner = runner_from_args(args, args.max_sites, deadline)
+    
+    print(f"Generating llms.txt for {len(sites)} sites "
+          f"({args.global_concurrency} requests in flight, at most {args.per_site_concurrency} per site)")
+    started = time.monotonic()
+    try:
+        results = asyncio.run(runner.run(sites))
+    finally:
+        runner.close_stores()
+    
+    print_summary(results, runner.scheduler, time.monotonic() - started)
+    if any(result['error'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Long-running llms.txt generation service with a local HTTP job API
+"""
+
+import os
+import argparse
+import asyncio
+import signal
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from generate_batch import BatchRunner, add_runner_arguments, normalize_site, runner_from_args
+from llmstxt.deadline import Deadline
+from llmstxt.summarize import SUMMARIZER_MODES
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8787
+# Finished jobs kept for the status endpoints; older ones are forgotten
+FINISHED_JOBS_KEPT = 200
+# Per-job settings a request may override, and the type each must have
+JOB_OPTIONS = {
+    'max_urls': int,
+    'summarizer': str,
+    'min_confidence': float,
+    'summary_batch': int,
+    'prompt_tokens': int,
+    'dedup': bool,
+    'boilerplate': bool,
+    'full_text': bool,
+    'precompress': bool,
+    'deadline': float
+}
+TYPE_NAMES = {int: 'an integer', float: 'a number', bool: 'true or false', str: 'a string'}
+
+
+class Job:
+    """One queued generation request and what became of it"""
+    
+    def __init__(self, site: str, options: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.site = site
+        self.options = options
+        self.status = 'queued'
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        # A deadline is measured from submission, since that is when the caller's window opens
+        self.deadline = Deadline(options['deadline']) if options.get('deadline') else None
+        self.task: Optional[asyncio.Task] = None
+    
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+    
+    def describe(self) -> Dict:
+        def stamp(moment: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(moment, timezone.utc).isoformat() if moment else None
+        
+        return {
+            'id': self.id,
+            'site': self.site,
+            'status': self.status,
+            'options': self.options,
+            'created': stamp(self.created),
+            'started': stamp(self.started),
+            'finished': stamp(self.finished),
+            'result': self.result,
+            'error': self.error
+        }
+
+
+def parse_job(body: Any) -> Tuple[str, Dict[str, Any]]:
+    """Site and option overrides from a job request body; raises ValueError when invalid"""
+    if not isinstance(body, dict):
+        raise ValueError('expected a JSON object')
+    site = body.get('url') or body.get('site')
+    if not isinstance(site, str) or not site.strip():
+        raise ValueError('"url" is required')
+    
+    options = {}
+    for name, value in body.items():
+        if name in ('url', 'site'):
+            continue
+        kind = JOB_OPTIONS.get(name)
+        if kind is None:
+            raise ValueError(f'unknown option "{name}"')
+        # bool is an int subclass, so check it explicitly; ints are fine where floats are expected
+        if isinstance(value, bool) != (kind is bool) or not isinstance(value, (int, float) if kind is float else kind):
+            raise ValueError(f'"{name}" must be {TYPE_NAMES[kind]}')
+        options[name] = value
+    if 'summarizer' in options and options['summarizer'] not in SUMMARIZER_MODES:
+        raise ValueError(f'"summarizer" must be one of {", ".join(SUMMARIZER_MODES)}')
+    return normalize_site(site), options
+
+
+class GenerationService:
+    """Runs generation jobs from a FIFO queue on warm, shared resources
+    
+    One BatchRunner is opened at start-up and kept for the life of the
+    process, so every job reuses its scheduler and limiters, summary cache,
+    page state store, cleanup process pool, OpenAI client and keep-alive
+    Firecrawl session instead of paying a cold start. `max_jobs` workers
+    take jobs off the queue; a job for a site that is already queued or
+    running is not queued twice. A job's deadline, its own or
+    `default_deadline`, counts from when it was submitted.
+    """
+    
+    def __init__(self, runner: BatchRunner, max_jobs: int = 2, default_deadline: Optional[float] = None):
+        self.runner = runner
+        self.max_jobs = max(1, max_jobs)
+        self.default_deadline = default_deadline
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.jobs: Dict[str, Job] = {}
+        self.finished: Deque[str] = deque()
+        self.workers: List[asyncio.Task] = []
+        self.started = time.monotonic()
+        self.completed = 0
+    
+    async def start(self):
+        await self.runner.open()
+        self.jobs_slot = asyncio.Semaphore(self.max_jobs)
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.max_jobs)]
+    
+    async def stop(self):
+        """Cancel running jobs (their journals are kept for --resume) and release the shared resources"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        await self.runner.close()
+    
+    def submit(self, site: str, options: Dict[str, Any]) -> Tuple[Job, bool]:
+        """Queue a job, or return the site's job already queued or running; the flag is True if queued now"""
+        for job in self.jobs.values():
+            if job.site == site and job.active:
+                return job, False
+        if self.default_deadline and 'deadline' not in options:
+            options = dict(options, deadline=self.default_deadline)
+        job = Job(site, options)
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        return job, True
+    
+    def cancel(self, job: Job) -> bool:
+        """Cancel a queued or running job; False if it already finished"""
+        if not job.active:
+            return False
+        if job.task:
+            job.task.cancel()
+        else:
+            self._finish(job, 'cancelled')
+        return True
+    
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished = time.time()
+        self.finished.append(job.id)
+        while len(self.finished) > FINISHED_JOBS_KEPT:
+            self.jobs.pop(self.finished.popleft(), None)
+    
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            if not job.active:
+                continue  # cancelled while queued
+            job.status = 'running'
+            job.started = time.time()
+            overrides = dict(job.options)
+            overrides['deadline'] = job.deadline
+            job.task = asyncio.create_task(self.runner.run_site(job.site, self.jobs_slot, **overrides))
+            try:
+                job.result = await job.task
+            except asyncio.CancelledError:
+                if not job.task.cancelled():
+                    raise  # the worker itself is being stopped
+                self._finish(job, 'cancelled')
+                continue
+            finally:
+                job.task = None
+            job.error = job.result.get('error')
+            self.completed += 1
+            self._finish(job, 'failed' if job.error else 'done')
+    
+    def status(self) -> Dict:
+        runner = self.runner
+        limiters = {
+            limiter.name.lower(): limiter.snapshot()
+            for limiter in (runner.scheduler.firecrawl_limiter, runner.scheduler.openai_limiter)
+        }
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'uptime_seconds': round(time.monotonic() - self.started, 1),
+            'max_jobs': self.max_jobs,
+            'jobs': counts,
+            'completed': self.completed,
+            'limiters': limiters,
+            'domains': runner.scheduler.snapshot(),
+            'summary_cache': runner.summary_cache.stats() if runner.summary_cache else None
+        }
+    
+    def make_app(self):
+        """aiohttp application serving the job API"""
+        from aiohttp import web
+        
+        def job_or_404(request) -> Job:
+            job = self.jobs.get(request.match_info['job_id'])
+            if job is None:
+                raise web.HTTPNotFound(text='{"error": "unknown job"}', content_type='application/json')
+            return job
+        
+        async def create_job(request):
+            try:
+                site, options = parse_job(await request.json())
+            except ValueError as e:
+                return web.json_response({'error': str(e)}, status=400)
+            job, queued = self.submit(site, options)
+            return web.json_response({'job': job.describe()}, status=202 if queued else 200)
+        
+        async def list_jobs(request):
+            jobs = sorted(self.jobs.values(), key=lambda job: job.created, reverse=True)
+            return web.json_response({'jobs': [job.describe() for job in jobs]})
+        
+        async def get_job(request):
+            return web.json_response({'job': job_or_404(request).describe()})
+        
+        async def cancel_job(request):
+            job = job_or_404(request)
+            if not self.cancel(job):
+                return web.json_response({'error': f'job already {job.status}'}, status=409)
+            return web.json_response({'job': job.describe()}, status=202)
+        
+        async def get_status(request):
+            return web.json_response(self.status())
+        
+        app = web.Application()
+        app.add_routes([
+            web.post('/jobs', create_job),
+            web.get('/jobs', list_jobs),
+            web.get('/jobs/{job_id}', get_job),
+            web.delete('/jobs/{job_id}', cancel_job),
+            web.get('/status', get_status)
+        ])
+        return app
+
+
+async def serve(service: GenerationService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                unix_socket: Optional[str] = None):
+    """Serve the job API until SIGINT or SIGTERM"""
+    from aiohttp import web
+    
+    app_runner = web.AppRunner(service.make_app(), access_log=None)
+    await app_runner.setup()
+    site = web.UnixSite(app_runner, unix_socket) if unix_socket else web.TCPSite(app_runner, host, port)
+    await service.start()
+    await site.start()
+    print(f"Generation service listening on {unix_socket or f'http://{host}:{port}'} "
+          f"({service.max_jobs} jobs at a time)")
+    
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    try:
+        await stopping.wait()
+    finally:
+        print("Shutting down")
+        await app_runner.cleanup()
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep generation clients warm and run llms.txt jobs submitted over HTTP')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST,
+                        help=f'Address to listen on (default: {DEFAULT_HOST}, local only)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--unix-socket', type=str,
+                        help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--max-jobs', type=int, default=2,
+                        help='Jobs (sites) generated at the same time; the rest wait in the queue (default: 2)')
+    parser.add_argument('--deadline', type=float,
+                        help='Default seconds each job may take from submission; jobs can set their own')
+    add_runner_arguments(parser)
+    
+    args = parser.parse_args()
+    load_dotenv()
+    
+    runner = runner_from_args(args, args.max_jobs)
+    service = GenerationService(runner, max_jobs=args.max_jobs, default_deadline=args.deadline)
+    
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix_socket))
+    finally:
+        runner.close_stores()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
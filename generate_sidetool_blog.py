@@ -9,65 +9,160 @@ import sys
 import json
 import time
 import argparse
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 
-import requests
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from llmstxt.boilerplate import BoilerplateModel, analyze_page, clean_page
+from llmstxt.cache import DEFAULT_CACHE_PATH, SummaryCache
+from llmstxt.dedup import SimHashIndex, fingerprint
+from llmstxt.deadline import Deadline, write_omitted_report
+from llmstxt.discovery import DEFAULT_FOCUS_PATHS, Frontier, SitemapParser
+from llmstxt.http import FIRECRAWL_API_URL, OPENAI_API_URL, ApiClient, build_session, timeouts_from_args
+from llmstxt.journal import DEFAULT_JOURNAL_PATH, RunJournal
+from llmstxt.metrics import RunMetrics, run_profiled
+from llmstxt.ratelimit import AdaptiveLimiter, parse_retry_after
+from llmstxt.scrape import DEFAULT_URL_DEADLINE, HedgePolicy, UrlDeadline, scrape_request, url_class
+from llmstxt.shards import DEFAULT_SHARD_BYTES, SHARD_DIR, SHARD_MANIFEST, publish_shards
+from llmstxt.state import DEFAULT_STATE_PATH, PageStateStore, content_hash
+from llmstxt.summarize import DEFAULT_MIN_CONFIDENCE, SUMMARIZER_MODES, LocalSummarizer
+from llmstxt.tokens import pack_sections, prompt_budget, truncate_to_tokens
+from llmstxt.writer import DEFAULT_ENCODINGS, ENCODINGS, StreamingWriter
+
+SUMMARY_MODEL = 'gpt-4o-mini'
+SUMMARY_SYSTEM_PROMPT = 'You are a helpful assistant that creates concise, informative summaries for LLM consumption.'
+# Per-page cap on the content copied into llms-full.txt
+FULL_TEXT_TOKENS = 1250
+# Byte offset and length of each page in llms-full.txt, for range reads
+FULL_TEXT_INDEX = 'llms-full.index.json'
+# Earlier paths are scraped first
+# Sitemap documents followed per run, and bytes read per streaming step
+MAX_SITEMAPS = 50
+SITEMAP_CHUNK = 64 * 1024
+SUMMARY_PROMPTS = {
+    'blog': "Summarize this blog post in 2-3 sentences, focusing on the key insights and value for readers: {content}",
+    'docs': "Summarize this documentation page in 2-3 sentences, highlighting the main features or APIs: {content}",
+    'page': "Summarize this page in 2-3 sentences, focusing on the key information: {content}"
+}
+
+
+def section_content(full_entry: str) -> str:
+    """Page text of an llms-full.txt section as rendered below"""
+    content = full_entry.split('\nContent:\n', 1)[-1]
+    return content.rsplit('\n\n---\n', 1)[0]
+
+
+def entry_description(entry: str) -> str:
+    """Description line of an llms.txt entry as rendered below, or an empty string"""
+    for line in entry.splitlines():
+        if line.startswith('Description: '):
+            return line[len('Description: '):]
+    return ''
 
 class SidetoolLLMsGenerator:
     """Generate LLMs.txt files optimized for Sidetool.co blog content"""
     
-    def __init__(self, api_keys: Dict[str, str]):
+    def __init__(self, api_keys: Dict[str, str], summary_cache: Optional[SummaryCache] = None,
+                 state_store: Optional[PageStateStore] = None, firecrawl_rate: float = 2.0,
+                 openai_rate: float = 5.0, pool_size: int = 10,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None, gzip: bool = True,
+                 firecrawl_api_url: str = FIRECRAWL_API_URL, openai_api_url: str = OPENAI_API_URL,
+                 journal: Optional[RunJournal] = None, base_url: str = "https://www.sidetool.co",
+                 dedup: bool = True, boilerplate: bool = True, prompt_tokens: Optional[int] = None,
+                 full_text_tokens: int = FULL_TEXT_TOKENS, summarizer: str = 'openai',
+                 local_summarizer: Optional[LocalSummarizer] = None,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE, focus_paths: Optional[List[str]] = None,
+                 deadline: Optional[Deadline] = None, precompress: bool = True, hedge: bool = True,
+                 url_deadline: float = DEFAULT_URL_DEADLINE, shards: bool = False,
+                 shard_bytes: int = DEFAULT_SHARD_BYTES):
         self.firecrawl_api_key = api_keys.get('firecrawl')
         self.openai_api_key = api_keys.get('openai')
-        self.base_url = "https://www.sidetool.co"
-        self.focus_paths = ['/blog', '/docs', '/features', '/pricing', '/about', '/integrations']
+        # One keep-alive pool per host so repeated calls skip the TCP+TLS handshake
+        self.firecrawl = ApiClient(firecrawl_api_url, self.firecrawl_api_key, pool_size, timeouts, gzip, name='firecrawl')
+        self.openai = ApiClient(openai_api_url, self.openai_api_key, pool_size, timeouts, gzip, name='openai')
+        self.site = build_session(pool_size, gzip)
+        self.summary_cache = summary_cache
+        self.state_store = state_store
+        self.journal = journal
+        self.dedup = dedup
+        self.strip_boilerplate = boilerplate
+        self.prompt_tokens = prompt_tokens or prompt_budget(SUMMARY_MODEL)
+        self.full_text_tokens = full_text_tokens
+        if summarizer not in SUMMARIZER_MODES:
+            raise ValueError(f"Unknown summarizer {summarizer!r}, expected one of {', '.join(SUMMARIZER_MODES)}")
+        self.summarizer = summarizer
+        self.local_summarizer = local_summarizer or LocalSummarizer()
+        self.min_confidence = min_confidence
+        self.firecrawl_limiter = AdaptiveLimiter('Firecrawl', rate=firecrawl_rate, concurrency=1, max_concurrency=1)
+        self.openai_limiter = AdaptiveLimiter('OpenAI', rate=openai_rate, concurrency=1, max_concurrency=1)
+        self.base_url = base_url.rstrip('/')
+        # "https://www.sidetool.co" -> "Sidetool.co", used in the file headers
+        self.site_name = urlparse(self.base_url).netloc.removeprefix('www.').capitalize()
+        self.metrics = RunMetrics()
+        self.focus_paths = focus_paths or list(DEFAULT_FOCUS_PATHS)
+        # Time budget for the whole run; None runs until every page is done
+        self.deadline = deadline
+        # gzip / brotli copies of llms-full.txt for static hosting
+        self.full_text_encodings = DEFAULT_ENCODINGS if precompress else ()
+        # Scrapes run on a small pool so a slow one can be hedged or abandoned at its deadline
+        self.scrape_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='scrape')
+        self.hedging = HedgePolicy() if hedge else None
+        self.url_deadline = url_deadline
+        # Content-hashed llms-full.txt shards; the timestamp then lives only in their manifest
+        self.shards = shards
+        self.shard_bytes = shard_bytes
+    
+    def discover(self, max_urls: int = 150) -> Frontier:
+        """Start site discovery in the background and return the frontier it fills
         
-    def map_site(self, max_urls: int = 150) -> List[str]:
-        """Map the entire site with focus on blog content"""
-        print(f"🗺️  Mapping {self.base_url} (focusing on blog content)...")
+        Firecrawl's map and the site's own sitemaps are read concurrently.
+        Iterating the frontier yields the best-ranked URL found so far, so
+        scraping starts as soon as the first URLs arrive.
+        """
+        frontier = Frontier(self.base_url, self.focus_paths, limit=max_urls, deadline=self.deadline)
+        frontier.produce(self.map_site, frontier, max_urls)
+        frontier.produce(self.stream_sitemaps, frontier)
+        return frontier
+    
+    def map_site(self, frontier: Frontier, max_urls: int = 150) -> int:
+        """Add the URLs from Firecrawl's map of the site to the frontier"""
+        print(f"🗺️  Mapping {self.base_url} (focusing on {', '.join(self.focus_paths)})...")
         
         try:
-            response = requests.post(
-                'https://api.firecrawl.dev/v1/map',
-                headers={
-                    'Authorization': f'Bearer {self.firecrawl_api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
+            with self.metrics.stage('map'):
+                self.firecrawl_limiter.wait()
+                response = self.firecrawl.post('map', {
                     'url': self.base_url,
                     'search': '',  # Get all pages
                     'ignoreSitemap': False,
                     'limit': max_urls
-                }
-            )
+                })
             
             if response.status_code == 200:
                 data = response.json()
-                urls = data.get('data', {}).get('urls', [])
-                
-                # Prioritize blog URLs
-                blog_urls = [url for url in urls if '/blog' in url]
-                other_urls = [url for url in urls if '/blog' not in url]
-                
-                # Combine with blog URLs first
-                prioritized_urls = blog_urls + other_urls
-                
-                print(f"✅ Found {len(urls)} URLs ({len(blog_urls)} blog posts)")
-                return prioritized_urls[:max_urls]
+                # /v1/map returns {"links": [...]}; older responses nested them under data.urls
+                urls = data.get('links') or data.get('data', {}).get('urls', [])
+                for url in urls:
+                    frontier.add(url)
+                print(f"✅ Map found {len(urls)} URLs")
+                return len(urls)
             else:
                 print(f"❌ Mapping failed: {response.status_code}")
-                # Fallback to manual URL list
-                return self.get_fallback_urls()
-                
+        
         except Exception as e:
             print(f"❌ Error mapping site: {e}")
-            return self.get_fallback_urls()
+        
+        if frontier.closed:
+            return 0
+        # Fallback to manual URL list
+        urls = self.get_fallback_urls()
+        for url in urls:
+            frontier.add(url)
+        return len(urls)
     
     def get_fallback_urls(self) -> List[str]:
         """Fallback URLs if mapping fails"""
@@ -84,166 +179,549 @@ class SidetoolLLMsGenerator:
             f"{self.base_url}/api"
         ]
     
-    def scrape_url(self, url: str) -> Optional[Dict]:
-        """Scrape a single URL with retry logic"""
-        max_retries = 3
-        retry_delay = 2
+    def sitemap_roots(self) -> List[str]:
+        """Sitemaps listed in robots.txt, plus the conventional /sitemap.xml"""
+        roots = []
+        try:
+            response = self.site.get(f"{self.base_url}/robots.txt", timeout=self.firecrawl.timeouts['site'])
+            if response.status_code == 200:
+                for line in response.text.splitlines():
+                    name, _, value = line.partition(':')
+                    if name.strip().lower() == 'sitemap' and value.strip():
+                        roots.append(value.strip())
+        except Exception:
+            pass
+        roots.append(f"{self.base_url}/sitemap.xml")
+        return list(dict.fromkeys(roots))
+    
+    def stream_sitemaps(self, frontier: Frontier):
+        """Add page URLs and lastmods from the site's sitemaps to the frontier while they download
         
-        for attempt in range(max_retries):
+        Sitemap indexes are followed and gzipped sitemaps are inflated on the
+        fly; nothing larger than one chunk is held in memory.
+        """
+        pending = self.sitemap_roots()
+        seen = set()
+        
+        while pending and len(seen) < MAX_SITEMAPS and not frontier.closed:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            parser = SitemapParser()
             try:
-                response = requests.post(
-                    'https://api.firecrawl.dev/v1/scrape',
-                    headers={
-                        'Authorization': f'Bearer {self.firecrawl_api_key}',
-                        'Content-Type': 'application/json'
-                    },
-                    json={
-                        'url': url,
-                        'formats': ['markdown', 'html'],
-                        'onlyMainContent': True,
-                        'waitFor': 2000
-                    },
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get('data', {})
-                elif response.status_code == 429:
-                    # Rate limited, wait longer
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    print(f"  ⚠️  Failed to scrape {url}: {response.status_code}")
-                    
-            except requests.exceptions.Timeout:
-                print(f"  ⏱️  Timeout scraping {url} (attempt {attempt + 1})")
-                time.sleep(retry_delay)
+                with self.metrics.call('site.sitemap'):
+                    with self.site.get(sitemap_url, stream=True, timeout=self.firecrawl.timeouts['site']) as response:
+                        if response.status_code != 200:
+                            continue
+                        for chunk in response.iter_content(SITEMAP_CHUNK):
+                            if frontier.closed:
+                                return  # enough URLs, or out of time
+                            self.metrics.add_bytes('in', len(chunk))
+                            entries = parser.feed(chunk)
+                            if parser.is_index:
+                                pending.extend(loc for loc, _ in entries)
+                            else:
+                                frontier.add_all(entries)
+                        entries = parser.close()
+                        if parser.is_index:
+                            pending.extend(loc for loc, _ in entries)
+                        else:
+                            frontier.add_all(entries)
             except Exception as e:
-                print(f"  ❌ Error scraping {url}: {e}")
-                
+                print(f"  ⚠️  Could not read sitemap {sitemap_url}: {e}")
+    
+    def page_changed(self, url: str, record: Optional[Dict[str, str]], lastmod: str) -> Tuple[bool, Dict[str, str]]:
+        """Whether a page changed since the last run, from its sitemap lastmod or ETag / Last-Modified"""
+        seen = {'lastmod': lastmod}
+        if not lastmod:
+            try:
+                timeout = self.firecrawl.timeouts['site']
+                if self.deadline:
+                    timeout = tuple(min(limit, max(0.1, self.deadline.remaining())) for limit in timeout)
+                with self.metrics.call('site.head'):
+                    response = self.site.head(url, allow_redirects=True, timeout=timeout)
+                seen['etag'] = response.headers.get('ETag', '')
+                seen['last_modified'] = response.headers.get('Last-Modified', '')
+            except Exception:
+                pass
+        return not PageStateStore.is_unchanged(record, **seen), seen
+    
+    def scrape_url(self, url: str) -> Optional[Dict]:
+        """Scrape a single URL with retry logic
+        
+        Attempts run on the scrape pool so that waiting on them is bounded:
+        every attempt shares a hard per-URL deadline, counted from when the
+        first request is sent, after which the page counts as timed out. An
+        attempt that outlives the p95 of its URL class gets a duplicate
+        request, and the first good answer wins.
+        """
+        request = scrape_request(url)
+        kind = url_class(url)
+        deadline = UrlDeadline(self.url_deadline)
+        
+        for attempt in range(3):
+            if attempt:
+                self.metrics.incr('firecrawl.retries')
+            outcome, value = self._hedged_scrape(request, kind, deadline)
+            if outcome == 'ok':
+                return value
+            if outcome == 'deadline':
+                print(f"  ⏱️  Gave up on {url} after {self.url_deadline:g}s")
+                self.metrics.incr('firecrawl.url_deadline')
+                return None
+            if outcome == 'fail':
+                return None
+        
         return None
     
-    def generate_summary(self, content: str, url: str) -> str:
-        """Generate AI summary for content"""
+    def _hedged_scrape(self, request: Dict, kind: str, deadline: UrlDeadline) -> Tuple[str, Optional[Dict]]:
+        """One attempt, plus a duplicate if it outlives the p95 of its URL class
+        
+        Returns ('ok', data), ('retry' | 'fail', None), or ('deadline', None)
+        once `deadline` passes. A losing request cannot be interrupted; it
+        finishes in the background within its own read timeout.
+        """
+        sent = threading.Event()
+        attempts = [self.scrape_pool.submit(self._scrape_once, request, kind, deadline, sent)]
+        delay = None
+        if self.hedging:
+            self.hedging.started()
+            delay = self.hedging.delay(kind)
+        # Time the request, and the URL's deadline, from when it is sent, not while the limiter holds it back
+        sent.wait(deadline.remaining())
+        if delay is not None:
+            done, _ = wait(attempts, timeout=min(delay, deadline.remaining()))
+            if not done and deadline.remaining() > 0 and self.hedging.allow_hedge():
+                self.metrics.incr('firecrawl.hedges')
+                attempts.append(self.scrape_pool.submit(self._scrape_once, request, kind, deadline))
+        
+        failure = None
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                return 'deadline', None
+            for future in done:
+                outcome = future.result()
+                if outcome[0] == 'ok':
+                    if future is not attempts[0]:
+                        self.metrics.incr('firecrawl.hedge_wins')
+                    return outcome
+                failure = failure or outcome
+        return failure
+    
+    def _scrape_once(self, request: Dict, kind: str, deadline: UrlDeadline,
+                     sent: Optional[threading.Event] = None) -> Tuple[str, Optional[Dict]]:
+        """Send one scrape request on a pool thread: ('ok', data), ('retry', None) or ('fail', None)"""
+        import requests
+        url = request['url']
         try:
-            # Determine content type
-            if '/blog' in url:
-                prompt = f"Summarize this blog post in 2-3 sentences, focusing on the key insights and value for readers: {content[:3000]}"
-            elif '/docs' in url:
-                prompt = f"Summarize this documentation page in 2-3 sentences, highlighting the main features or APIs: {content[:3000]}"
-            else:
-                prompt = f"Summarize this page in 2-3 sentences, focusing on the key information: {content[:3000]}"
+            try:
+                self.firecrawl_limiter.wait()
+            finally:
+                # Set even if the wait fails, so the caller never waits on it forever
+                deadline.start()
+                if sent:
+                    sent.set()
+            # The read timeout never runs past the URL's deadline
+            connect, read = self.firecrawl.timeouts['scrape']
+            read = max(0.1, min(read, deadline.remaining()))
+            started = time.monotonic()
+            response = self.firecrawl.post('scrape', request, timeout=(connect, read))
             
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers={
-                    'Authorization': f'Bearer {self.openai_api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'gpt-4o-mini',
+            if response.status_code == 200:
+                self.firecrawl_limiter.on_success()
+                if self.hedging:
+                    self.hedging.observe(kind, time.monotonic() - started)
+                return 'ok', response.json().get('data', {})
+            elif response.status_code == 429:
+                # Rate limited: the shared limiter slows down and honours Retry-After
+                self.firecrawl_limiter.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+            else:
+                print(f"  ⚠️  Failed to scrape {url}: {response.status_code}")
+                if response.status_code >= 500:
+                    self.firecrawl_limiter.on_timeout()
+        
+        except requests.exceptions.Timeout:
+            print(f"  ⏱️  Timeout scraping {url}")
+            self.firecrawl_limiter.on_timeout()
+        except Exception as e:
+            print(f"  ❌ Error scraping {url}: {e}")
+        
+        return 'retry', None
+    
+    def generate_summary(self, content: str, url: str) -> str:
+        """Generate AI summary for content, or a local one depending on the summarizer mode"""
+        import requests
+        fallback = "Content available at this URL."
+        # Too close to the deadline for another LLM round trip: summarize locally instead
+        offline = self.deadline is not None and not self.deadline.can_start('summary')
+        if self.summarizer != 'openai' or offline:
+            local = self.local_summarizer.summarize(url, content)
+            if self.summarizer == 'local' or offline or local.confidence >= self.min_confidence:
+                self.metrics.incr('summary.local')
+                if offline and self.summarizer != 'local':
+                    self.metrics.incr('summary.deadline_local')
+                return local.description
+            # Low confidence: ask the LLM, but keep the local summary in case that fails
+            self.metrics.incr('summary.low_confidence')
+            fallback = local.description
+        
+        # Determine content type
+        if '/blog' in url:
+            template = SUMMARY_PROMPTS['blog']
+        elif '/docs' in url:
+            template = SUMMARY_PROMPTS['docs']
+        else:
+            template = SUMMARY_PROMPTS['page']
+        excerpt = pack_sections(content, self.prompt_tokens)
+        
+        cache_key = None
+        if self.summary_cache:
+            cache_key = SummaryCache.make_key(url, excerpt, SUMMARY_SYSTEM_PROMPT + template, SUMMARY_MODEL)
+            cached = self.summary_cache.get(cache_key)
+            if cached:
+                return cached
+        
+        started = time.monotonic()
+        try:
+            for attempt in range(3):
+                if attempt:
+                    self.metrics.incr('openai.retries')
+                self.openai_limiter.wait()
+                response = self.openai.post('chat', {
+                    'model': SUMMARY_MODEL,
                     'messages': [
-                        {'role': 'system', 'content': 'You are a helpful assistant that creates concise, informative summaries for LLM consumption.'},
-                        {'role': 'user', 'content': prompt}
+                        {'role': 'system', 'content': SUMMARY_SYSTEM_PROMPT},
+                        {'role': 'user', 'content': template.format(content=excerpt)}
                     ],
                     'max_tokens': 150,
                     'temperature': 0.3
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data['choices'][0]['message']['content'].strip()
-            else:
-                return "Content available at this URL."
+                })
+                
+                if response.status_code == 429:
+                    self.openai_limiter.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+                    continue
+                if response.status_code >= 500:
+                    self.openai_limiter.on_timeout()
+                    continue
                 
+                if response.status_code == 200:
+                    self.openai_limiter.on_success()
+                    data = response.json()
+                    summary = data['choices'][0]['message']['content'].strip()
+                    usage = data.get('usage') or {}
+                    self.metrics.incr('openai.prompt_tokens', usage.get('prompt_tokens', 0))
+                    self.metrics.incr('openai.completion_tokens', usage.get('completion_tokens', 0))
+                    if cache_key:
+                        self.summary_cache.set(cache_key, summary)
+                    return summary
+                break
+            
+            return fallback
+        
+        except requests.exceptions.Timeout:
+            self.openai_limiter.on_timeout()
+            print(f"  ⏱️  Summary request timed out for {url}")
+            return fallback
         except Exception as e:
             print(f"  ⚠️  Summary generation failed: {e}")
-            return "Content available at this URL."
+            return fallback
+        finally:
+            if self.deadline:
+                self.deadline.observe('summary', time.monotonic() - started)
     
     def generate_llms_files(self, max_urls: int = 150, output_dir: str = './public'):
         """Generate both llms.txt and llms-full.txt files"""
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
+        self.metrics = RunMetrics(labels={'generator': 'blog', 'site': self.base_url})
+        self.firecrawl.metrics = self.metrics
+        self.openai.metrics = self.metrics
         
-        # Map the site
-        urls = self.map_site(max_urls)
-        
-        if not urls:
-            print("❌ No URLs found to process")
-            return False
+        # Discovery runs in the background; pages are processed best-ranked first as they are found
+        frontier = self.discover(max_urls)
         
-        # Process URLs
-        llms_entries = []
-        llms_full_entries = []
+        # Process URLs, streaming each entry to disk as soon as it is ready
+        llms_txt_path = os.path.join(output_dir, 'llms.txt')
+        llms_full_path = os.path.join(output_dir, 'llms-full.txt')
+        llms_writer = StreamingWriter(llms_txt_path)
+        full_writer = StreamingWriter(
+            llms_full_path, index_path=os.path.join(output_dir, FULL_TEXT_INDEX), encodings=self.full_text_encodings
+        )
         processed = 0
+        total = 0
+        changed_count = 0
+        near_duplicates = SimHashIndex() if self.dedup else None
+        boilerplate_model = BoilerplateModel() if self.strip_boilerplate else None
+        # Raw fingerprints of the pages the boilerplate model has counted
+        observed = SimHashIndex()
+        descriptions = {}
+        # (url, reason) of pages left out because the deadline was near
+        omitted: List[Tuple[str, str]] = []
         
-        print(f"\n📝 Processing {len(urls)} URLs...")
+        if self.journal:
+            resumed = self.journal.start(self.base_url)
+            if resumed:
+                print(f"⏯️  Resuming: {resumed} pages already finished in {self.journal.path}")
         
-        for i, url in enumerate(urls, 1):
-            print(f"  [{i}/{len(urls)}] Processing: {url}")
-            
-            # Rate limiting
-            time.sleep(1)
-            
-            # Scrape the URL
-            data = self.scrape_url(url)
-            
-            if data:
-                title = data.get('metadata', {}).get('title', 'Untitled')
-                description = data.get('metadata', {}).get('description', '')
-                content = data.get('markdown', '')
+        def remember(url: str, entry: str, full_entry: Optional[str]):
+            """Index a page published as stored, so a new near-duplicate of it is still caught"""
+            descriptions[url] = entry_description(entry)
+            page_fingerprint = fingerprint(section_content(full_entry)) if near_duplicates and full_entry else None
+            if page_fingerprint is not None:
+                near_duplicates.add(url, page_fingerprint)
+        
+        print(f"\n📝 Processing up to {max_urls} URLs...")
+        
+        try:
+            for i, url in enumerate(frontier, 1):
+                total = i
+                if self.journal and url in self.journal:
+                    print(f"  [{i}] Resumed: {url}")
+                    finished = self.journal.get(url)
+                    remember(url, finished['entry'], finished['full_entry'])
+                    llms_writer.write(i - 1, finished['entry'], url)
+                    full_writer.write(i - 1, finished['full_entry'], url)
+                    processed += 1
+                    self.metrics.incr('pages.resumed')
+                    continue
                 
-                # Generate summary if no description
-                if not description and content:
-                    description = self.generate_summary(content, url)
+                record = self.state_store.get(url) if self.state_store else None
                 
-                # Add to llms.txt (index format)
-                llms_entries.append(f"# {title}")
-                llms_entries.append(f"URL: {url}")
-                if description:
-                    llms_entries.append(f"Description: {description}")
-                llms_entries.append("")  # Empty line between entries
+                # Checked before the HEAD request below, which would itself run past the deadline
+                if self.deadline and not self.deadline.can_start('page'):
+                    if not frontier.closed:
+                        # Stop discovery and only publish what needs no more requests
+                        print(f"  ⏰ Deadline near ({self.deadline.remaining():.0f}s left): not starting new pages")
+                        frontier.close()
+                    if record and record.get('entry'):
+                        print(f"  [{i}] Out of time, reusing previous entry: {url}")
+                        remember(url, record['entry'], record['full_entry'])
+                        llms_writer.write(i - 1, record['entry'], url)
+                        full_writer.write(i - 1, record['full_entry'], url)
+                        processed += 1
+                        self.metrics.incr('pages.reused')
+                    else:
+                        print(f"  [{i}] Out of time, omitted: {url}")
+                        omitted.append((url, 'not started'))
+                        self.metrics.incr('pages.omitted')
+                        llms_writer.skip(i - 1)
+                        full_writer.skip(i - 1)
+                    continue
                 
-                # Add to llms-full.txt (with content)
-                llms_full_entries.append(f"# {title}")
-                llms_full_entries.append(f"URL: {url}")
-                if description:
-                    llms_full_entries.append(f"Description: {description}")
-                llms_full_entries.append("Content:")
-                llms_full_entries.append(content[:5000])  # Limit content length
-                llms_full_entries.append("\n---\n")  # Separator
+                # Find out whether the page changed since the last run
+                validators = {}
+                if self.state_store:
+                    changed, validators = self.page_changed(url, record, frontier.lastmod(url))
+                    if not changed:
+                        print(f"  [{i}] Unchanged: {url}")
+                        remember(url, record['entry'], record['full_entry'])
+                        llms_writer.write(i - 1, record['entry'], url)
+                        full_writer.write(i - 1, record['full_entry'], url)
+                        processed += 1
+                        self.metrics.incr('pages.reused')
+                        continue
+                    changed_count += 1
                 
-                processed += 1
-                print(f"    ✅ Processed: {title}")
-            else:
-                print(f"    ⚠️  Skipped (no data)")
-        
-        # Write llms.txt
-        llms_txt_path = os.path.join(output_dir, 'llms.txt')
-        with open(llms_txt_path, 'w', encoding='utf-8') as f:
-            f.write("# Sidetool.co - LLMs.txt\n")
-            f.write(f"# Generated: {datetime.now().isoformat()}\n")
-            f.write(f"# Total Pages: {processed}\n")
-            f.write("# Format: Title, URL, Description\n\n")
-            f.write("\n".join(llms_entries))
-        
-        # Write llms-full.txt
-        llms_full_path = os.path.join(output_dir, 'llms-full.txt')
-        with open(llms_full_path, 'w', encoding='utf-8') as f:
-            f.write("# Sidetool.co - LLMs Full Content\n")
-            f.write(f"# Generated: {datetime.now().isoformat()}\n")
-            f.write(f"# Total Pages: {processed}\n")
-            f.write("# Format: Title, URL, Description, Content\n\n")
-            f.write("\n".join(llms_full_entries))
+                print(f"  [{i}] Processing: {url}")
+                page_started = time.monotonic()
+                
+                # Scrape the URL
+                with self.metrics.stage('scrape'):
+                    data = self.scrape_url(url)
+                
+                if data:
+                    title = data.get('metadata', {}).get('title', 'Untitled')
+                    description = data.get('metadata', {}).get('description', '')
+                    content = data.get('markdown', '')
+                    page_hash = content_hash(content)
+                    
+                    if record and record.get('entry') and record.get('content_hash') == page_hash:
+                        # Same content as last time: keep the previous entry and skip the summary
+                        entry, full_entry = record['entry'], record['full_entry']
+                        original = record.get('duplicate_of')
+                        remember(url, entry, full_entry)
+                        self.metrics.incr('pages.reused')
+                    else:
+                        # Pages are taken one at a time in crawl order, so both the boilerplate a page
+                        # is stripped of and which of two near-duplicates is the original follow it
+                        boilerplate = frozenset()
+                        if boilerplate_model:
+                            # Learned as the crawl goes, so the first few pages keep more of their boilerplate;
+                            # near-identical pages count once, or their shared body would look like boilerplate
+                            raw_fingerprint, block_keys = analyze_page(content)
+                            if observed.match_or_add(url, raw_fingerprint) is None:
+                                boilerplate_model.observe(block_keys)
+                            boilerplate = boilerplate_model.boilerplate()
+                        with self.metrics.stage('cleanup'):
+                            cleaned, page_fingerprint = clean_page(content, boilerplate, near_duplicates is not None)
+                        self.metrics.incr('boilerplate.bytes_removed', len(content) - len(cleaned))
+                        content = cleaned
+                        original = near_duplicates.match_or_add(url, page_fingerprint) if near_duplicates else None
+                        if original:
+                            # Near-duplicate: borrow the original's summary and leave it out of llms-full.txt
+                            print(f"    🪞 Near-duplicate of {original}")
+                            description = description or descriptions.get(original, '')
+                            self.metrics.incr('pages.duplicate')
+                        elif not description and content:
+                            # Generate summary if no description
+                            with self.metrics.stage('summarize'):
+                                description = self.generate_summary(content, url)
+                        descriptions[url] = description
+                        
+                        with self.metrics.stage('render'):
+                            # llms.txt (index format)
+                            entry_lines = [f"# {title}", f"URL: {url}"]
+                            if description:
+                                entry_lines.append(f"Description: {description}")
+                            entry_lines.append("")  # Empty line between entries
+                            
+                            # llms-full.txt (with content)
+                            full_lines = [f"# {title}", f"URL: {url}"]
+                            if description:
+                                full_lines.append(f"Description: {description}")
+                            full_lines.append("Content:")
+                            full_lines.append(truncate_to_tokens(content, self.full_text_tokens))
+                            full_lines.append("\n---\n")  # Separator
+                            
+                            entry = "\n".join(entry_lines)
+                            full_entry = None if original else "\n".join(full_lines)
+                    
+                    if self.state_store:
+                        self.state_store.put(
+                            url,
+                            content_hash=page_hash,
+                            entry=entry,
+                            full_entry=full_entry,
+                            duplicate_of=original,
+                            **validators
+                        )
+                    if self.journal:
+                        self.journal.append(url, entry=entry, full_entry=full_entry, duplicate_of=original)
+                    
+                    with self.metrics.stage('write'):
+                        llms_writer.write(i - 1, entry, url)
+                        full_writer.write(i - 1, full_entry, url)
+                    processed += 1
+                    print(f"    ✅ Processed: {title}")
+                elif record and record.get('entry'):
+                    remember(url, record['entry'], record['full_entry'])
+                    llms_writer.write(i - 1, record['entry'], url)
+                    full_writer.write(i - 1, record['full_entry'], url)
+                    processed += 1
+                    self.metrics.incr('pages.reused')
+                    print("    ♻️  Scrape failed, reusing previous entry")
+                else:
+                    print(f"    ⚠️  Skipped (no data)")
+                    self.metrics.incr('pages.failed')
+                    llms_writer.skip(i - 1)
+                    full_writer.skip(i - 1)
+                if self.deadline:
+                    self.deadline.observe('page', time.monotonic() - page_started)
+            # Stop discovery once no more pages will be taken
+            frontier.close()
+            
+            if not total:
+                if self.deadline and self.deadline.expired():
+                    print("❌ Deadline reached before discovery found a page; existing files left in place")
+                else:
+                    print("❌ No URLs found to process")
+                return False
+            if self.state_store:
+                print(f"♻️  Incremental mode: {changed_count} of {total} URLs were new or changed")
+            if omitted and not processed:
+                # An empty index would be worse than the last published one
+                write_omitted_report(output_dir, self.base_url, self.deadline, omitted)
+                print("❌ Deadline reached before any page was finished; existing files left in place")
+                return False
+            
+            # Headers carry the page count, so they are added when publishing
+            omitted_line = f"# Omitted Pages: {len(omitted)} (deadline reached)\n" if omitted else ""
+            # With shards the time is recorded in the manifest, so unchanged content stays byte-identical
+            generated_line = "" if self.shards else f"# Generated: {datetime.now().isoformat()}\n"
+            # Crawl order depends on how discovery interleaved; the published order must not
+            with self.metrics.stage('write'):
+                llms_writer.commit(
+                    f"# {self.site_name} - LLMs.txt\n"
+                    f"{generated_line}"
+                    f"# Total Pages: {processed}\n"
+                    f"{omitted_line}"
+                    "# Format: Title, URL, Description\n\n",
+                    order=frontier.publish_key
+                )
+                full_writer.commit(
+                    f"# {self.site_name} - LLMs Full Content\n"
+                    f"{generated_line}"
+                    f"# Total Pages: {processed}\n"
+                    f"{omitted_line}"
+                    "# Format: Title, URL, Description, Content\n\n",
+                    order=frontier.publish_key
+                )
+            shard_stats = None
+            if self.shards:
+                with self.metrics.stage('shards'):
+                    shard_stats = publish_shards(
+                        llms_full_path, full_writer.entries, os.path.join(output_dir, SHARD_DIR),
+                        os.path.join(output_dir, SHARD_MANIFEST), self.shard_bytes,
+                        separator=full_writer.separator, encodings=full_writer.encodings, site=self.base_url,
+                        metadata={'omitted': len(omitted)} if omitted else None
+                    )
+            report_path = write_omitted_report(output_dir, self.base_url, self.deadline, omitted)
+            if self.journal and omitted:
+                # Keep the finished pages so --resume only has to do the omitted ones
+                print(f"⏯️  Journal kept at {self.journal.path}; rerun with --resume to finish the omitted pages")
+            elif self.journal:
+                self.journal.finish()
+        finally:
+            frontier.close()
+            llms_writer.abort()
+            full_writer.abort()
+            if self.journal:
+                self.journal.close()
         
         print(f"\n✅ Generation complete!")
+        for writer in (llms_writer, full_writer):
+            if not writer.changed:
+                print(f"  💤 {writer.path} unchanged, left in place")
+                self.metrics.incr('output.files_unchanged')
         print(f"  📄 {llms_txt_path} ({os.path.getsize(llms_txt_path) / 1024:.1f} KB)")
-        print(f"  📄 {llms_full_path} ({os.path.getsize(llms_full_path) / 1024:.1f} KB)")
-        print(f"  📊 Processed {processed}/{len(urls)} URLs successfully")
+        print(f"  📄 {llms_full_path} ({os.path.getsize(llms_full_path) / 1024:.1f} KB, page index in {full_writer.index_path})")
+        if shard_stats:
+            print(f"  🧩 {shard_stats['shards']} shards in {os.path.join(output_dir, SHARD_DIR)}: "
+                  f"{shard_stats['written']} written, {shard_stats['kept']} unchanged, {shard_stats['removed']} removed")
+            for key in ('written', 'kept', 'removed'):
+                self.metrics.gauge(f"output.shards_{key}", shard_stats[key])
+        for encoding in full_writer.encodings:
+            compressed_path = llms_full_path + ENCODINGS[encoding]
+            print(f"  📦 {compressed_path} ({os.path.getsize(compressed_path) / 1024:.1f} KB)")
+            self.metrics.gauge(f"output.llms_full_txt_{encoding}_bytes", os.path.getsize(compressed_path))
+        print(f"  📊 Processed {processed}/{total} URLs successfully")
+        if report_path:
+            print(f"  ⏰ {len(omitted)} pages omitted at the deadline, listed in {report_path}")
+        self.metrics.incr('pages.published', processed)
+        self.metrics.gauge('output.llms_txt_bytes', os.path.getsize(llms_txt_path))
+        self.metrics.gauge('output.llms_full_txt_bytes', os.path.getsize(llms_full_path))
+        if self.summary_cache:
+            stats = self.summary_cache.stats()
+            print(f"  💾 Summary cache: {stats['hits']} hits, {stats['misses']} misses")
+            self.metrics.gauge('cache.hits', stats['hits'])
+            self.metrics.gauge('cache.misses', stats['misses'])
+        for limiter in (self.firecrawl_limiter, self.openai_limiter):
+            print(f"  🚦 {limiter.describe()}")
+            for key, value in limiter.snapshot().items():
+                self.metrics.gauge(f"limiter.{limiter.name.lower()}.{key}", value)
         
         return True
+    
+    def close(self):
+        """Release pooled connections"""
+        self.scrape_pool.shutdown(wait=False, cancel_futures=True)
+        self.firecrawl.close()
+        self.openai.close()
+        self.site.close()
 
 def main():
     """Main execution function"""
@@ -251,9 +729,38 @@ def main():
     parser.add_argument('url', nargs='?', default='https://www.sidetool.co', help='Base URL to crawl')
     parser.add_argument('--max-urls', type=int, default=150, help='Maximum URLs to process')
     parser.add_argument('--output-dir', default='./public', help='Output directory')
-    parser.add_argument('--focus-paths', nargs='+', default=['/blog'], help='Paths to prioritize')
+    parser.add_argument('--focus-paths', nargs='+', default=DEFAULT_FOCUS_PATHS, help='Paths to scrape first, highest priority first')
+    parser.add_argument('--firecrawl-rate', type=float, default=2.0, help='Starting Firecrawl requests per second (adapts to 429s)')
+    parser.add_argument('--openai-rate', type=float, default=5.0, help='Starting OpenAI requests per second (adapts to 429s)')
+    parser.add_argument('--pool-size', type=int, default=10, help='Keep-alive connections per API host')
+    parser.add_argument('--connect-timeout', type=float, default=5.0, help='Connect timeout in seconds for every request')
+    parser.add_argument('--scrape-timeout', type=float, default=30.0, help='Read timeout in seconds for Firecrawl scrapes')
+    parser.add_argument('--summary-timeout', type=float, default=60.0, help='Read timeout in seconds for OpenAI summaries')
+    parser.add_argument('--no-gzip', action='store_true', help='Ask APIs for uncompressed responses')
+    parser.add_argument('--cache-path', default=DEFAULT_CACHE_PATH, help='Summary cache database')
+    parser.add_argument('--no-cache', action='store_true', help='Always call OpenAI instead of reusing cached summaries')
+    parser.add_argument('--incremental', action='store_true', help='Only re-scrape pages whose sitemap lastmod / ETag changed')
+    parser.add_argument('--state-path', default=DEFAULT_STATE_PATH, help='Per-URL state used by --incremental')
+    parser.add_argument('--resume', action='store_true', help='Skip pages already finished by an interrupted run and rebuild the outputs from its journal')
+    parser.add_argument('--journal-path', default=DEFAULT_JOURNAL_PATH.format(generator='blog'), help='Journal of finished pages used by --resume')
+    parser.add_argument('--no-dedup', action='store_true', help='Summarize and publish near-duplicate pages separately')
+    parser.add_argument('--no-boilerplate', action='store_true', help='Keep nav, footer and other blocks repeated across pages')
+    parser.add_argument('--prompt-tokens', type=int, help='Token budget for the page excerpt in each summary prompt (default: per model)')
+    parser.add_argument('--full-text-tokens', type=int, default=FULL_TEXT_TOKENS, help='Token cap for each page in llms-full.txt')
+    parser.add_argument('--summarizer', choices=SUMMARIZER_MODES, default='openai', help='openai, local (offline, no OpenAI key needed) or hybrid (LLM only for low-confidence local summaries)')
+    parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE, help='Local summaries below this confidence go to the LLM in hybrid mode')
+    parser.add_argument('--no-precompress', action='store_true', help='Skip the gzip and brotli copies of llms-full.txt')
+    parser.add_argument('--shards', action='store_true', help='Also publish llms-full.txt as content-hashed shards plus llms-full.manifest.json, rewriting only changed shards; the timestamp moves from the headers into the manifest')
+    parser.add_argument('--shard-kb', type=int, default=DEFAULT_SHARD_BYTES // 1024, help='Largest shard size in KB')
+    parser.add_argument('--url-deadline', type=float, default=DEFAULT_URL_DEADLINE, help='Seconds one page may take across all scrape attempts before it is recorded as timed out')
+    parser.add_argument('--no-hedge', action='store_true', help="Never send a duplicate request for a scrape slower than its URL class's p95")
+    parser.add_argument('--deadline', type=float, help='Seconds the run may take; best-ranked pages go first and whatever is finished is published in time, with the rest listed in llms-omitted.json')
+    parser.add_argument('--metrics-out', help='Write run metrics to this path (JSON, or Prometheus text for a .prom file)')
+    parser.add_argument('--profile', help='Run under cProfile and dump stats to this path')
     
     args = parser.parse_args()
+    # Load environment variables
+    load_dotenv()
     
     # Get API keys
     api_keys = {
@@ -265,29 +772,71 @@ def main():
     if not api_keys['firecrawl']:
         print("❌ Error: FIRECRAWL_API_KEY not set")
         sys.exit(1)
-    if not api_keys['openai']:
+    if not api_keys['openai'] and args.summarizer != 'local':
         print("❌ Error: OPENAI_API_KEY not set")
         sys.exit(1)
     
     # Generate files
-    print(f"🚀 Starting LLMs.txt generation for Sidetool.co")
+    print(f"🚀 Starting LLMs.txt generation for {args.url}")
     print(f"  🎯 Focus on: {', '.join(args.focus_paths)}")
     print(f"  📊 Max URLs: {args.max_urls}")
+    if args.deadline:
+        print(f"  ⏰ Deadline: {args.deadline:.0f}s")
     print(f"  📁 Output: {args.output_dir}")
     print("")
     
-    generator = SidetoolLLMsGenerator(api_keys)
-    success = generator.generate_llms_files(
-        max_urls=args.max_urls,
-        output_dir=args.output_dir
+    summary_cache = None if args.no_cache else SummaryCache(args.cache_path)
+    state_store = PageStateStore(args.state_path) if args.incremental else None
+    journal = RunJournal(args.journal_path, resume=args.resume)
+    generator = SidetoolLLMsGenerator(
+        api_keys,
+        summary_cache=summary_cache,
+        state_store=state_store,
+        firecrawl_rate=args.firecrawl_rate,
+        openai_rate=args.openai_rate,
+        pool_size=args.pool_size,
+        timeouts=timeouts_from_args(args.connect_timeout, args.scrape_timeout, args.summary_timeout),
+        gzip=not args.no_gzip,
+        journal=journal,
+        base_url=args.url,
+        dedup=not args.no_dedup,
+        boilerplate=not args.no_boilerplate,
+        prompt_tokens=args.prompt_tokens,
+        full_text_tokens=args.full_text_tokens,
+        summarizer=args.summarizer,
+        min_confidence=args.min_confidence,
+        focus_paths=args.focus_paths,
+        deadline=Deadline(args.deadline) if args.deadline else None,
+        precompress=not args.no_precompress,
+        hedge=not args.no_hedge,
+        url_deadline=args.url_deadline,
+        shards=args.shards,
+        shard_bytes=args.shard_kb * 1024
     )
+    def run():
+        return generator.generate_llms_files(
+            max_urls=args.max_urls,
+            output_dir=args.output_dir
+        )
+    
+    try:
+        success = run_profiled(run, args.profile) if args.profile else run()
+        if args.metrics_out:
+            generator.metrics.write(args.metrics_out)
+            print(f"  📈 Metrics written to {args.metrics_out}")
+    finally:
+        generator.close()
+        if summary_cache:
+            summary_cache.close()
+        if state_store:
+            state_store.close()
     
     if success:
         print("\n🎉 Success! Files are ready for deployment.")
         print("  Next step: Files will be committed and pushed to GitHub")
         print("  Then available at:")
-        print("    - https://sidetool.co/llms.txt")
-        print("    - https://sidetool.co/llms-full.txt")
+        print(f"    - {generator.base_url}/llms.txt")
+        print(f"    - {generator.base_url}/llms-full.txt")
     else:
         print("\n❌ Generation failed. Check the logs above.")
         sys.exit(1)
@@ -7,128 +7,578 @@ import os
 import sys
 import argparse
 import asyncio
-import aiohttp
-from typing import List, Dict, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Awaitable, Callable, FrozenSet, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
-from firecrawl import FirecrawlApp
-from openai import OpenAI
 import json
+import re
 import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from urllib.parse import urlparse
+
+from llmstxt.boilerplate import BoilerplateModel, analyze_page, clean_page, default_workers
+from llmstxt.cache import DEFAULT_CACHE_PATH, SummaryCache
+from llmstxt.deadline import Deadline, write_omitted_report
+from llmstxt.dedup import SimHashIndex, dedupe_urls, fingerprint
+from llmstxt.discovery import DEFAULT_FOCUS_PATHS, Frontier, site_host
+from llmstxt.http import FIRECRAWL_API_URL, OPENAI_API_URL
+from llmstxt.journal import DEFAULT_JOURNAL_PATH, RunJournal
+from llmstxt.metrics import RunMetrics, run_profiled
+from llmstxt.ratelimit import AdaptiveLimiter, TokenBudget, parse_retry_after
+from llmstxt.scheduler import CrawlScheduler
+from llmstxt.scrape import DEFAULT_URL_DEADLINE, HedgePolicy, scrape_request, url_class
+from llmstxt.shards import DEFAULT_SHARD_BYTES, SHARD_DIR, SHARD_MANIFEST, publish_shards
+from llmstxt.state import DEFAULT_STATE_PATH, PageStateStore, content_hash, parse_sitemap, url_key
+from llmstxt.summarize import DEFAULT_MIN_CONFIDENCE, SUMMARIZER_MODES, LocalSummarizer
+from llmstxt.tokens import estimate_tokens, pack_sections, prompt_budget
+from llmstxt.writer import DEFAULT_ENCODINGS, ENCODINGS, StreamingWriter
+
+if TYPE_CHECKING:
+    # aiohttp and openai take most of a second to import, so they are imported where first used
+    import aiohttp
+    from openai import AsyncOpenAI
+
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_SYSTEM_PROMPT = "You are a helpful assistant that creates concise summaries."
+SUMMARY_MAX_TOKENS = 50
+# Fresh pages the boilerplate model sees before the first page is cleaned
+BOILERPLATE_WARMUP = 10
+SUMMARY_PROMPT_TEMPLATE = """Given this webpage content from {url}, generate:
+1. A title (3-4 words max)
+2. A description (9-10 words max)
+
+Content:
+{content}
+
+Format your response as:
+Title: [title here]
+Description: [description here]"""
+BATCH_PROMPT_TEMPLATE = """Below are {count} webpages. For each page, generate:
+1. A title (3-4 words max)
+2. A description (9-10 words max)
+
+Respond with a JSON object of the form
+{{"pages": [{{"url": "<page URL exactly as given>", "title": "...", "description": "..."}}]}}
+with one entry per page.
+
+{pages}"""
+# Output tokens per page in a batched request: the summary plus the echoed URL and JSON syntax
+BATCH_TOKENS_PER_PAGE = 100
+# How long a partial batch waits for more scraped pages before it is sent anyway
+SUMMARY_BATCH_WAIT = 1.0
+# Byte offset and length of each page in llms-full.txt, for range reads
+FULL_TEXT_INDEX = "llms-full.index.json"
+SCRAPE_TIMEOUT = 60.0
+# An llms.txt line as render_entry writes it
+ENTRY_PATTERN = re.compile(r'- \[(.*)\]\(\S*\): (.*)', re.S)
+
+def build_firecrawl_session(api_key: str, limit: int, timeout: float) -> 'aiohttp.ClientSession':
+    """Keep-alive session for the Firecrawl REST API"""
+    import aiohttp
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit),
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        headers={
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        }
+    )
+
+
+def parse_batch_summaries(text: str, urls: List[str]) -> Dict[str, Tuple[str, str]]:
+    """Valid (title, description) pairs from a batched summary response, keyed by requested URL
+    
+    Entries for unknown URLs, repeated URLs or with a missing title or
+    description are dropped, so their pages can be retried one by one.
+    """
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.strip('`').removeprefix('json').strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    items = data.get('pages') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return {}
+    
+    requested = {url.rstrip('/'): url for url in urls}
+    summaries: Dict[str, Tuple[str, str]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        url = requested.get(str(item.get('url', '')).strip().rstrip('/'))
+        title, description = item.get('title'), item.get('description')
+        if (url and url not in summaries and isinstance(title, str) and title.strip()
+                and isinstance(description, str) and description.strip()):
+            summaries[url] = (title.strip(), description.strip())
+    return summaries
+
+
+def parse_entry(entry: str) -> Optional[Tuple[str, str]]:
+    """Title and description of a rendered llms.txt line, or None if it is not one"""
+    match = ENTRY_PATTERN.fullmatch(entry)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def make_openai_client(api_key: Optional[str], api_url: str = OPENAI_API_URL) -> 'AsyncOpenAI':
+    """OpenAI client for summaries; retries are ours so that every 429 reaches the adaptive limiter"""
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key, base_url=f"{api_url}/v1", timeout=60.0, max_retries=0)
 
-load_dotenv()
 
 class SidetoolLLMSTxtGenerator:
-    def __init__(self, firecrawl_api_key: str, openai_api_key: str, max_urls: int = 50, verbose: bool = False):
-        self.firecrawl = FirecrawlApp(api_key=firecrawl_api_key)
-        self.openai = OpenAI(api_key=openai_api_key)
+    def __init__(self, firecrawl_api_key: str, openai_api_key: Optional[str], max_urls: int = 50, verbose: bool = False,
+                 concurrency: int = 10, scrape_timeout: float = SCRAPE_TIMEOUT,
+                 summary_concurrency: int = 5, tokens_per_minute: int = 200000,
+                 summary_cache: Optional[SummaryCache] = None, state_store: Optional[PageStateStore] = None,
+                 firecrawl_rate: float = 5.0, openai_rate: float = 10.0,
+                 firecrawl_api_url: str = FIRECRAWL_API_URL, openai_api_url: str = OPENAI_API_URL,
+                 journal: Optional[RunJournal] = None, base_url: str = "https://sidetool.co",
+                 scheduler: Optional[CrawlScheduler] = None, dedup: bool = True,
+                 boilerplate: bool = True, cleanup_workers: Optional[int] = None,
+                 executor: Optional[Executor] = None, prompt_tokens: Optional[int] = None,
+                 summary_batch: int = 1, summarizer: str = 'openai',
+                 local_summarizer: Optional[LocalSummarizer] = None,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE, deadline: Optional[Deadline] = None,
+                 precompress: bool = True, openai_client: Optional['AsyncOpenAI'] = None,
+                 firecrawl_http: Optional['aiohttp.ClientSession'] = None, hedge: bool = True,
+                 url_deadline: float = DEFAULT_URL_DEADLINE, shards: bool = False,
+                 shard_bytes: int = DEFAULT_SHARD_BYTES, focus_paths: Optional[List[str]] = None):
+        if summarizer not in SUMMARIZER_MODES:
+            raise ValueError(f"Unknown summarizer {summarizer!r}, expected one of {', '.join(SUMMARIZER_MODES)}")
+        self.summarizer = summarizer
+        # Local runs need no client (or key); a long-running service passes its warm clients in
+        self.openai = None
+        if summarizer != 'local':
+            self.openai = openai_client or make_openai_client(openai_api_key, openai_api_url)
+        # A client made here is closed when generate() ends; a passed-in one belongs to the caller
+        self.owns_openai = self.openai is not None and openai_client is None
+        self.firecrawl_http = firecrawl_http
+        self.firecrawl_api_key = firecrawl_api_key
+        self.firecrawl_api_url = firecrawl_api_url.rstrip('/')
         self.max_urls = max_urls
         self.verbose = verbose
-        self.base_url = "https://sidetool.co"
-        
+        self.concurrency = max(1, concurrency)
+        self.scrape_timeout = scrape_timeout
+        self.max_retries = 3
+        # Seconds a page may take across every attempt; hedging duplicates scrapes stuck in the slow tail
+        self.url_deadline = url_deadline
+        self.hedging = HedgePolicy() if hedge else None
+        self.summary_concurrency = max(1, summary_concurrency)
+        self.scheduler = scheduler
+        if scheduler:
+            # Batch runs share the account-wide limiters across every site
+            self.firecrawl_limiter = scheduler.firecrawl_limiter
+            self.openai_limiter = scheduler.openai_limiter
+        else:
+            self.firecrawl_limiter = AdaptiveLimiter(
+                'Firecrawl', rate=firecrawl_rate, concurrency=max(1, self.concurrency // 2),
+                max_concurrency=self.concurrency
+            )
+            self.openai_limiter = AdaptiveLimiter(
+                'OpenAI', rate=openai_rate, concurrency=max(1, self.summary_concurrency // 2),
+                max_concurrency=self.summary_concurrency
+            )
+        self.tokens_per_minute = tokens_per_minute
+        self.prompt_tokens = prompt_tokens or prompt_budget(SUMMARY_MODEL)
+        self.summary_batch = max(1, summary_batch)
+        self.local_summarizer = local_summarizer or LocalSummarizer()
+        self.min_confidence = min_confidence
+        self.summary_cache = summary_cache
+        self.state_store = state_store
+        self.journal = journal
+        # Time budget for the run; batch runs share one across every site
+        self.deadline = deadline
+        # gzip / brotli copies of llms-full.txt for static hosting
+        self.full_text_encodings = DEFAULT_ENCODINGS if precompress else ()
+        # Content-hashed llms-full.txt shards with a manifest, rewriting only the changed ones
+        self.shards = shards
+        self.shard_bytes = shard_bytes
+        # Sections ranked first when a deadline decides which pages fit
+        self.focus_paths = list(DEFAULT_FOCUS_PATHS) if focus_paths is None else list(focus_paths)
+        self.dedup = dedup
+        self.near_duplicates: Optional[SimHashIndex] = None
+        self.strip_boilerplate = boilerplate
+        self.boilerplate_model: Optional[BoilerplateModel] = None
+        # Pages waiting for their turn in the cleanup stage, keyed by index
+        self.cleanup_pending: Dict[int, Tuple[Optional[Dict], Optional[Tuple[Optional[int], List[int]]]]] = {}
+        self.cleanup_next = 0
+        self.cleanup_wakeup: Optional[asyncio.Event] = None
+        self.cleanup_flush = False
+        # Page analysis and cleanup are CPU-bound, so they run in a process pool (0 = inline)
+        self.cleanup_workers = default_workers() if cleanup_workers is None else cleanup_workers
+        self.shared_executor = executor
+        self.executor: Optional[Executor] = None
+        self.scrape_workers = 0
+        self.idle_scrapers = 0
+        self.completed = 0
+        self.changed_urls: set = set()
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self.base_url = base_url.rstrip('/')
+        self.domain = urlparse(self.base_url).netloc
+        self.metrics = RunMetrics()
+    
     def log(self, message: str):
         if self.verbose:
             print(f"[INFO] {message}")
     
-    def map_website(self) -> List[str]:
-        """Map all URLs on sidetool.co"""
+    def site_slot(self):
+        """This site's share of the batch scheduler, or a no-op for single-site runs"""
+        return self.scheduler.slot(self.domain) if self.scheduler else nullcontext()
+    
+    def firecrawl_session(self, limit: int):
+        """Context manager for a Firecrawl session: a new one, or the shared warm one left open on exit"""
+        if self.firecrawl_http is not None:
+            return nullcontext(self.firecrawl_http)
+        return build_firecrawl_session(self.firecrawl_api_key, limit, self.scrape_timeout)
+    
+    async def map_website(self) -> List[str]:
+        """Map all URLs on the site"""
         self.log(f"Mapping {self.base_url}...")
         try:
-            map_result = self.firecrawl.map_url(
-                self.base_url,
-                limit=self.max_urls
-            )
+            async with self.firecrawl_session(1) as session, self.site_slot():
+                with self.metrics.call('firecrawl.map'):
+                    async with session.post(
+                        f"{self.firecrawl_api_url}/v1/map",
+                        json={'url': self.base_url, 'limit': self.max_urls}
+                    ) as response:
+                        if response.status != 200:
+                            print(f"Error mapping website: HTTP {response.status}")
+                            return []
+                        body = await response.read()
+            self.metrics.add_bytes('in', len(body))
+            map_result = json.loads(body)
             
-            self.log(f"Map result: {map_result}")
+            self.log(f"Map result: {len(map_result.get('links') or [])} links")
             
-            if map_result:
-                urls = []
-                if hasattr(map_result, 'links') and map_result.links:
-                    urls = map_result.links[:self.max_urls]
-                elif isinstance(map_result, dict) and 'links' in map_result:
-                    urls = map_result['links'][:self.max_urls]
-                elif isinstance(map_result, list):
-                    urls = map_result[:self.max_urls]
-                
-                if urls:
-                    self.log(f"Found {len(urls)} URLs")
-                    return urls
+            urls = map_result.get('links') or (map_result.get('data') or {}).get('urls') or []
+            # Query-string and trailing-slash variants of one page are scraped once
+            urls = dedupe_urls(urls)[:self.max_urls]
+            if urls:
+                self.log(f"Found {len(urls)} URLs")
+                return urls
             
             print(f"Error: No URLs found for {self.base_url}")
             return []
-                
+        
         except Exception as e:
             print(f"Error mapping website: {e}")
             return []
     
-    def scrape_url(self, url: str) -> Dict:
-        """Scrape a single URL and return its content"""
+    async def scrape_url(self, session: 'aiohttp.ClientSession', url: str) -> Dict:
+        """Scrape a single URL through the Firecrawl REST API and return its content
+        
+        All attempts share a hard per-URL deadline, counted from when the
+        first request is sent rather than while it waits for a rate-limiter
+        or scheduler slot; a page that runs past it is recorded as timed out
+        instead of holding up the run.
+        """
+        self.log(f"Scraping: {url}")
+        sent = asyncio.Event()
+        attempts = asyncio.create_task(self._scrape_attempts(session, url, sent))
+        waiting = asyncio.create_task(sent.wait())
         try:
-            self.log(f"Scraping: {url}")
-            result = self.firecrawl.scrape_url(url)
-            
-            if result:
-                content = ''
-                if hasattr(result, 'markdown') and result.markdown:
-                    content = result.markdown
-                elif isinstance(result, dict) and 'markdown' in result:
-                    content = result['markdown']
-                elif hasattr(result, 'content') and result.content:
-                    content = result.content
-                elif isinstance(result, dict) and 'content' in result:
-                    content = result['content']
-                
-                if content:
-                    return {
-                        'url': url,
-                        'content': content,
-                        'success': True
-                    }
-            
+            await asyncio.wait([attempts, waiting], return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(attempts, self.url_deadline)
+        except asyncio.TimeoutError:
+            self.metrics.incr('firecrawl.url_deadline')
+            error = f"Timeout (URL deadline of {self.url_deadline:g}s)"
+            self.log(f"Error scraping {url}: {error}")
             return {
                 'url': url,
                 'content': '',
                 'success': False,
-                'error': 'No content found'
+                'error': error
             }
-                
+        finally:
+            waiting.cancel()
+            attempts.cancel()
+    
+    async def _scrape_attempts(self, session: 'aiohttp.ClientSession', url: str, sent: asyncio.Event) -> Dict:
+        """Scrape with retries; `sent` is set once the first request has its slot"""
+        request = scrape_request(url)
+        kind = url_class(url)
+        error = 'No content found'
+        
+        for attempt in range(self.max_retries):
+            if attempt:
+                self.metrics.incr('firecrawl.retries')
+            outcome, value = await self._hedged_scrape(session, request, kind, sent)
+            if outcome == 'ok':
+                return {
+                    'url': url,
+                    'content': value,
+                    'success': True
+                }
+            error = value
+            if outcome == 'fail':
+                break
+        
+        self.log(f"Error scraping {url}: {error}")
+        return {
+            'url': url,
+            'content': '',
+            'success': False,
+            'error': error
+        }
+    
+    async def _hedged_scrape(self, session: 'aiohttp.ClientSession', request: Dict, kind: str,
+                             first_sent: asyncio.Event) -> Tuple[str, str]:
+        """One scrape attempt, plus a duplicate request if it outlives the p95 of its URL class
+        
+        Whichever request succeeds first wins and the other is cancelled.
+        """
+        sent = asyncio.Event()
+        attempts = [asyncio.create_task(self._scrape_once(session, request, kind, sent, first_sent))]
+        try:
+            delay = None
+            if self.hedging:
+                self.hedging.started()
+                delay = self.hedging.delay(kind)
+            if delay is not None:
+                # Time the request from when it is sent, not while it waits for a slot
+                waiting = asyncio.create_task(sent.wait())
+                await asyncio.wait([attempts[0], waiting], return_when=asyncio.FIRST_COMPLETED)
+                waiting.cancel()
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done and self.hedging.allow_hedge():
+                    self.metrics.incr('firecrawl.hedges')
+                    attempts.append(asyncio.create_task(self._scrape_once(session, request, kind)))
+            
+            failure = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    outcome = task.result()
+                    if outcome[0] == 'ok':
+                        if task is not attempts[0]:
+                            self.metrics.incr('firecrawl.hedge_wins')
+                        return outcome
+                    failure = failure or outcome
+            return failure
+        finally:
+            for task in attempts:
+                task.cancel()
+    
+    async def _scrape_once(self, session: 'aiohttp.ClientSession', request: Dict, kind: str,
+                           *sent: asyncio.Event) -> Tuple[str, str]:
+        """Send one scrape request: ('ok', markdown), ('retry', error) or ('fail', error)
+        
+        Every `sent` event is set once the request has its slots.
+        """
+        import aiohttp
+        try:
+            async with self.site_slot(), self.firecrawl_limiter.slot():
+                for event in sent:
+                    event.set()
+                started = time.monotonic()
+                self.metrics.add_bytes('out', len(json.dumps(request)))
+                with self.metrics.call('firecrawl.scrape'):
+                    async with session.post(f"{self.firecrawl_api_url}/v1/scrape", json=request) as response:
+                        if response.status == 429:
+                            self.metrics.incr('firecrawl.429')
+                            self.firecrawl_limiter.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+                            return 'retry', 'HTTP 429'
+                        if response.status >= 500:
+                            # Server errors are an overload signal just like timeouts
+                            self.metrics.incr('firecrawl.5xx')
+                            self.firecrawl_limiter.on_timeout()
+                            return 'retry', f"HTTP {response.status}"
+                        if response.status != 200:
+                            return 'fail', f"HTTP {response.status}"
+                        
+                        self.firecrawl_limiter.on_success()
+                        body = await response.read()
+            
+            self.metrics.add_bytes('in', len(body))
+            payload = json.loads(body)
+            data = payload.get('data') or {}
+            content = data.get('markdown') or data.get('content') or ''
+            if not content:
+                return 'fail', 'No content found'
+            if self.hedging:
+                self.hedging.observe(kind, time.monotonic() - started)
+            return 'ok', content
+        
+        except asyncio.TimeoutError:
+            self.metrics.incr('firecrawl.timeouts')
+            self.firecrawl_limiter.on_timeout()
+            return 'retry', 'Timeout'
+        except aiohttp.ClientError as e:
+            self.metrics.incr('firecrawl.errors')
+            self.firecrawl_limiter.on_timeout()
+            return 'retry', str(e) or e.__class__.__name__
         except Exception as e:
-            self.log(f"Error scraping {url}: {e}")
-            return {
-                'url': url,
-                'content': '',
-                'success': False,
-                'error': str(e)
-            }
+            return 'fail', str(e)
     
-    def generate_summary(self, url: str, content: str) -> Tuple[str, str]:
+    async def request_completion(self, messages: List[Dict], max_tokens: int, **kwargs) -> str:
+        """Send one chat completion through the token budget and the adaptive OpenAI limiter"""
+        started = time.monotonic()
+        try:
+            return await self._request_completion(messages, max_tokens, **kwargs)
+        finally:
+            if self.deadline:
+                self.deadline.observe('summary', time.monotonic() - started)
+    
+    async def _request_completion(self, messages: List[Dict], max_tokens: int, **kwargs) -> str:
+        import openai
+        for attempt in range(self.max_retries):
+            last_attempt = attempt + 1 == self.max_retries
+            if attempt:
+                self.metrics.incr('openai.retries')
+            
+            await self.token_budget.acquire(sum(estimate_tokens(m['content']) for m in messages) + max_tokens)
+            
+            async with self.openai_limiter.slot():
+                try:
+                    self.metrics.add_bytes('out', sum(len(m['content'].encode('utf-8')) for m in messages))
+                    with self.metrics.call('openai.chat'):
+                        response = await self.openai.chat.completions.create(
+                            model=SUMMARY_MODEL,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=0.3,
+                            **kwargs
+                        )
+                except openai.RateLimitError as e:
+                    self.metrics.incr('openai.429')
+                    self.openai_limiter.on_throttle(parse_retry_after(e.response.headers.get('retry-after')))
+                    if last_attempt:
+                        raise
+                    continue
+                except (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError):
+                    self.metrics.incr('openai.timeouts')
+                    self.openai_limiter.on_timeout()
+                    if last_attempt:
+                        raise
+                    continue
+            
+            self.openai_limiter.on_success()
+            content = response.choices[0].message.content or ''
+            self.metrics.add_bytes('in', len(content.encode('utf-8')))
+            if response.usage:
+                self.metrics.incr('openai.prompt_tokens', response.usage.prompt_tokens)
+                self.metrics.incr('openai.completion_tokens', response.usage.completion_tokens)
+            return content
+    
+    def _cached_summary(self, url: str, excerpt: str) -> Tuple[Optional[Tuple[str, str]], Optional[Tuple[str, str]]]:
+        """Cache keys for a single and a batched summary request, and the cached (title, description), if any
+        
+        Each answer is stored under the key of the prompt that produced it,
+        so changing either template only invalidates its own entries; a page
+        is found whichever way it was summarized last.
+        """
+        if not self.summary_cache:
+            return None, None
+        cache_keys = tuple(
+            SummaryCache.make_key(url, excerpt, SUMMARY_SYSTEM_PROMPT + template, SUMMARY_MODEL)
+            for template in (SUMMARY_PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE)
+        )
+        for cache_key in cache_keys:
+            cached = self.summary_cache.get(cache_key)
+            if cached:
+                title, description = json.loads(cached)
+                return cache_keys, (title, description)
+        return cache_keys, None
+    
+    async def generate_summary(self, url: str, content: str) -> Tuple[str, str]:
         """Generate title and description using OpenAI"""
-        if not content or len(content.strip()) < 10:
-            return "Page", "Content not available"
+        return (await self.generate_summaries([(url, content)]))[0]
+    
+    async def generate_summaries(self, pages: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Generate titles and descriptions for (url, content) pages
         
+        With the local or hybrid summarizer, pages are first summarized
+        locally; hybrid runs keep the local summary when it is confident
+        enough and otherwise use it only if the LLM request fails. When the
+        deadline leaves no time for another LLM request every page is
+        summarized locally, whatever the summarizer mode. Uncached
+        pages left for the LLM are sent together in one JSON-mode request
+        when there is more than one; any page missing from or invalid in the
+        response falls back to a request of its own.
+        """
+        results: List[Optional[Tuple[str, str]]] = [None] * len(pages)
+        defaults: Dict[int, Tuple[str, str]] = {}
+        pending = []
+        offline = self.deadline is not None and not self.deadline.can_start('summary')
+        for i, (url, content) in enumerate(pages):
+            if not content or len(content.strip()) < 10:
+                results[i] = ("Page", "Content not available")
+                continue
+            if self.summarizer != 'openai' or offline:
+                local = await self.offload(self.local_summarizer.summarize, url, content)
+                if self.summarizer == 'local' or offline or local.confidence >= self.min_confidence:
+                    self.metrics.incr('summary.local')
+                    if offline and self.summarizer != 'local':
+                        self.metrics.incr('summary.deadline_local')
+                    results[i] = (local.title, local.description)
+                    continue
+                self.metrics.incr('summary.low_confidence')
+                defaults[i] = (local.title, local.description)
+            excerpt = pack_sections(content, self.prompt_tokens)
+            cache_keys, cached = self._cached_summary(url, excerpt)
+            if cached:
+                results[i] = cached
+            else:
+                pending.append((i, url, excerpt, cache_keys))
+        
+        if len(pending) > 1:
+            summaries = await self.request_batch_summary([(url, excerpt) for _, url, excerpt, _ in pending])
+            self.metrics.incr('summary.batched', len(summaries))
+            for i, url, _, cache_keys in pending:
+                if url in summaries:
+                    results[i] = summaries[url]
+                    if cache_keys:
+                        self.summary_cache.set(cache_keys[1], json.dumps(summaries[url]))
+        
+        fallback = [(i, url, excerpt, cache_keys) for i, url, excerpt, cache_keys in pending if results[i] is None]
+        if len(pending) > 1 and fallback:
+            self.metrics.incr('summary.batch_fallbacks', len(fallback))
+        singles = await asyncio.gather(*(
+            self.summarize_excerpt(url, excerpt, cache_keys[0] if cache_keys else None,
+                                   defaults.get(i, ("Page", "Content summary")))
+            for i, url, excerpt, cache_keys in fallback
+        ))
+        for (i, _, _, _), summary in zip(fallback, singles):
+            results[i] = summary
+        return results
+    
+    async def request_batch_summary(self, pages: List[Tuple[str, str]]) -> Dict[str, Tuple[str, str]]:
+        """Summarize several (url, excerpt) pages with one request; returns only the valid entries"""
+        prompt = BATCH_PROMPT_TEMPLATE.format(
+            count=len(pages),
+            pages="\n\n".join(f"--- Page {n} ---\nURL: {url}\n\n{excerpt}" for n, (url, excerpt) in enumerate(pages, 1))
+        )
         try:
-            prompt = f"""Given this webpage content from {url}, generate:
-1. A title (3-4 words max)
-2. A description (9-10 words max)
-
-Content:
-{content[:3000]}
-
-Format your response as:
-Title: [title here]
-Description: [description here]"""
+            result = await self.request_completion(
+                [
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=BATCH_TOKENS_PER_PAGE * len(pages),
+                response_format={"type": "json_object"}
+            )
+        except Exception as e:
+            self.log(f"Error generating batched summary for {len(pages)} pages: {e}")
+            return {}
+        return parse_batch_summaries(result, [url for url, _ in pages])
+    
+    async def summarize_excerpt(self, url: str, excerpt: str, cache_key: Optional[str],
+                                default: Tuple[str, str] = ("Page", "Content summary")) -> Tuple[str, str]:
+        """Summarize one page excerpt with its own request; `default` is returned if the request fails"""
+        try:
+            prompt = SUMMARY_PROMPT_TEMPLATE.format(url=url, content=excerpt)
             
-            response = self.openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates concise summaries."},
+            result = await self.request_completion(
+                [
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=50,
-                temperature=0.3
+                max_tokens=SUMMARY_MAX_TOKENS
             )
             
-            result = response.choices[0].message.content
             lines = result.strip().split('\n')
             
             title = "Page"
@@ -140,94 +590,641 @@ Description: [description here]"""
                 elif line.startswith("Description:"):
                     description = line.replace("Description:", "").strip()
             
-            return title, description
+            if cache_key:
+                self.summary_cache.set(cache_key, json.dumps([title, description]))
             
+            return title, description
+        
         except Exception as e:
             self.log(f"Error generating summary for {url}: {e}")
-            return "Page", "Content summary"
+            return default
     
-    async def process_urls_batch(self, urls: List[str]) -> List[Dict]:
-        """Process a batch of URLs concurrently"""
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            results = list(executor.map(self.scrape_url, urls))
-        return results
+    async def fetch_page(self, session: 'aiohttp.ClientSession', url: str) -> Dict:
+        """Scrape a page, or take it from the resume journal or, when unchanged, the state store"""
+        if self.journal and url in self.journal:
+            return dict(self.reuse_record(url, self.journal.get(url)), resumed=True)
+        
+        record = self.state_store.get(url) if self.state_store else None
+        if record and record.get('entry') and url not in self.changed_urls:
+            return self.reuse_record(url, record)
+        
+        if self.deadline and not self.deadline.can_start('scrape'):
+            # Too late to start a scrape: publish the last good version if there is one
+            if record and record.get('entry'):
+                return self.reuse_record(url, record)
+            return {'url': url, 'content': '', 'success': False, 'omitted': True, 'error': 'Deadline'}
+        
+        started = time.monotonic()
+        with self.metrics.stage('scrape'):
+            result = await self.scrape_url(session, url)
+        if self.deadline:
+            self.deadline.observe('scrape', time.monotonic() - started)
+        if result['success'] and result['content']:
+            result['content_hash'] = content_hash(result['content'])
+            if record and record.get('entry') and record.get('content_hash') == result['content_hash']:
+                # Validators said changed but the content is identical: reuse the stored entry and
+                # the stored, already cleaned text rather than the raw scrape
+                return dict(self.reuse_record(url, record), revalidated=True)
+        elif record and record.get('entry'):
+            # Keep publishing the last good version rather than dropping the page
+            return self.reuse_record(url, record)
+        
+        return result
     
-    async def process_all_urls(self, urls: List[str]) -> List[Dict]:
-        """Process all URLs in batches"""
-        all_results = []
-        batch_size = 10
+    def reuse_record(self, url: str, record: Dict) -> Dict:
+        data = {
+            'url': url,
+            'content': record.get('full_entry') or '',
+            'success': True,
+            'entry': record['entry'],
+            'duplicate_of': record.get('duplicate_of'),
+            'reused': True
+        }
+        summary = parse_entry(record['entry'])
+        if summary:
+            # So a new near-duplicate of a stored page can borrow its summary
+            data['title'], data['description'] = summary
+        return data
+    
+    async def offload(self, func: Callable, *args):
+        """Run CPU-bound page processing in the cleanup pool, or inline without one"""
+        if self.executor is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+    
+    async def _scraper_wait(self, awaitable: Awaitable):
+        """Await something that can block a scrape worker
         
-        for i in range(0, len(urls), batch_size):
-            batch = urls[i:i+batch_size]
-            self.log(f"Processing batch {i//batch_size + 1} of {(len(urls) + batch_size - 1)//batch_size}")
-            
-            batch_results = await self.process_urls_batch(batch)
-            all_results.extend(batch_results)
-            
-            if i + batch_size < len(urls):
-                time.sleep(1)
+        Once every scrape worker is blocked no new pages can reach the
+        boilerplate model, so cleanup starts with what it has learned.
+        """
+        self.idle_scrapers += 1
+        if self.idle_scrapers >= self.scrape_workers and self.cleanup_wakeup:
+            self.cleanup_flush = True
+            self.cleanup_wakeup.set()
+        try:
+            return await awaitable
+        finally:
+            self.idle_scrapers -= 1
+    
+    async def _scrape_worker(self, session: 'aiohttp.ClientSession', queue: asyncio.Queue,
+                             summary_queue: asyncio.Queue, on_result: Callable[[int, Dict], None],
+                             reserve: Optional[Callable[[int], Awaitable[None]]], total: int):
+        """Pull URLs off the work queue and hand successful scrapes to the summary stage"""
+        while True:
+            idx, url = await self._scraper_wait(queue.get())
+            try:
+                if reserve:
+                    await self._scraper_wait(reserve(idx))
+                result = await self.fetch_page(session, url)
+                self.completed += 1
+                self.log(f"Scraped {self.completed}/{total}: {url}")
+                cleanup = self.cleanup_wakeup is not None
+                if not (result['success'] and result['content'] and not result.get('entry')):
+                    if cleanup:
+                        # Stored pages are already clean; they only join the near-duplicate index,
+                        # and only with a summary a new near-duplicate of them could borrow
+                        indexed = (result['success'] and result['content'] and 'title' in result
+                                   and not result.get('duplicate_of'))
+                        self._queue_cleanup(idx, {'url': url, 'content': result['content']} if indexed else None, None)
+                    on_result(idx, result)
+                elif cleanup:
+                    analysis = await self.offload(analyze_page, result['content']) if self.boilerplate_model else (None, [])
+                    self._queue_cleanup(idx, result, analysis)
+                else:
+                    summary_queue.put_nowait((idx, result))
+            finally:
+                queue.task_done()
+    
+    def _queue_cleanup(self, idx: int, data: Optional[Dict], analysis: Optional[Tuple[Optional[int], List[int]]]):
+        """Hand a page to the cleanup stage: fresh pages with their `analyze_page` result, stored ones without"""
+        self.cleanup_pending[idx] = (data, analysis)
+        self.cleanup_wakeup.set()
+    
+    async def _clean(self, data: Optional[Dict], boilerplate: Optional[FrozenSet[int]]) -> Tuple[Optional[str], Optional[int]]:
+        """Cleaned text and fingerprint of a fresh page, or just the fingerprint of a stored one"""
+        if data is None:
+            return None, None
+        if boilerplate is None:
+            return None, await self.offload(fingerprint, data['content']) if self.near_duplicates else None
+        with self.metrics.stage('cleanup'):
+            return await self.offload(clean_page, data['content'], boilerplate, self.near_duplicates is not None)
+    
+    async def _cleanup_worker(self, summary_queue: asyncio.Queue, on_result: Callable[[int, Dict], None], total: int):
+        """Strip boilerplate and find near-duplicates, taking pages strictly in index order
         
-        return all_results
+        Pages finish scraping in whatever order the network allows, but what
+        is stripped from a page and which of two near-duplicates counts as the
+        original must not depend on that. So each fresh page is stripped of
+        the boilerplate learned from the fresh pages ranked at or before it
+        (at least BOILERPLATE_WARMUP of them, unless the scrapers stall first),
+        and is only matched against pages ranked before it. A page whose raw
+        text nearly matches an earlier one is not counted by the model, or a
+        run of near-identical pages would have their shared body stripped as
+        boilerplate. Pages whose turn has come are cleaned in the pool together.
+        """
+        # Raw fingerprints of the pages the boilerplate model has counted
+        observed = SimHashIndex()
+        held: List[Tuple[int, Optional[Dict], bool]] = []
+        while self.cleanup_next < total or held:
+            await self.cleanup_wakeup.wait()
+            self.cleanup_wakeup.clear()
+            turn: List[Tuple[int, Optional[Dict], Optional[FrozenSet[int]]]] = []
+            while self.cleanup_next in self.cleanup_pending:
+                idx = self.cleanup_next
+                self.cleanup_next += 1
+                data, analysis = self.cleanup_pending.pop(idx)
+                if analysis is not None and self.boilerplate_model:
+                    raw_fingerprint, block_keys = analysis
+                    if observed.match_or_add(data['url'], raw_fingerprint) is None:
+                        self.boilerplate_model.observe(block_keys)
+                held.append((idx, data, analysis is not None))
+                if not self.boilerplate_model or self.boilerplate_model.pages >= BOILERPLATE_WARMUP:
+                    boilerplate = self.boilerplate_model.boilerplate() if self.boilerplate_model else frozenset()
+                    turn += [(i, page, boilerplate if fresh else None) for i, page, fresh in held]
+                    held = []
+            if held and (self.cleanup_flush or self.cleanup_next >= total):
+                boilerplate = self.boilerplate_model.boilerplate()
+                turn += [(i, page, boilerplate if fresh else None) for i, page, fresh in held]
+                held = []
+            
+            cleaned = await asyncio.gather(*(self._clean(data, boilerplate) for _, data, boilerplate in turn))
+            for (idx, data, boilerplate), (content, page_fingerprint) in zip(turn, cleaned):
+                if boilerplate is None:
+                    if data and page_fingerprint is not None:
+                        self.near_duplicates.add(data['url'], page_fingerprint)
+                    continue
+                self.metrics.incr('boilerplate.bytes_removed', len(data['content']) - len(content))
+                data['content'] = content
+                original = self.near_duplicates.match_or_add(data['url'], page_fingerprint) if self.near_duplicates else None
+                if original:
+                    # Near-duplicates reuse the original's summary instead of asking for their own
+                    data['duplicate_of'] = original
+                    on_result(idx, data)
+                else:
+                    summary_queue.put_nowait((idx, data))
     
-    def generate_llms_txt(self, scraped_data: List[Dict]) -> str:
-        """Generate the llms.txt content"""
-        lines = [f"# {self.base_url} llms.txt", ""]
+    async def _next_summary_batch(self, summary_queue: asyncio.Queue) -> List[Tuple[int, Dict]]:
+        """Take up to `summary_batch` pages off the summary queue
         
-        for data in scraped_data:
-            if data['success'] and data['content']:
-                title, description = self.generate_summary(data['url'], data['content'])
-                lines.append(f"- [{title}]({data['url']}): {description}")
+        A partial batch waits up to SUMMARY_BATCH_WAIT for more pages, unless
+        every scrape worker is blocked and no more can arrive soon.
+        """
+        batch = [await summary_queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SUMMARY_BATCH_WAIT
+        while len(batch) < self.summary_batch:
+            if not summary_queue.empty():
+                batch.append(summary_queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0 or self.idle_scrapers >= self.scrape_workers:
+                break
+            try:
+                batch.append(await asyncio.wait_for(summary_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _summary_worker(self, summary_queue: asyncio.Queue, on_result: Callable[[int, Dict], None]):
+        """Summarize cleaned pages; one worker per in-flight request"""
+        while True:
+            if self.summary_batch > 1:
+                # One worker fills a batch at a time so batches are not split between workers
+                async with self.batch_lock:
+                    batch = await self._next_summary_batch(summary_queue)
             else:
-                self.log(f"Skipping {data['url']} due to scraping error")
+                batch = [await summary_queue.get()]
+            try:
+                with self.metrics.stage('summarize'):
+                    summaries = await self.generate_summaries([(data['url'], data['content']) for _, data in batch])
+                for (idx, data), (title, description) in zip(batch, summaries):
+                    data['title'], data['description'] = title, description
+                    on_result(idx, data)
+            finally:
+                for _ in batch:
+                    summary_queue.task_done()
+    
+    async def process_all_urls(self, urls: List[str], on_result: Callable[[int, Dict], None],
+                               reserve: Optional[Callable[[int], Awaitable[None]]] = None):
+        """Scrape and summarize all URLs, overlapping the two stages
+        
+        `on_result(index, data)` is called exactly once per URL, in completion
+        order, and the page is not referenced afterwards. Near-duplicates of
+        a page ranked before them arrive unsummarized with `duplicate_of`
+        set; other fresh pages arrive with boilerplate blocks stripped from
+        `content`.
+        `reserve(index)` is awaited before work on an index starts so the
+        caller can bound how far ahead of the slowest page the pipeline runs.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for idx, url in enumerate(urls):
+            queue.put_nowait((idx, url))
+        summary_queue: asyncio.Queue = asyncio.Queue()
         
-        return "\n".join(lines)
+        self.completed = 0
+        self.near_duplicates = SimHashIndex() if self.dedup else None
+        self.boilerplate_model = BoilerplateModel() if self.strip_boilerplate else None
+        self.cleanup_pending = {}
+        self.cleanup_next = 0
+        self.cleanup_wakeup = asyncio.Event() if self.near_duplicates or self.boilerplate_model else None
+        self.cleanup_flush = False
+        self.batch_lock = asyncio.Lock()
+        self.scrape_workers = min(self.concurrency, len(urls))
+        self.idle_scrapers = 0
+        self.executor = self.shared_executor
+        own_executor = None
+        if self.executor is None and self.cleanup_workers > 0 and (self.near_duplicates or self.boilerplate_model):
+            self.executor = own_executor = ProcessPoolExecutor(max_workers=self.cleanup_workers)
+        self.token_budget = self.scheduler.token_budget if self.scheduler else TokenBudget(self.tokens_per_minute)
+        
+        async with self.firecrawl_session(self.concurrency) as session:
+            workers = [
+                asyncio.create_task(self._scrape_worker(session, queue, summary_queue, on_result, reserve, len(urls)))
+                for _ in range(self.scrape_workers)
+            ]
+            workers += [
+                asyncio.create_task(self._summary_worker(summary_queue, on_result))
+                for _ in range(self.summary_concurrency)
+            ]
+            cleanup = None
+            if self.cleanup_wakeup:
+                cleanup = asyncio.create_task(self._cleanup_worker(summary_queue, on_result, len(urls)))
+                workers.append(cleanup)
+            try:
+                # Scraping and then cleanup are the only producers for the summary
+                # queue, so once both finish the summary queue can only shrink
+                await queue.join()
+                if cleanup:
+                    await cleanup
+                await summary_queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if own_executor:
+                    own_executor.shutdown()
     
-    def generate_llms_full_txt(self, scraped_data: List[Dict]) -> str:
-        """Generate the llms-full.txt content"""
-        sections = [f"# {self.base_url} llms-full.txt", ""]
+    async def fetch_sitemap_lastmods(self, session: 'aiohttp.ClientSession') -> Dict[str, str]:
+        """Collect <lastmod> values from the site's sitemap, following sitemap indexes"""
+        lastmods: Dict[str, str] = {}
+        pending = [f"{self.base_url}/sitemap.xml"]
+        seen = set()
         
-        for idx, data in enumerate(scraped_data, 1):
-            if data['success'] and data['content']:
-                sections.append(f"<|firecrawl-page-{idx}-lllmstxt|>")
-                sections.append(data['content'])
-                sections.append("")
+        while pending and len(seen) < 50:
+            sitemap_url = pending.pop()
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            try:
+                with self.metrics.call('site.sitemap'):
+                    async with session.get(sitemap_url) as response:
+                        if response.status != 200:
+                            continue
+                        body = await response.read()
+                self.metrics.add_bytes('in', len(body))
+                found, children = parse_sitemap(body)
+                lastmods.update(found)
+                pending.extend(children)
+            except Exception as e:
+                self.log(f"Error reading sitemap {sitemap_url}: {e}")
         
-        return "\n".join(sections)
+        return lastmods
     
-    async def generate(self, output_dir: str = ".", full_text: bool = True):
+    async def find_changed_urls(self, urls: List[str]) -> Tuple[List[str], Dict[str, Dict[str, str]]]:
+        """Return the URLs that need scraping plus the validators seen for every URL
+        
+        Uses sitemap lastmod where available and a HEAD request's ETag /
+        Last-Modified otherwise; neither costs Firecrawl credits.
+        """
+        import aiohttp
+        validators: Dict[str, Dict[str, str]] = {}
+        changed: List[str] = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=15)
+        
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            lastmods = await self.fetch_sitemap_lastmods(session)
+            
+            async def check(url: str):
+                record = self.state_store.get(url)
+                seen = {'lastmod': lastmods.get(url_key(url), '')}
+                if not seen['lastmod']:
+                    async with semaphore:
+                        try:
+                            with self.metrics.call('site.head'):
+                                async with session.head(url, allow_redirects=True) as response:
+                                    seen['etag'] = response.headers.get('ETag', '')
+                                    seen['last_modified'] = response.headers.get('Last-Modified', '')
+                        except Exception as e:
+                            self.log(f"HEAD failed for {url}: {e}")
+                validators[url] = seen
+                if not PageStateStore.is_unchanged(record, **seen):
+                    changed.append(url)
+            
+            await asyncio.gather(*(check(url) for url in urls))
+        
+        changed_set = set(changed)
+        return [url for url in urls if url in changed_set], validators
+    
+    async def within_deadline(self, work: Awaitable):
+        """Await `work`, or give up with None once the deadline runs out"""
+        if not self.deadline:
+            return await work
+        try:
+            return await asyncio.wait_for(work, max(0.0, self.deadline.remaining()))
+        except asyncio.TimeoutError:
+            return None
+    
+    def known_urls(self) -> List[str]:
+        """This site's URLs with an entry in the state store, for when the map cannot finish in time"""
+        if not self.state_store:
+            return []
+        host = site_host(self.base_url)
+        return [url for url in self.state_store.urls() if site_host(url) == host][:self.max_urls]
+    
+    def rank_urls(self, urls: List[str]) -> List[str]:
+        """Most valuable URLs first, so a deadline cuts the least useful pages
+        
+        Uses the discovery frontier's ranking: focus paths first, then shallow
+        paths and, where the sitemap gives a lastmod, recently changed pages
+        ahead of stale ones.
+        """
+        frontier = Frontier(self.base_url, self.focus_paths)
+        return sorted(urls, key=lambda url: -frontier.score(url, self.validators.get(url, {}).get('lastmod', '')))
+    
+    def render_entry(self, data: Dict) -> str:
+        """Render a page's llms.txt line"""
+        return data.get('entry') or f"- [{data['title']}]({data['url']}): {data['description']}"
+    
+    def render_full_section(self, idx: int, data: Dict) -> str:
+        """Render a page's llms-full.txt section"""
+        return f"<|firecrawl-page-{idx + 1}-lllmstxt|>\n{data['content']}\n"
+    
+    async def generate(self, output_dir: str = ".", full_text: bool = True, window: int = 64):
         """Main generation process"""
+        try:
+            await self._generate(output_dir, full_text, window)
+        finally:
+            await self.close()
+    
+    async def close(self):
+        """Close the OpenAI client if this generator created it, while its event loop is still running"""
+        if self.owns_openai:
+            await self.openai.close()
+            self.owns_openai = False
+    
+    async def _generate(self, output_dir: str, full_text: bool, window: int):
         print(f"Starting llms.txt generation for {self.base_url}")
         print(f"Max URLs: {self.max_urls}")
         print(f"Output directory: {output_dir}")
         print("-" * 50)
         
         os.makedirs(output_dir, exist_ok=True)
+        self.metrics = RunMetrics(labels={'generator': 'llmstxt', 'site': self.base_url})
+        if self.deadline and self.deadline.expired():
+            print("Deadline reached before mapping started; existing files left in place")
+            return
         
-        urls = self.map_website()
+        with self.metrics.stage('map'):
+            urls = await self.within_deadline(self.map_website())
+        if urls is None:
+            urls = self.known_urls()
+            if not urls:
+                print("Deadline reached while mapping; existing files left in place")
+                return
+            print(f"Deadline reached while mapping: republishing the {len(urls)} pages known from earlier runs")
         if not urls:
             print("No URLs found. Exiting.")
             return
         
-        print(f"Processing {len(urls)} URLs...")
-        scraped_data = await self.process_all_urls(urls)
-        
-        successful_scrapes = [d for d in scraped_data if d['success']]
-        print(f"Successfully scraped {len(successful_scrapes)} out of {len(scraped_data)} URLs")
+        self.changed_urls = set(urls)
+        self.validators = {}
+        if self.state_store:
+            with self.metrics.stage('map'):
+                checked = await self.within_deadline(self.find_changed_urls(urls))
+            if checked is None:
+                # No time to compare validators: pages with a stored entry keep it
+                changed = [url for url in urls if not (self.state_store.get(url) or {}).get('entry')]
+                print("Deadline reached while checking for changes: reusing stored entries")
+            else:
+                changed, self.validators = checked
+            self.changed_urls = set(changed)
+            print(f"Incremental mode: {len(changed)} of {len(urls)} URLs are new or changed")
+        if self.deadline:
+            urls = self.rank_urls(urls)
         
-        print("Generating llms.txt...")
-        llms_txt_content = self.generate_llms_txt(scraped_data)
         llms_txt_path = os.path.join(output_dir, "llms.txt")
-        with open(llms_txt_path, 'w', encoding='utf-8') as f:
-            f.write(llms_txt_content)
-        print(f"Created: {llms_txt_path}")
-        
+        llms_full_txt_path = os.path.join(output_dir, "llms-full.txt")
+        llms_writer = StreamingWriter(llms_txt_path, header=f"# {self.base_url} llms.txt\n\n", window=window)
+        full_writer = None
         if full_text:
-            print("Generating llms-full.txt...")
-            llms_full_txt_content = self.generate_llms_full_txt(scraped_data)
-            llms_full_txt_path = os.path.join(output_dir, "llms-full.txt")
-            with open(llms_full_txt_path, 'w', encoding='utf-8') as f:
-                f.write(llms_full_txt_content)
-            print(f"Created: {llms_full_txt_path}")
+            full_writer = StreamingWriter(
+                llms_full_txt_path, header=f"# {self.base_url} llms-full.txt\n\n", window=window,
+                index_path=os.path.join(output_dir, FULL_TEXT_INDEX), encodings=self.full_text_encodings
+            )
+        published = 0
+        # Title/description of every summarized page, and near-duplicates still waiting for theirs
+        summaries: Dict[str, Tuple[str, str]] = {}
+        duplicates: Dict[str, List[Tuple[int, Dict]]] = {}
+        # Indexes that reached on_result, and pages left out because time ran out
+        handled = set()
+        omitted: Dict[int, str] = {}
+        
+        def publish_duplicate(idx: int, data: Dict):
+            """List a near-duplicate under its original's summary and leave it out of llms-full.txt"""
+            nonlocal published
+            data['title'], data['description'] = summaries[data['duplicate_of']]
+            self.log(f"{data['url']} is a near-duplicate of {data['duplicate_of']}")
+            with self.metrics.stage('render'):
+                entry = self.render_entry(data)
+            if self.state_store:
+                # Recorded so an unchanged duplicate is not scraped again on the next run
+                self.state_store.put(
+                    data['url'],
+                    content_hash=data['content_hash'],
+                    entry=entry,
+                    full_entry=None,
+                    duplicate_of=data['duplicate_of'],
+                    **self.validators.get(data['url'], {})
+                )
+            if self.journal:
+                # So --resume lists it again instead of scraping it
+                self.journal.append(data['url'], entry=entry, full_entry=None, duplicate_of=data['duplicate_of'])
+            with self.metrics.stage('write'):
+                llms_writer.write(idx, entry)
+                if full_writer:
+                    full_writer.skip(idx)
+            self.metrics.incr('pages.duplicate')
+            self.metrics.incr('pages.published')
+            published += 1
+        
+        def on_result(idx: int, data: Dict):
+            nonlocal published
+            handled.add(idx)
+            if data.get('omitted'):
+                omitted[idx] = 'not started'
+                self.metrics.incr('pages.omitted')
+                llms_writer.skip(idx)
+                if full_writer:
+                    full_writer.skip(idx)
+                return
+            if data.get('revalidated') and self.state_store:
+                # Same content as stored; only its validators are new
+                self.state_store.put(data['url'], **self.validators.get(data['url'], {}))
+            if data.get('duplicate_of') and data.get('entry'):
+                # A near-duplicate as recorded last time or earlier in this run: listed in llms.txt only
+                self.metrics.incr('pages.resumed' if data.get('resumed') else 'pages.reused')
+                with self.metrics.stage('write'):
+                    llms_writer.write(idx, data['entry'])
+                    if full_writer:
+                        full_writer.skip(idx)
+                self.metrics.incr('pages.published')
+                published += 1
+                return
+            if not (data['success'] and data['content']):
+                self.log(f"Skipping {data['url']} due to scraping error")
+                self.metrics.incr('pages.failed')
+                llms_writer.skip(idx)
+                if full_writer:
+                    full_writer.skip(idx)
+                return
+            
+            original = data.get('duplicate_of')
+            if original:
+                if original in summaries:
+                    publish_duplicate(idx, data)
+                else:
+                    duplicates.setdefault(original, []).append((idx, data))
+                return
+            
+            with self.metrics.stage('render'):
+                entry = self.render_entry(data)
+                section = self.render_full_section(idx, data) if full_writer else None
+            if data.get('resumed'):
+                self.metrics.incr('pages.resumed')
+            elif data.get('reused'):
+                self.metrics.incr('pages.reused')
+            else:
+                if self.state_store:
+                    self.state_store.put(
+                        data['url'],
+                        content_hash=data['content_hash'],
+                        entry=entry,
+                        full_entry=data['content'],
+                        duplicate_of=None,
+                        **self.validators.get(data['url'], {})
+                    )
+                if self.journal:
+                    self.journal.append(data['url'], entry=entry, full_entry=data['content'])
+            with self.metrics.stage('write'):
+                llms_writer.write(idx, entry)
+                if full_writer:
+                    full_writer.write(idx, section, data['url'])
+            self.metrics.incr('pages.published')
+            published += 1
+            
+            if 'title' in data:
+                summaries[data['url']] = (data['title'], data['description'])
+                for duplicate_idx, duplicate in duplicates.pop(data['url'], []):
+                    publish_duplicate(duplicate_idx, duplicate)
+        
+        if self.journal:
+            resumed = self.journal.start(self.base_url)
+            if resumed:
+                print(f"Resuming: {resumed} pages already finished in {self.journal.path}")
+        
+        print(f"Scraping and summarizing {len(self.changed_urls)} URLs...")
+        try:
+            work = self.process_all_urls(urls, on_result, reserve=llms_writer.reserve)
+            if self.deadline:
+                try:
+                    await asyncio.wait_for(work, max(0.0, self.deadline.remaining()))
+                except asyncio.TimeoutError:
+                    print("Deadline reached: publishing the pages finished so far")
+                # Pages still queued or in flight, and near-duplicates whose original never finished;
+                # a page with a stored entry is published as it was, which needs no more requests
+                for idx in range(len(urls)):
+                    if idx in handled:
+                        continue
+                    record = self.state_store.get(urls[idx]) if self.state_store else None
+                    if record and record.get('entry'):
+                        on_result(idx, self.reuse_record(urls[idx], record))
+                    else:
+                        omitted[idx] = 'unfinished'
+                for waiting in duplicates.values():
+                    for idx, _ in waiting:
+                        omitted[idx] = 'unfinished'
+                self.metrics.incr('pages.omitted', sum(1 for reason in omitted.values() if reason == 'unfinished'))
+            else:
+                await work
+            
+            omitted_urls = [(urls[idx], omitted[idx]) for idx in sorted(omitted)]
+            if omitted and not published:
+                # An empty index would be worse than the last published one
+                write_omitted_report(output_dir, self.base_url, self.deadline, omitted_urls)
+                print("Deadline reached before any page was finished; existing files left in place")
+                return
+            with self.metrics.stage('write'):
+                llms_writer.commit()
+                if full_writer:
+                    full_writer.commit()
+            shard_stats = None
+            if full_writer and self.shards:
+                with self.metrics.stage('shards'):
+                    shard_stats = publish_shards(
+                        llms_full_txt_path, full_writer.entries, os.path.join(output_dir, SHARD_DIR),
+                        os.path.join(output_dir, SHARD_MANIFEST), self.shard_bytes,
+                        separator=full_writer.separator, encodings=full_writer.encodings, site=self.base_url,
+                        metadata={'omitted': len(omitted)} if omitted else None
+                    )
+            report_path = write_omitted_report(output_dir, self.base_url, self.deadline, omitted_urls)
+            if report_path:
+                print(f"Omitted {len(omitted)} pages at the deadline, listed in {report_path}")
+            if self.journal and omitted:
+                # Keep the finished pages so --resume only has to do the omitted ones
+                print(f"Journal kept at {self.journal.path}; rerun with --resume to finish the omitted pages")
+            elif self.journal:
+                self.journal.finish()
+            for writer in (llms_writer, full_writer):
+                if writer and not writer.changed:
+                    print(f"Unchanged: {writer.path} (left in place)")
+                    self.metrics.incr('output.files_unchanged')
+            if llms_writer.changed:
+                print(f"Created: {llms_txt_path}")
+            self.metrics.gauge('output.llms_txt_bytes', os.path.getsize(llms_txt_path))
+            if full_writer:
+                if full_writer.changed:
+                    print(f"Created: {llms_full_txt_path} (page index: {full_writer.index_path})")
+                self.metrics.gauge('output.llms_full_txt_bytes', os.path.getsize(llms_full_txt_path))
+                for encoding in full_writer.encodings:
+                    compressed_path = llms_full_txt_path + ENCODINGS[encoding]
+                    if full_writer.changed:
+                        print(f"Created: {compressed_path}")
+                    self.metrics.gauge(f"output.llms_full_txt_{encoding}_bytes", os.path.getsize(compressed_path))
+            if shard_stats:
+                print(f"Shards: {shard_stats['shards']} in {os.path.join(output_dir, SHARD_DIR)} "
+                      f"({shard_stats['written']} written, {shard_stats['kept']} unchanged, {shard_stats['removed']} removed)")
+                for key in ('written', 'kept', 'removed'):
+                    self.metrics.gauge(f"output.shards_{key}", shard_stats[key])
+        finally:
+            llms_writer.abort()
+            if full_writer:
+                full_writer.abort()
+            if self.journal:
+                self.journal.close()
+        
+        print(f"Published {published} out of {len(urls)} URLs")
+        
+        if self.summary_cache:
+            stats = self.summary_cache.stats()
+            print(f"Summary cache: {stats['hits']} hits, {stats['misses']} misses ({stats['entries']} entries)")
+            self.metrics.gauge('cache.hits', stats['hits'])
+            self.metrics.gauge('cache.misses', stats['misses'])
+        print(f"Rate limits reached {self.firecrawl_limiter.describe()}; {self.openai_limiter.describe()}")
+        for limiter in (self.firecrawl_limiter, self.openai_limiter):
+            for key, value in limiter.snapshot().items():
+                self.metrics.gauge(f"limiter.{limiter.name.lower()}.{key}", value)
         
         print("-" * 50)
         print("Generation complete!")
@@ -235,6 +1232,8 @@ Description: [description here]"""
 
 def main():
     parser = argparse.ArgumentParser(description='Generate llms.txt files for sidetool.co')
+    parser.add_argument('--url', type=str, default='https://sidetool.co',
+                        help='Site to generate llms.txt for (default: https://sidetool.co)')
     parser.add_argument('--max-urls', type=int, default=50,
                         help='Maximum number of URLs to process (default: 50)')
     parser.add_argument('--output-dir', type=str, default='.',
@@ -243,12 +1242,73 @@ def main():
                         help='Firecrawl API key (or set FIRECRAWL_API_KEY env var)')
     parser.add_argument('--openai-api-key', type=str,
                         help='OpenAI API key (or set OPENAI_API_KEY env var)')
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help='Maximum number of pages scraped at the same time (default: 10)')
+    parser.add_argument('--summary-concurrency', type=int, default=5,
+                        help='Maximum number of OpenAI summary requests in flight (default: 5)')
+    parser.add_argument('--tokens-per-minute', type=int, default=200000,
+                        help='OpenAI tokens-per-minute budget for summaries (default: 200000)')
+    parser.add_argument('--firecrawl-rate', type=float, default=5.0,
+                        help='Starting Firecrawl request rate per second; adapts to 429s (default: 5)')
+    parser.add_argument('--openai-rate', type=float, default=10.0,
+                        help='Starting OpenAI request rate per second; adapts to 429s (default: 10)')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Summary cache database (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call OpenAI instead of reusing cached summaries')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only re-scrape pages whose sitemap lastmod / ETag changed since the last run')
+    parser.add_argument('--state-path', type=str, default=DEFAULT_STATE_PATH,
+                        help=f'Per-URL state used by --incremental (default: {DEFAULT_STATE_PATH})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip pages already finished by an interrupted run and rebuild the outputs from its journal')
+    parser.add_argument('--journal-path', type=str, default=DEFAULT_JOURNAL_PATH.format(generator='llmstxt'),
+                        help='Journal of finished pages used by --resume (default: %(default)s)')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Summarize and publish near-duplicate pages separately')
+    parser.add_argument('--no-boilerplate', action='store_true',
+                        help='Keep nav, footer and other blocks repeated across pages')
+    parser.add_argument('--cleanup-workers', type=int, default=None,
+                        help='Processes for page analysis and boilerplate cleanup; 0 runs it inline (default: one per core)')
+    parser.add_argument('--prompt-tokens', type=int, default=None,
+                        help=f'Token budget for the page excerpt in each summary prompt (default: {prompt_budget(SUMMARY_MODEL)})')
+    parser.add_argument('--summary-batch', type=int, default=1,
+                        help='Pages summarized per OpenAI request, as JSON; pages the response misses are retried alone (default: 1)')
+    parser.add_argument('--summarizer', choices=SUMMARIZER_MODES, default='openai',
+                        help='openai: LLM for every page; local: offline extractive summaries, no OpenAI key needed; '
+                             'hybrid: LLM only for pages the local summary is unsure about (default: openai)')
+    parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE,
+                        help=f'Local summaries below this confidence go to the LLM in hybrid mode (default: {DEFAULT_MIN_CONFIDENCE})')
     parser.add_argument('--no-full-text', action='store_true',
                         help='Only generate llms.txt, skip llms-full.txt')
+    parser.add_argument('--no-precompress', action='store_true',
+                        help='Skip the gzip and brotli copies of llms-full.txt')
+    parser.add_argument('--deadline', type=float,
+                        help='Seconds the run may take; the most valuable pages go first and whatever is finished '
+                             'is published in time, with the rest listed in llms-omitted.json')
+    parser.add_argument('--shards', action='store_true',
+                        help='Also publish llms-full.txt as content-hashed shards plus llms-full.manifest.json, '
+                             'rewriting only the shards that changed')
+    parser.add_argument('--shard-kb', type=int, default=DEFAULT_SHARD_BYTES // 1024,
+                        help=f'Largest shard size in KB (default: {DEFAULT_SHARD_BYTES // 1024})')
+    parser.add_argument('--url-deadline', type=float, default=DEFAULT_URL_DEADLINE,
+                        help='Seconds one page may take across all scrape attempts before it is recorded as '
+                             f'timed out (default: {DEFAULT_URL_DEADLINE:g})')
+    parser.add_argument('--no-hedge', action='store_true',
+                        help='Never send a duplicate request for a scrape slower than its URL class\'s p95')
+    parser.add_argument('--focus-paths', nargs='*', default=DEFAULT_FOCUS_PATHS,
+                        help='Paths ranked first under --deadline, highest priority first')
+    parser.add_argument('--metrics-out', type=str,
+                        help='Write run metrics to this path (JSON, or Prometheus text for a .prom file)')
+    parser.add_argument('--profile', type=str,
+                        help='Run under cProfile and dump the stats to this path')
     parser.add_argument('--verbose', action='store_true',
                         help='Enable verbose logging')
     
     args = parser.parse_args()
+    load_dotenv()
+    # The clock starts now so the budget covers the whole run
+    deadline = Deadline(args.deadline) if args.deadline else None
     
     firecrawl_key = args.firecrawl_api_key or os.getenv('FIRECRAWL_API_KEY')
     openai_key = args.openai_api_key or os.getenv('OPENAI_API_KEY')
@@ -258,22 +1318,64 @@ def main():
         print("Please provide it via --firecrawl-api-key or FIRECRAWL_API_KEY environment variable")
         sys.exit(1)
     
-    if not openai_key:
+    if not openai_key and args.summarizer != 'local':
         print("Error: OpenAI API key not provided.")
         print("Please provide it via --openai-api-key or OPENAI_API_KEY environment variable")
         sys.exit(1)
     
+    summary_cache = None if args.no_cache else SummaryCache(args.cache_path)
+    state_store = PageStateStore(args.state_path) if args.incremental else None
+    journal = RunJournal(args.journal_path, resume=args.resume)
+    
     generator = SidetoolLLMSTxtGenerator(
         firecrawl_api_key=firecrawl_key,
         openai_api_key=openai_key,
         max_urls=args.max_urls,
-        verbose=args.verbose
+        verbose=args.verbose,
+        concurrency=args.concurrency,
+        summary_concurrency=args.summary_concurrency,
+        tokens_per_minute=args.tokens_per_minute,
+        summary_cache=summary_cache,
+        state_store=state_store,
+        firecrawl_rate=args.firecrawl_rate,
+        openai_rate=args.openai_rate,
+        journal=journal,
+        base_url=args.url,
+        dedup=not args.no_dedup,
+        boilerplate=not args.no_boilerplate,
+        cleanup_workers=args.cleanup_workers,
+        prompt_tokens=args.prompt_tokens,
+        summary_batch=args.summary_batch,
+        summarizer=args.summarizer,
+        min_confidence=args.min_confidence,
+        deadline=deadline,
+        precompress=not args.no_precompress,
+        hedge=not args.no_hedge,
+        url_deadline=args.url_deadline,
+        shards=args.shards,
+        shard_bytes=args.shard_kb * 1024,
+        focus_paths=args.focus_paths
     )
     
-    asyncio.run(generator.generate(
-        output_dir=args.output_dir,
-        full_text=not args.no_full_text
-    ))
+    def run():
+        asyncio.run(generator.generate(
+            output_dir=args.output_dir,
+            full_text=not args.no_full_text
+        ))
+    
+    try:
+        if args.profile:
+            run_profiled(run, args.profile)
+        else:
+            run()
+        if args.metrics_out:
+            generator.metrics.write(args.metrics_out)
+            print(f"Metrics written to {args.metrics_out}")
+    finally:
+        if summary_cache:
+            summary_cache.close()
+        if state_store:
+            state_store.close()
 
 
 if __name__ == "__main__":
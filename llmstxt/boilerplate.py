@@ -0,0 +1,94 @@
+"""
+Cross-page boilerplate detection and stripping
+"""
+
+import hashlib
+import os
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from llmstxt.dedup import fingerprint
+
+BLOCK_SEPARATOR = re.compile(r'\n[ \t]*\n')
+
+
+def default_workers() -> int:
+    """Cleanup pool size: one process per core, or 0 (inline) on a single core"""
+    cores = os.cpu_count() or 1
+    return cores if cores > 1 else 0
+
+
+def split_blocks(content: str) -> List[str]:
+    """Split markdown into blank-line separated blocks"""
+    return [block for block in BLOCK_SEPARATOR.split(content.strip()) if block.strip()]
+
+
+def block_key(block: str) -> int:
+    """Stable key for a block, ignoring case and whitespace differences"""
+    normalized = ' '.join(block.lower().split())
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def analyze_page(content: str) -> Tuple[Optional[int], List[int]]:
+    """Fingerprint of the raw text and distinct block keys of a scraped page
+    
+    Module-level and argument-only so it can run in a process pool.
+    """
+    return fingerprint(content), list({block_key(block) for block in split_blocks(content)})
+
+
+def strip_boilerplate(content: str, boilerplate: FrozenSet[int]) -> str:
+    """Drop every block whose key is in `boilerplate`; a page that is all boilerplate is kept as is"""
+    if not boilerplate:
+        return content
+    kept = [block for block in split_blocks(content) if block_key(block) not in boilerplate]
+    return '\n\n'.join(kept) if kept else content
+
+
+def clean_page(content: str, boilerplate: FrozenSet[int], with_fingerprint: bool = True) -> Tuple[str, Optional[int]]:
+    """Strip boilerplate, then take the near-duplicate fingerprint of what is left
+    
+    Fingerprinting the stripped text keeps shared nav and footer blocks from
+    pulling unrelated pages together. Runs in the process pool like
+    `analyze_page`.
+    """
+    cleaned = strip_boilerplate(content, boilerplate)
+    return cleaned, fingerprint(cleaned) if with_fingerprint else None
+
+
+class BoilerplateModel:
+    """Learns which blocks repeat across the pages of one crawl
+    
+    A block counts as boilerplate once it has appeared on at least
+    `min_pages` pages and on at least `min_share` of the pages seen so far.
+    Only blocks past `min_pages` are re-checked when the set is rebuilt, so
+    the cost stays proportional to the repeated blocks rather than the crawl.
+    The set depends only on which pages were observed, not in what order, but
+    a caller that strips pages while still observing gets results that depend
+    on how far the model had got. It has to observe in a stable order, such as
+    by rank, for its output to be reproducible.
+    """
+    
+    def __init__(self, min_pages: int = 3, min_share: float = 0.25):
+        self.min_pages = min_pages
+        self.min_share = min_share
+        self.pages = 0
+        self.counts: Dict[int, int] = {}
+        self.frequent: Dict[int, int] = {}
+        self._boilerplate: Optional[FrozenSet[int]] = frozenset()
+    
+    def observe(self, keys: Iterable[int]):
+        """Record the distinct block keys of one page"""
+        self.pages += 1
+        for key in keys:
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+            if count >= self.min_pages:
+                self.frequent[key] = count
+        self._boilerplate = None
+    
+    def boilerplate(self) -> FrozenSet[int]:
+        if self._boilerplate is None:
+            threshold = max(self.min_pages, self.min_share * self.pages)
+            self._boilerplate = frozenset(key for key, count in self.frequent.items() if count >= threshold)
+        return self._boilerplate
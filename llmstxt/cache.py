@@ -0,0 +1,112 @@
+"""
+Persistent, content-addressed cache for page summaries
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = ".llmstxt-cache/summaries.sqlite3"
+
+
+def normalize_content(content: str) -> str:
+    """Collapse whitespace so formatting-only changes don't invalidate a summary"""
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+class SummaryCache:
+    """SQLite-backed summary store with age- and size-based eviction
+    
+    Entries are keyed by a hash of the URL, the normalized content, the prompt
+    template and the model, so any change to what would be sent to the model
+    produces a miss.
+    """
+    
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 20000,
+                 max_bytes: int = 64 * 1024 * 1024, max_age_days: float = 30):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at)")
+        self.conn.commit()
+    
+    @staticmethod
+    def make_key(url: str, content: str, prompt_template: str, model: str) -> str:
+        """Hash everything that determines the model's answer"""
+        payload = json.dumps([url, normalize_content(content), prompt_template, model])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None on a miss or an expired entry"""
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT value, created_at FROM summaries WHERE key = ?", (key,)
+        ).fetchone()
+        
+        if row is None or now - row[1] > self.max_age:
+            self.misses += 1
+            return None
+        
+        self.conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        self.hits += 1
+        return row[0]
+    
+    def set(self, key: str, value: str):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO summaries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode('utf-8')), now, now)
+        )
+        self.conn.commit()
+    
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until within size limits"""
+        before = self.conn.total_changes
+        self.conn.execute("DELETE FROM summaries WHERE created_at < ?", (time.time() - self.max_age,))
+        
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries").fetchone()
+        if count > self.max_entries or total > self.max_bytes:
+            excess_count = max(0, count - self.max_entries)
+            excess_bytes = max(0, total - self.max_bytes)
+            doomed = []
+            freed = 0
+            for key, size in self.conn.execute("SELECT key, size FROM summaries ORDER BY accessed_at"):
+                if len(doomed) >= excess_count and freed >= excess_bytes:
+                    break
+                doomed.append((key,))
+                freed += size
+            self.conn.executemany("DELETE FROM summaries WHERE key = ?", doomed)
+        
+        self.conn.commit()
+        return self.conn.total_changes - before
+    
+    def stats(self) -> Dict[str, int]:
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries").fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': count, 'bytes': total}
+    
+    def close(self):
+        self.evict()
+        self.conn.close()
@@ -0,0 +1,90 @@
+"""
+Time budget for best-effort runs that must publish before a fixed deadline
+"""
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llmstxt.metrics import Histogram
+
+# Share of the budget held back for publishing, within these bounds in seconds
+PUBLISH_RESERVE_SHARE = 0.05
+MIN_PUBLISH_RESERVE = 2.0
+MAX_PUBLISH_RESERVE = 60.0
+# Work of a kind is estimated to take this quantile of its recent durations
+ESTIMATE_QUANTILE = 0.9
+OMITTED_REPORT = 'llms-omitted.json'
+
+
+class Deadline:
+    """Wall-clock budget for one run
+    
+    The last `reserve` seconds are kept for writing and publishing the
+    output. Callers time each unit of work with `observe(kind, seconds)`;
+    `can_start(kind)` then says whether a new unit of that kind is likely
+    to finish before the reserve, judging by the slow end (p90) of the
+    units seen so far. Before any unit has finished the only check is that
+    some time is left.
+    """
+    
+    def __init__(self, seconds: float, reserve: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        if reserve is None:
+            reserve = min(MAX_PUBLISH_RESERVE, max(MIN_PUBLISH_RESERVE, seconds * PUBLISH_RESERVE_SHARE))
+        self.reserve = min(reserve, seconds / 2)
+        self.clock = clock
+        self.started = clock()
+        self.durations: Dict[str, Histogram] = {}
+    
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+    
+    def remaining(self) -> float:
+        """Seconds left for work, not counting the publishing reserve"""
+        return self.seconds - self.reserve - self.elapsed()
+    
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def observe(self, kind: str, seconds: float):
+        self.durations.setdefault(kind, Histogram(reservoir_size=200)).observe(seconds)
+    
+    def estimate(self, kind: str) -> float:
+        histogram = self.durations.get(kind)
+        return histogram.quantile(ESTIMATE_QUANTILE) if histogram else 0.0
+    
+    def can_start(self, kind: str) -> bool:
+        return self.remaining() > self.estimate(kind)
+
+
+def write_omitted_report(output_dir: str, site: str, deadline: Optional[Deadline],
+                         omitted: List[Tuple[str, str]]) -> Optional[str]:
+    """Record the (url, reason) pages a deadline left out next to the outputs
+    
+    Returns the report path, or None when nothing was omitted, in which case
+    a report left by an earlier run is removed so it cannot be mistaken for
+    this one's.
+    """
+    path = os.path.join(output_dir, OMITTED_REPORT)
+    if not omitted:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    
+    report = {
+        'site': site,
+        'generated': datetime.now(timezone.utc).isoformat(),
+        'deadline_seconds': deadline.seconds if deadline else None,
+        'elapsed_seconds': round(deadline.elapsed(), 3) if deadline else None,
+        'omitted': [{'url': url, 'reason': reason} for url, reason in omitted]
+    }
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{OMITTED_REPORT}.", suffix='.tmp', dir=output_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+    return path
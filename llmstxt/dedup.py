@@ -0,0 +1,140 @@
+"""
+URL canonicalization and near-duplicate detection for scraped pages
+"""
+
+import hashlib
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change what a page shows
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', '_ga', '_gl'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+SHINGLE_SIZE = 3
+# Shorter pages carry too few shingles for a meaningful fingerprint
+MIN_WORDS = 30
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings of one page compare equal
+    
+    Lowercases the scheme and host, drops default ports, fragments, tracking
+    parameters and a trailing slash, and sorts whatever query is left.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    if path.endswith(('/index.html', '/index.htm')):
+        path = path.rsplit('/', 1)[0] + '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def dedupe_urls(urls: Iterable[str]) -> List[str]:
+    """Canonicalize `urls`, keeping the first occurrence of each page in order"""
+    return list(dict.fromkeys(canonicalize_url(url) for url in urls))
+
+
+MASK64 = (1 << 64) - 1
+# BIT_TABLES[bit] maps a byte to 1 if `bit` is set in it, else 0
+BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+
+def _word_hashes(word: str) -> Tuple[int, int, int]:
+    """A word's 64-bit hash, rotated left by 0, 1 and 2 bits"""
+    h = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'big')
+    return h, ((h << 1) | (h >> 63)) & MASK64, ((h << 2) | (h >> 62)) & MASK64
+
+
+def simhash(content: str) -> int:
+    """64-bit SimHash over word 3-shingles; similar pages differ in few bits"""
+    words = content.lower().split()
+    # Hash each distinct word once and build shingle hashes by rotate-and-xor
+    # of the word hashes, which is far cheaper than hashing every shingle
+    table = {word: _word_hashes(word) for word in set(words)}
+    hashes = [table[word] for word in words]
+    if len(hashes) >= SHINGLE_SIZE:
+        shingles = {a[2] ^ b[1] ^ c[0] for a, b, c in zip(hashes, hashes[1:], hashes[2:])}
+    else:
+        shingles = {h[0] for h in hashes}
+    
+    # Count set bits per position on byte columns of the packed hashes, so the
+    # 64 tallies run in bytes.translate/count rather than a loop over bits
+    packed = array('Q', shingles).tobytes()
+    half = len(shingles) / 2
+    fingerprint = 0
+    for byte in range(8):
+        column = packed[byte::8]
+        for bit in range(8):
+            if column.translate(BIT_TABLES[bit]).count(1) > half:
+                fingerprint |= 1 << (8 * byte + bit)
+    return fingerprint
+
+
+def fingerprint(content: str) -> Optional[int]:
+    """SimHash of a page, or None when it is too short to compare reliably"""
+    if len(content.split()) < MIN_WORDS:
+        return None
+    return simhash(content)
+
+
+class SimHashIndex:
+    """Find earlier pages whose fingerprint is within `max_distance` bits
+    
+    Fingerprints are split into `max_distance + 1` bands. Any two within the
+    distance must agree exactly on at least one band, so a lookup only
+    compares against pages sharing a band, and the index stays roughly
+    linear in the number of pages.
+    When several indexed pages are near, the one added first wins, so a
+    caller that adds pages in a stable order gets a stable original.
+    """
+    
+    def __init__(self, max_distance: int = 6):
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self.band_width = -(-64 // self.band_count)
+        # Each band's entries are (fingerprint, position added, key), in the order added
+        self.bands: Dict[Tuple[int, int], List[Tuple[int, int, str]]] = {}
+        self.size = 0
+    
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        mask = (1 << self.band_width) - 1
+        return [(band, (fingerprint >> (band * self.band_width)) & mask) for band in range(self.band_count)]
+    
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Key of the earliest indexed page near `fingerprint`, if any"""
+        best: Optional[Tuple[int, str]] = None
+        for band_key in self._band_keys(fingerprint):
+            for other, position, key in self.bands.get(band_key, ()):
+                if best is not None and position >= best[0]:
+                    break
+                if bin(fingerprint ^ other).count('1') <= self.max_distance:
+                    best = (position, key)
+                    break
+        return best[1] if best else None
+    
+    def add(self, key: str, fingerprint: int):
+        for band_key in self._band_keys(fingerprint):
+            self.bands.setdefault(band_key, []).append((fingerprint, self.size, key))
+        self.size += 1
+    
+    def match_or_add(self, key: str, fingerprint: Optional[int]) -> Optional[str]:
+        """Return the page this fingerprint duplicates, or index it as a new page and return None"""
+        if fingerprint is None:
+            return None
+        original = self.find(fingerprint)
+        if original is None:
+            self.add(key, fingerprint)
+        return original
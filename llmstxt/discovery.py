@@ -0,0 +1,297 @@
+"""
+Streaming sitemap parsing and a priority frontier of URLs to scrape
+"""
+
+import heapq
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlsplit
+from xml.parsers import expat
+
+from llmstxt.deadline import Deadline
+from llmstxt.dedup import canonicalize_url
+
+GZIP_MAGIC = b'\x1f\x8b'
+# Decompressed bytes produced per step, so a gzip bomb cannot balloon memory
+INFLATE_STEP = 1 << 20
+
+# Sections of a site worth scraping first, highest priority first
+DEFAULT_FOCUS_PATHS = ['/blog', '/docs', '/features', '/pricing', '/about', '/integrations']
+# Weights of the three ranking signals, each scaled to 0..1
+FOCUS_WEIGHT = 4.0
+FRESHNESS_WEIGHT = 2.0
+DEPTH_WEIGHT = 1.0
+# A page last modified this many days ago gets half the freshness of a new one
+FRESHNESS_HALF_LIFE_DAYS = 90.0
+
+
+class SitemapParser:
+    """Incremental parser for sitemap and sitemap index documents
+    
+    Bytes are fed as they arrive, plain or gzip-compressed, and each call
+    returns the (loc, lastmod) entries completed so far. It is a SAX-style
+    expat parser that keeps no tree, so memory stays flat however large
+    the sitemap is. `is_index` tells whether the entries are child
+    sitemaps rather than pages.
+    """
+    
+    def __init__(self):
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._text
+        self._inflate = None
+        self._head = b''
+        self._sniffed = False
+        self._field: Optional[str] = None
+        self._values: Dict[str, str] = {}
+        self._entries: List[Tuple[str, str]] = []
+        self.is_index = False
+    
+    def _start(self, name: str, attributes):
+        name = name.rsplit(':', 1)[-1]
+        if name in ('loc', 'lastmod'):
+            self._field = name
+            self._values[name] = ''
+        elif name == 'sitemapindex':
+            self.is_index = True
+    
+    def _text(self, data: str):
+        if self._field:
+            self._values[self._field] += data
+    
+    def _end(self, name: str):
+        name = name.rsplit(':', 1)[-1]
+        if name in ('url', 'sitemap'):
+            loc = self._values.get('loc', '').strip()
+            if loc:
+                self._entries.append((loc, self._values.get('lastmod', '').strip()))
+            self._values = {}
+        self._field = None
+    
+    def _drain(self) -> List[Tuple[str, str]]:
+        entries, self._entries = self._entries, []
+        return entries
+    
+    def feed(self, chunk: bytes) -> List[Tuple[str, str]]:
+        if not self._sniffed:
+            # The first two bytes tell gzip from plain XML
+            self._head += chunk
+            if len(self._head) < 2:
+                return []
+            chunk, self._head = self._head, b''
+            self._sniffed = True
+            if chunk.startswith(GZIP_MAGIC):
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        
+        if self._inflate is None:
+            self._parser.Parse(chunk, False)
+        else:
+            while chunk:
+                self._parser.Parse(self._inflate.decompress(chunk, INFLATE_STEP), False)
+                chunk = self._inflate.unconsumed_tail
+        return self._drain()
+    
+    def close(self) -> List[Tuple[str, str]]:
+        entries = self.feed(self._head) if self._head else []
+        if self._inflate is not None:
+            self._parser.Parse(self._inflate.flush(), False)
+        self._parser.Parse(b'', True)
+        return entries + self._drain()
+
+
+def parse_lastmod(lastmod: str) -> Optional[float]:
+    """W3C datetime ('2024-05-01' or '2024-05-01T10:00:00+00:00') as a timestamp"""
+    if not lastmod:
+        return None
+    try:
+        parsed = datetime.fromisoformat(lastmod.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def site_host(url: str) -> str:
+    return (urlsplit(url).hostname or '').lower().removeprefix('www.')
+
+
+class Frontier:
+    """Priority queue of URLs to scrape, filled while discovery is still running
+    
+    URLs are canonicalized and deduplicated as they are added. Each is
+    ranked by the first matching focus path (earlier paths rank higher),
+    how recently the sitemap says it changed, and how shallow it is. A URL
+    seen again with a lastmod is re-ranked. Producers run on background
+    threads via `produce`, and iterating the frontier yields the best URL
+    known at that moment, blocking only while nothing is queued and
+    discovery is still going, up to `limit` URLs. Only the best URLs that
+    can still be taken are kept queued, and once `limit` URLs have been
+    taken the frontier closes. `close` ends discovery early, leaving only
+    what is already queued; producers should check `closed` and stop. With a `deadline`, waiting
+    for producers stops when it runs out: the frontier closes itself then.
+    """
+    
+    def __init__(self, base_url: str, focus_paths: Sequence[str] = (), limit: Optional[int] = None,
+                 now: Optional[float] = None, deadline: Optional[Deadline] = None):
+        self.host = site_host(base_url)
+        self.focus_paths = [path.rstrip('/') or '/' for path in focus_paths]
+        self.limit = limit
+        self.deadline = deadline
+        self.now = time.time() if now is None else now
+        self.cond = threading.Condition()
+        self.heap: List[Tuple[float, int, str]] = []
+        self.scores: Dict[str, float] = {}
+        self.lastmods: Dict[str, str] = {}
+        self.taken: Set[str] = set()
+        self.producers = 0
+        self.sequence = 0
+        self.closed = False
+    
+    def focus_rank(self, path: str) -> float:
+        for rank, focus in enumerate(self.focus_paths):
+            if focus == '/' or path == focus or path.startswith(focus + '/'):
+                return 1.0 - rank / len(self.focus_paths)
+        return 0.0
+    
+    def score(self, url: str, lastmod: str = '') -> float:
+        path = urlsplit(url).path or '/'
+        depth = len([segment for segment in path.split('/') if segment])
+        modified = parse_lastmod(lastmod)
+        freshness = 0.0
+        if modified is not None:
+            age_days = max(0.0, self.now - modified) / 86400
+            freshness = 0.5 ** (age_days / FRESHNESS_HALF_LIFE_DAYS)
+        return (FOCUS_WEIGHT * self.focus_rank(path) + FRESHNESS_WEIGHT * freshness
+                + DEPTH_WEIGHT / (1 + depth))
+    
+    def publish_key(self, url: str) -> Tuple[float, int, str]:
+        """Stable order for publishing: focus path, then depth, then URL
+        
+        Unlike `score` it leaves out freshness, which drifts with the clock,
+        so an unchanged site is published in the same order on every run
+        whatever order its pages were crawled in.
+        """
+        path = urlsplit(url).path or '/'
+        depth = len([segment for segment in path.split('/') if segment])
+        return -self.focus_rank(path), depth, url
+    
+    def add(self, url: str, lastmod: str = '') -> bool:
+        """Queue a URL (or re-rank it with a newly learned lastmod); other sites' URLs are ignored"""
+        url = canonicalize_url(url)
+        if site_host(url) != self.host:
+            return False
+        with self.cond:
+            if self.closed or url in self.taken or (url in self.scores and not lastmod):
+                return False
+            if self.limit is not None and len(self.taken) >= self.limit:
+                self._close()
+                return False
+            if lastmod:
+                self.lastmods[url] = lastmod
+            score = self.score(url, self.lastmods.get(url, ''))
+            if self.scores.get(url) == score:
+                return False
+            self.scores[url] = score
+            self.sequence += 1
+            # heapq is a min-heap; the sequence number keeps ties in discovery order
+            heapq.heappush(self.heap, (-score, self.sequence, url))
+            if self.limit is not None and len(self.heap) > 2 * max(1, self.limit - len(self.taken)):
+                self._trim()
+            self.cond.notify()
+            return url in self.scores
+    
+    def _trim(self):
+        """Drop queued URLs that rank too low to ever be taken before `limit` is reached
+        
+        Dropped URLs are forgotten, so one seen again with a lastmod can
+        still come back if it now ranks higher.
+        """
+        live = [entry for entry in self.heap if entry[2] not in self.taken and self.scores.get(entry[2]) == -entry[0]]
+        self.heap = heapq.nsmallest(self.limit - len(self.taken), live)
+        kept = {url for _, _, url in self.heap}
+        for _, _, url in live:
+            if url not in kept:
+                del self.scores[url]
+    
+    def add_all(self, entries: Sequence[Tuple[str, str]]):
+        for url, lastmod in entries:
+            self.add(url, lastmod)
+    
+    def lastmod(self, url: str) -> str:
+        with self.cond:
+            return self.lastmods.get(url, '')
+    
+    def produce(self, func: Callable, *args) -> threading.Thread:
+        """Run `func(*args)` on a daemon thread that counts as a producer until it returns"""
+        with self.cond:
+            self.producers += 1
+        
+        def run():
+            try:
+                func(*args)
+            finally:
+                with self.cond:
+                    self.producers -= 1
+                    self.cond.notify_all()
+        
+        thread = threading.Thread(target=run, name='frontier-producer', daemon=True)
+        thread.start()
+        return thread
+    
+    def pop(self) -> Optional[str]:
+        """Best queued URL, waiting while producers are running; None once discovery is exhausted or out of time"""
+        with self.cond:
+            while True:
+                if self.limit is not None and len(self.taken) >= self.limit:
+                    self._close()
+                    return None
+                while self.heap:
+                    negative_score, _, url = heapq.heappop(self.heap)
+                    if url in self.taken or self.scores.get(url) != -negative_score:
+                        continue  # already taken, or superseded by a re-ranked entry
+                    self.taken.add(url)
+                    return url
+                if not self.producers or self.closed:
+                    return None
+                if self.deadline is None:
+                    self.cond.wait()
+                elif self.deadline.expired():
+                    self._close()
+                else:
+                    self.cond.wait(timeout=self.deadline.remaining())
+    
+    def close(self):
+        """Stop accepting URLs; iteration then drains what is queued without waiting for producers"""
+        with self.cond:
+            self._close()
+    
+    def _close(self):
+        self.closed = True
+        self.cond.notify_all()
+    
+    def remaining(self) -> List[str]:
+        """Queued URLs not taken yet, best first"""
+        with self.cond:
+            best = {}
+            for negative_score, sequence, url in self.heap:
+                if url not in self.taken and self.scores.get(url) == -negative_score:
+                    best[url] = (negative_score, sequence)
+            return sorted(best, key=best.get)
+    
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            url = self.pop()
+            if url is None:
+                return
+            yield url
+    
+    def __len__(self) -> int:
+        """URLs taken so far or still queued"""
+        with self.cond:
+            return len(self.scores)
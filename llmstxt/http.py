@@ -0,0 +1,95 @@
+"""
+Pooled keep-alive HTTP clients for the Firecrawl and OpenAI REST APIs
+"""
+
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from llmstxt.metrics import RunMetrics
+
+if TYPE_CHECKING:
+    # requests is imported on first use, so importing the URL constants stays cheap
+    import requests
+
+FIRECRAWL_API_URL = "https://api.firecrawl.dev"
+OPENAI_API_URL = "https://api.openai.com"
+
+# (connect, read) timeouts in seconds, per endpoint
+DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    'map': (5.0, 60.0),
+    'scrape': (5.0, 30.0),
+    'chat': (5.0, 60.0),
+    'site': (5.0, 15.0)
+}
+
+ENDPOINTS = {
+    'map': '/v1/map',
+    'scrape': '/v1/scrape',
+    'chat': '/v1/chat/completions'
+}
+
+
+def build_session(pool_size: int = 10, gzip: bool = True) -> 'requests.Session':
+    """Session whose connections stay open between calls to the same host"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    # requests decompresses gzip bodies transparently; 'identity' turns that off
+    session.headers['Accept-Encoding'] = 'gzip, deflate' if gzip else 'identity'
+    return session
+
+
+class ApiClient:
+    """Authenticated JSON client for one API host with per-endpoint timeouts"""
+    
+    def __init__(self, base_url: str, api_key: Optional[str], pool_size: int = 10,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None, gzip: bool = True,
+                 name: str = 'api', metrics: Optional[RunMetrics] = None):
+        self.base_url = base_url.rstrip('/')
+        self.name = name
+        self.metrics = metrics or RunMetrics()
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.session = build_session(pool_size, gzip)
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        })
+    
+    def post(self, endpoint: str, payload: Dict, timeout: Optional[Tuple[float, float]] = None) -> 'requests.Response':
+        """POST `payload` to a named endpoint ('map', 'scrape', 'chat'), recording latency and bytes"""
+        import requests
+        try:
+            with self.metrics.call(f"{self.name}.{endpoint}"):
+                response = self.session.post(
+                    f"{self.base_url}{ENDPOINTS[endpoint]}",
+                    json=payload,
+                    timeout=timeout or self.timeouts[endpoint]
+                )
+        except requests.exceptions.Timeout:
+            self.metrics.incr(f"{self.name}.timeouts")
+            raise
+        
+        self.metrics.add_bytes('out', len(response.request.body or b''))
+        self.metrics.add_bytes('in', len(response.content))
+        if response.status_code == 429:
+            self.metrics.incr(f"{self.name}.429")
+        elif response.status_code >= 500:
+            self.metrics.incr(f"{self.name}.5xx")
+        return response
+    
+    def close(self):
+        self.session.close()
+
+
+def timeouts_from_args(connect: float, scrape: float, summary: float) -> Dict[str, Tuple[float, float]]:
+    """Build the timeout table from the CLI's --connect-timeout / --scrape-timeout / --summary-timeout"""
+    return {
+        'map': (connect, DEFAULT_TIMEOUTS['map'][1]),
+        'scrape': (connect, scrape),
+        'chat': (connect, summary),
+        'site': (connect, DEFAULT_TIMEOUTS['site'][1])
+    }
@@ -0,0 +1,100 @@
+"""
+Append-only journal of finished pages, used to resume interrupted runs
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+DEFAULT_JOURNAL_PATH = ".llmstxt-cache/journal-{generator}.jsonl"
+
+
+class RunJournal:
+    """JSONL record of every page finished in the current run
+    
+    The first line names the site; each later line is one finished page and
+    is flushed to disk as soon as it is written, so a crash loses at most the
+    page in flight. Only byte offsets are kept in memory and pages are read
+    back on demand. A torn final line left by a crash is cut off on resume.
+    """
+    
+    def __init__(self, path: str, resume: bool = False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.path = path
+        self.resume = resume
+        self.offsets: Dict[str, int] = {}
+        self.handle = None
+        self.reader = None
+    
+    def start(self, site: str) -> int:
+        """Open the journal for `site` and return how many finished pages it already holds"""
+        self.close()
+        self.offsets = {}
+        
+        if self.resume and os.path.exists(self.path):
+            self._load(site)
+        if not self.offsets:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'site': site}) + '\n')
+        
+        self.handle = open(self.path, 'ab')
+        self.reader = open(self.path, 'rb')
+        return len(self.offsets)
+    
+    def _load(self, site: str):
+        with open(self.path, 'rb') as f:
+            header = f.readline()
+            try:
+                if json.loads(header).get('site') != site:
+                    print(f"Journal {self.path} belongs to another site; starting fresh")
+                    return
+            except ValueError:
+                return
+            
+            offset = f.tell()
+            for line in f:
+                try:
+                    self.offsets[json.loads(line)['url']] = offset
+                except (ValueError, KeyError):
+                    break
+                offset += len(line)
+        
+        # Drop anything after the last complete record so appends start on a clean line
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset)
+    
+    def __contains__(self, url: str) -> bool:
+        return url in self.offsets
+    
+    def get(self, url: str) -> Optional[Dict]:
+        offset = self.offsets.get(url)
+        if offset is None:
+            return None
+        self.reader.seek(offset)
+        return json.loads(self.reader.readline())
+    
+    def append(self, url: str, **fields):
+        """Record a finished page and flush it to disk"""
+        line = (json.dumps({'url': url, **fields}, ensure_ascii=False) + '\n').encode('utf-8')
+        self.handle.seek(0, os.SEEK_END)
+        self.offsets[url] = self.handle.tell()
+        self.handle.write(line)
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+    
+    def finish(self):
+        """Delete the journal once its pages have been published"""
+        self.close()
+        self.offsets = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def close(self):
+        for f in (self.handle, self.reader):
+            if f:
+                f.close()
+        self.handle = None
+        self.reader = None
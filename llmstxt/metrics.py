@@ -0,0 +1,190 @@
+"""
+Per-stage run metrics with JSON and Prometheus text export
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Histogram upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram plus a bounded reservoir for quantiles"""
+    
+    def __init__(self, reservoir_size: int = 10000):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.reservoir: List[float] = []
+        self.reservoir_size = reservoir_size
+    
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = seconds
+    
+    def quantile(self, q: float) -> float:
+        if not self.reservoir:
+            return 0.0
+        ordered = sorted(self.reservoir)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum_seconds': round(self.total, 4),
+            'p50_ms': round(self.quantile(0.50) * 1000, 1),
+            'p90_ms': round(self.quantile(0.90) * 1000, 1),
+            'p99_ms': round(self.quantile(0.99) * 1000, 1),
+            'max_ms': round(self.max * 1000, 1),
+            'buckets': {
+                **{str(bound): count for bound, count in zip(BUCKETS, self.counts)},
+                '+Inf': self.counts[-1]
+            }
+        }
+
+
+class RunMetrics:
+    """Collects stage timers, external call latencies, counters, bytes and gauges for one run
+    
+    Stages may overlap (scraping and summarizing run concurrently), so each
+    stage reports both its busy time (sum of all timed sections) and its
+    wall time (first start to last finish).
+    """
+    
+    def __init__(self, labels: Optional[Dict[str, str]] = None):
+        self.labels = dict(labels or {})
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Histogram] = defaultdict(Histogram)
+        self.stage_spans: Dict[str, List[float]] = {}
+        self.calls: Dict[str, Histogram] = defaultdict(Histogram)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = {'in': 0, 'out': 0}
+        self.gauges: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time one unit of work in a pipeline stage (map, scrape, summarize, render, write)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.stages[name].observe(end - start)
+            span = self.stage_spans.setdefault(name, [start, end])
+            span[0] = min(span[0], start)
+            span[1] = max(span[1], end)
+    
+    @contextmanager
+    def call(self, name: str):
+        """Time one external call, e.g. 'firecrawl.scrape' or 'openai.chat'"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.calls[name].observe(time.perf_counter() - start)
+    
+    def incr(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+    
+    def add_bytes(self, direction: str, amount: int):
+        self.bytes[direction] += amount
+    
+    def gauge(self, name: str, value: float):
+        self.gauges[name] = value
+    
+    def report(self) -> Dict:
+        stages = {}
+        for name, histogram in self.stages.items():
+            start, end = self.stage_spans[name]
+            stages[name] = {**histogram.summary(), 'wall_seconds': round(end - start, 4)}
+        
+        return {
+            'labels': self.labels,
+            'started_at': self.started_at.isoformat(),
+            'duration_seconds': round(time.perf_counter() - self.started, 4),
+            'stages': stages,
+            'calls': {name: histogram.summary() for name, histogram in self.calls.items()},
+            'counters': dict(self.counters),
+            'bytes': dict(self.bytes),
+            'gauges': dict(self.gauges)
+        }
+    
+    def to_prometheus(self) -> str:
+        """Render the report in the Prometheus text exposition format"""
+        base = ''.join(f',{key}="{value}"' for key, value in sorted(self.labels.items()))
+        lines = [
+            '# TYPE llmstxt_run_duration_seconds gauge',
+            f'llmstxt_run_duration_seconds{{{base[1:]}}} {time.perf_counter() - self.started:.4f}'
+        ]
+        
+        for metric, kind, histograms in (('llmstxt_stage_duration_seconds', 'stage', self.stages),
+                                         ('llmstxt_call_duration_seconds', 'call', self.calls)):
+            lines.append(f'# TYPE {metric} histogram')
+            for name, histogram in sorted(histograms.items()):
+                labels = f'{kind}="{name}"{base}'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{{labels}}} {histogram.total:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+        
+        lines.append('# TYPE llmstxt_events_total counter')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'llmstxt_events_total{{event="{name}"{base}}} {value}')
+        lines.append('# TYPE llmstxt_bytes_total counter')
+        for direction, value in sorted(self.bytes.items()):
+            lines.append(f'llmstxt_bytes_total{{direction="{direction}"{base}}} {value}')
+        lines.append('# TYPE llmstxt_gauge gauge')
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f'llmstxt_gauge{{name="{name}"{base}}} {value}')
+        
+        return '\n'.join(lines) + '\n'
+    
+    def write(self, path: str):
+        """Write the report; a .prom extension selects Prometheus text, anything else JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.report(), f, indent=2)
+
+
+def run_profiled(func: Callable, path: str, top: int = 25):
+    """Run `func` under cProfile, dump the stats to `path` and print the hottest calls"""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
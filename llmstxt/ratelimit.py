@@ -0,0 +1,170 @@
+"""
+Rate limiting helpers shared by the generators
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBudget:
+    """Async token bucket enforcing a tokens-per-minute budget"""
+    
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(max(1, tokens_per_minute))
+        self.refill_rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.refill_rate)
+        self.updated = now
+    
+    async def acquire(self, tokens: int):
+        """Wait until `tokens` can be spent without exceeding the budget"""
+        tokens = min(float(tokens), self.capacity)
+        
+        # Waiters queue on the lock so the budget is handed out in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                await asyncio.sleep((tokens - self.available) / self.refill_rate)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveLimiter:
+    """Shared AIMD limiter for one API: a paced request rate plus a dynamic concurrency cap
+    
+    Healthy responses grow the rate and concurrency additively; 429s and
+    timeouts cut both multiplicatively (at most once per `cooldown` seconds,
+    so a burst of failures from one overload counts once). A Retry-After
+    value pauses every caller sharing the limiter until it has passed.
+    
+    Async callers use `async with limiter.slot():`, sync callers `limiter.wait()`.
+    """
+    
+    def __init__(self, name: str, rate: float = 2.0, min_rate: float = 0.1, max_rate: float = 50.0,
+                 concurrency: int = 4, max_concurrency: int = 32, increase: float = 1.0,
+                 decrease: float = 0.5, cooldown: float = 2.0):
+        self.name = name
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.concurrency = float(max(1, min(concurrency, max_concurrency)))
+        self.max_concurrency = max(1, max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        
+        self.next_free = 0.0
+        self.blocked_until = 0.0
+        self.last_cut = 0.0
+        self.in_flight = 0
+        self.successes = 0
+        self.throttled = 0
+        self.timeouts = 0
+        
+        self._lock = threading.Lock()
+        self._changed: Optional[asyncio.Event] = None
+    
+    def _reserve(self) -> float:
+        """Claim the next send time and return how long to wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self.next_free, self.blocked_until)
+            self.next_free = start + 1.0 / self.rate
+            return start - now
+    
+    def wait(self):
+        """Block the calling thread until a request may be sent"""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the currently allowed concurrent slots, paced to the current rate"""
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        while self.in_flight >= int(self.concurrency):
+            self._changed.clear()
+            await self._changed.wait()
+        
+        self.in_flight += 1
+        try:
+            delay = self._reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            self.in_flight -= 1
+            self._changed.set()
+    
+    def on_success(self):
+        with self._lock:
+            self.successes += 1
+            # Additive increase, spread over roughly one second's worth of requests
+            self.rate = min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0))
+            self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / self.concurrency)
+        if self._changed:
+            self._changed.set()
+    
+    def _cut(self):
+        now = time.monotonic()
+        if now - self.last_cut < self.cooldown:
+            return
+        self.last_cut = now
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.concurrency = max(1.0, self.concurrency * self.decrease)
+    
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Record a 429; `retry_after` (seconds) pauses every caller"""
+        with self._lock:
+            self.throttled += 1
+            self._cut()
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+    
+    def on_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+            self._cut()
+    
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'rate': round(self.rate, 2),
+            'concurrency': int(self.concurrency),
+            'in_flight': self.in_flight,
+            'successes': self.successes,
+            'throttled': self.throttled,
+            'timeouts': self.timeouts
+        }
+    
+    def describe(self) -> str:
+        return (f"{self.name}: {self.rate:.1f} req/s, concurrency {int(self.concurrency)} "
+                f"({self.throttled} throttled, {self.timeouts} timeouts)")
@@ -0,0 +1,110 @@
+"""
+Shared scheduling for crawling several sites in one process
+"""
+
+import asyncio
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+from llmstxt.ratelimit import AdaptiveLimiter, TokenBudget
+
+
+class CrawlScheduler:
+    """Fair share of Firecrawl capacity across sites, plus the account-wide limiters
+    
+    Scrapes from every site go through `slot(domain)`, which caps requests in
+    flight both globally and per domain. Freed global slots are handed to
+    waiting domains in round-robin order, so a site with thousands of pages
+    cannot starve the others. The API rate limiters and the OpenAI token
+    budget live here too because the quotas behind them are per account,
+    not per site.
+    """
+    
+    def __init__(self, global_limit: int = 20, per_domain_limit: int = 5,
+                 firecrawl_rate: float = 5.0, openai_rate: float = 10.0,
+                 summary_concurrency: int = 10, tokens_per_minute: int = 200000):
+        self.global_limit = max(1, global_limit)
+        self.per_domain_limit = max(1, min(per_domain_limit, self.global_limit))
+        self.firecrawl_limiter = AdaptiveLimiter(
+            'Firecrawl', rate=firecrawl_rate, concurrency=max(1, self.global_limit // 2),
+            max_concurrency=self.global_limit
+        )
+        self.openai_limiter = AdaptiveLimiter(
+            'OpenAI', rate=openai_rate, concurrency=max(1, summary_concurrency // 2),
+            max_concurrency=max(1, summary_concurrency)
+        )
+        self.token_budget = TokenBudget(tokens_per_minute)
+        
+        self.active = 0
+        self.running: Dict[str, int] = defaultdict(int)
+        self.granted: Dict[str, int] = defaultdict(int)
+        # Domains with queued requests, in the order they will next be served
+        self.waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+    
+    def _has_room(self, domain: str) -> bool:
+        return self.active < self.global_limit and self.running[domain] < self.per_domain_limit
+    
+    def _grant(self, domain: str):
+        self.active += 1
+        self.running[domain] += 1
+        self.granted[domain] += 1
+    
+    def _dispatch(self):
+        """Hand free global slots to waiting domains, one request per domain per turn"""
+        while self.active < self.global_limit:
+            for domain, queue in self.waiting.items():
+                if self.running[domain] < self.per_domain_limit:
+                    break
+            else:
+                return
+            
+            waiter = queue.popleft()
+            if not queue:
+                del self.waiting[domain]
+            else:
+                self.waiting.move_to_end(domain)
+            if waiter.cancelled():
+                continue
+            self._grant(domain)
+            waiter.set_result(None)
+    
+    @asynccontextmanager
+    async def slot(self, domain: str):
+        """Hold one Firecrawl request slot on behalf of `domain`"""
+        if not self.waiting and self._has_room(domain):
+            self._grant(domain)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiting.setdefault(domain, deque()).append(waiter)
+            # Queued domains may all be at their cap while this one has room
+            self._dispatch()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted just as we were cancelled: give the slot back
+                    self._release(domain)
+                raise
+        
+        try:
+            yield
+        finally:
+            self._release(domain)
+    
+    def _release(self, domain: str):
+        self.active -= 1
+        self.running[domain] -= 1
+        self._dispatch()
+    
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Requests granted so far, in flight and queued, per domain"""
+        domains = set(self.granted) | set(self.waiting)
+        return {
+            domain: {
+                'granted': self.granted[domain],
+                'in_flight': self.running[domain],
+                'queued': len(self.waiting.get(domain, ()))
+            }
+            for domain in sorted(domains)
+        }
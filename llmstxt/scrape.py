@@ -0,0 +1,121 @@
+"""
+Firecrawl scrape options per URL class and hedging of slow scrapes
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from llmstxt.metrics import Histogram
+
+# Every class asks for markdown only: it is the one format the generators read
+# (page metadata comes back regardless), and extra formats cost render time and payload
+BASE_SCRAPE_OPTIONS = {
+    'formats': ['markdown'],
+    'onlyMainContent': True
+}
+# waitFor is how long Firecrawl lets client-side scripts run before capturing;
+# timeout (ms) caps the scrape on Firecrawl's side
+SCRAPE_PROFILES: Dict[str, Dict] = {
+    # Documentation is almost always rendered on the server
+    'docs': {'waitFor': 0, 'timeout': 15000},
+    'blog': {'waitFor': 500, 'timeout': 20000},
+    # Landing and product pages are the likeliest to render client-side
+    'page': {'waitFor': 1500, 'timeout': 30000}
+}
+
+# A scrape still running at this quantile of its class's durations gets a duplicate request
+HEDGE_QUANTILE = 0.95
+# Durations a class needs before it is hedged, so a few early outliers set no threshold
+HEDGE_MIN_SAMPLES = 20
+# Never hedge sooner than this many seconds, however fast the class usually is
+MIN_HEDGE_DELAY = 1.0
+# Hedged requests allowed as a share of all scrapes, so hedging cannot double the load in an overload
+HEDGE_BUDGET = 0.1
+# Seconds one URL may take across all its attempts and hedges, counted from its first
+# request being sent, before it is recorded as timed out
+DEFAULT_URL_DEADLINE = 90.0
+
+
+def url_class(url: str) -> str:
+    """'docs', 'blog' or 'page', from the URL path"""
+    path = urlsplit(url).path.lower()
+    if '/docs' in path:
+        return 'docs'
+    if '/blog' in path:
+        return 'blog'
+    return 'page'
+
+
+def scrape_request(url: str) -> Dict:
+    """Firecrawl /v1/scrape request body for `url`, tuned to its URL class"""
+    return {'url': url, **BASE_SCRAPE_OPTIONS, **SCRAPE_PROFILES[url_class(url)]}
+
+
+class HedgePolicy:
+    """Decides when a slow scrape gets a duplicate ("hedged") request
+    
+    Successful scrape durations are kept per URL class. Once a class has
+    `min_samples` of them, `delay(kind)` is the class's p95, meaning a
+    scrape still running by then is in the slowest 5%. Sending a second
+    identical request at that point and taking whichever answers first
+    trims the tail at the cost of a few percent more requests. The cost
+    is capped by `budget`: hedges may not exceed that share of all
+    scrapes started.
+    """
+    
+    def __init__(self, quantile: float = HEDGE_QUANTILE, budget: float = HEDGE_BUDGET,
+                 min_samples: int = HEDGE_MIN_SAMPLES, min_delay: float = MIN_HEDGE_DELAY):
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.durations: Dict[str, Histogram] = {}
+        self.scrapes = 0
+        self.hedges = 0
+    
+    def observe(self, kind: str, seconds: float):
+        self.durations.setdefault(kind, Histogram(reservoir_size=500)).observe(seconds)
+    
+    def delay(self, kind: str) -> Optional[float]:
+        """Seconds to wait for a scrape of this class before hedging it; None while it has too few samples"""
+        histogram = self.durations.get(kind)
+        if histogram is None or histogram.count < self.min_samples:
+            return None
+        return max(self.min_delay, histogram.quantile(self.quantile))
+    
+    def started(self):
+        self.scrapes += 1
+    
+    def allow_hedge(self) -> bool:
+        """Claim one hedge if the budget has room for it"""
+        if self.hedges + 1 > self.budget * self.scrapes:
+            return False
+        self.hedges += 1
+        return True
+
+
+class UrlDeadline:
+    """One URL's time limit across its attempts, counted from when its first request is sent
+    
+    Waiting for a rate-limiter slot before then says nothing about the page,
+    so it does not count; waits before retries and hedges do. Attempts run
+    on several threads, and only the first `start()` sets the clock.
+    """
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.give_up: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        with self._lock:
+            if self.give_up is None:
+                self.give_up = time.monotonic() + self.seconds
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None while no request has been sent"""
+        if self.give_up is None:
+            return None
+        return max(0.0, self.give_up - time.monotonic())
@@ -0,0 +1,189 @@
+"""
+Content-addressed llms-full.txt shards with a manifest, for publishing only what changed
+"""
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from llmstxt.writer import ENCODINGS, compress_file, temp_path_for, usable_encodings
+
+SHARD_DIR = 'llms-full'
+SHARD_MANIFEST = 'llms-full.manifest.json'
+MANIFEST_VERSION = 1
+# Upper bound on a shard's size; a single larger page gets a shard of its own
+DEFAULT_SHARD_BYTES = 256 * 1024
+# Shards are not cut below this share of the bound
+MIN_SHARD_SHARE = 0.25
+# Rough size of one page's section, used to space URL-chosen cut points about half a shard apart
+TYPICAL_SECTION_BYTES = 8 * 1024
+# Hex digits of the SHA-256 used in shard file names
+NAME_DIGITS = 16
+# llms-full.txt sections may open with the page's crawl position, which shifts whenever a page is added
+PAGE_MARKER = re.compile(rb'\A<\|firecrawl-page-\d+-lllmstxt\|>\n')
+
+
+def cut_after(url: str, modulus: int) -> bool:
+    """Whether a shard may end after this URL's section
+    
+    The choice depends on the URL alone, so editing, adding or removing a
+    page moves no cut point except next to it, and every other shard keeps
+    its bytes and therefore its hash.
+    """
+    digest = hashlib.sha1(url.encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') % modulus == 0
+
+
+def plan_shards(sections: Sequence[Tuple[str, int]], shard_bytes: int) -> List[List[int]]:
+    """Group (url, byte length) sections into shards of consecutive indexes"""
+    modulus = max(1, shard_bytes // (2 * TYPICAL_SECTION_BYTES))
+    minimum = int(shard_bytes * MIN_SHARD_SHARE)
+    shards: List[List[int]] = []
+    current: List[int] = []
+    size = 0
+    for i, (url, length) in enumerate(sections):
+        if current and size + length > shard_bytes:
+            shards.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += length
+        if size >= minimum and cut_after(url, modulus):
+            shards.append(current)
+            current, size = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+
+def shard_section(section: bytes) -> bytes:
+    """A section as stored in a shard: without its crawl-position marker, so only its content is hashed"""
+    return PAGE_MARKER.sub(b'', section, count=1)
+
+
+def read_manifest(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def publish_shards(source_path: str, entries: Sequence[Tuple[int, Optional[str], int, int]], shard_dir: str,
+                   manifest_path: str, shard_bytes: int = DEFAULT_SHARD_BYTES, separator: str = '\n',
+                   encodings: Sequence[str] = (), site: Optional[str] = None,
+                   metadata: Optional[Dict] = None) -> Dict[str, int]:
+    """Split a published llms-full.txt into content-addressed shards and update the manifest
+    
+    `entries` are the writer's (page, url, offset, length) sections. They
+    are sharded in URL order rather than crawl order, which shifts when
+    freshness changes, so the same pages always land in the same shards.
+    For the same reason a section's `<|firecrawl-page-N-lllmstxt|>` marker
+    is left out of its shard.
+    Each shard is named after the SHA-256 of its bytes: a shard that
+    already exists is left alone, new ones are written atomically with
+    their `encodings` copies, and shards the new manifest no longer lists
+    are deleted once it is in place.
+    
+    The manifest lists the shards with their hashes, sizes and URLs, plus
+    any `metadata`. No timestamp goes in any shard, and the manifest's
+    `generated` time only moves when the rest of it does, so an unchanged
+    site rewrites nothing at all. Returns counts of shards written, kept
+    and removed.
+    """
+    encodings = usable_encodings(encodings)
+    os.makedirs(shard_dir, exist_ok=True)
+    ordered = sorted(entries, key=lambda entry: entry[1] or '')
+    # Cut points are planned on the published lengths; a marker is a few bytes either way
+    groups = plan_shards([(url or '', length) for _, url, _, length in ordered], shard_bytes)
+    separator_bytes = separator.encode('utf-8')
+    
+    shards = []
+    written = kept = 0
+    with open(source_path, 'rb') as source:
+        for group in groups:
+            parts = []
+            for i in group:
+                _, _, offset, length = ordered[i]
+                source.seek(offset)
+                parts.append(shard_section(source.read(length)))
+            data = separator_bytes.join(parts)
+            digest = hashlib.sha256(data).hexdigest()
+            name = f"{digest[:NAME_DIGITS]}.txt"
+            path = os.path.join(shard_dir, name)
+            if os.path.exists(path) and all(os.path.exists(path + ENCODINGS[encoding]) for encoding in encodings):
+                kept += 1
+            else:
+                _write_shard(path, data, encodings)
+                written += 1
+            shards.append({
+                'name': name,
+                'sha256': digest,
+                'bytes': len(data),
+                'urls': [ordered[i][1] for i in group]
+            })
+    
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'site': site,
+        'source': os.path.basename(source_path),
+        'directory': os.path.relpath(shard_dir, os.path.dirname(os.path.abspath(manifest_path))),
+        'encodings': {encoding: ENCODINGS[encoding] for encoding in encodings},
+        **(metadata or {}),
+        'pages': len(ordered),
+        'bytes': sum(shard['bytes'] for shard in shards),
+        # Hash over the shard hashes, so one comparison tells whether anything changed
+        'sha256': hashlib.sha256(''.join(shard['sha256'] for shard in shards).encode('ascii')).hexdigest(),
+        'shards': shards
+    }
+    previous = read_manifest(manifest_path)
+    if previous and {**previous, 'generated': None} == {**manifest, 'generated': None}:
+        manifest_changed = False
+    else:
+        manifest['generated'] = datetime.now(timezone.utc).isoformat()
+        tmp_path = temp_path_for(manifest_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, manifest_path)
+        manifest_changed = True
+    
+    # Only now that no manifest points at them can old shards go
+    live = {shard['name'] for shard in shards}
+    live |= {name + ENCODINGS[encoding] for name in live for encoding in encodings}
+    removed = 0
+    for name in os.listdir(shard_dir):
+        if name not in live and not name.startswith('.'):
+            os.remove(os.path.join(shard_dir, name))
+            removed += not name.endswith(tuple(ENCODINGS.values()))
+    
+    return {
+        'shards': len(shards),
+        'written': written,
+        'kept': kept,
+        'removed': removed,
+        'manifest_changed': int(manifest_changed)
+    }
+
+
+def _write_shard(path: str, data: bytes, encodings: Sequence[str]):
+    """Write a shard and its compressed copies, copies first so the plain file marks it complete"""
+    tmp_path = temp_path_for(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        for encoding in encodings:
+            compressed = compress_file(tmp_path, path + ENCODINGS[encoding], encoding)
+            os.chmod(compressed, 0o644)
+            os.replace(compressed, path + ENCODINGS[encoding])
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
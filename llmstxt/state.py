@@ -0,0 +1,117 @@
+"""
+Per-URL state for incremental regeneration
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from llmstxt.cache import normalize_content
+from llmstxt.discovery import SitemapParser
+
+DEFAULT_STATE_PATH = ".llmstxt-cache/state.sqlite3"
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+
+def url_key(url: str) -> str:
+    """Key used to match mapped URLs against sitemap entries"""
+    return url[:-1] if url.endswith('/') and url.count('/') > 3 else url
+
+
+def parse_sitemap(xml: bytes) -> Tuple[Dict[str, str], List[str]]:
+    """Parse a sitemap document, plain or gzipped, into ({url_key: lastmod}, [child sitemap URLs])"""
+    parser = SitemapParser()
+    entries = parser.feed(xml) + parser.close()
+    if parser.is_index:
+        return {}, [loc for loc, _ in entries]
+    return {url_key(loc): lastmod for loc, lastmod in entries}, []
+
+
+class PageStateStore:
+    """SQLite record of each URL's validators and last rendered output
+    
+    A near-duplicate page is stored with `duplicate_of` set to its
+    original's URL and no `full_entry`, since it is only listed in llms.txt.
+    """
+    
+    FIELDS = ('content_hash', 'lastmod', 'etag', 'last_modified', 'entry', 'full_entry', 'duplicate_of')
+    
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT,
+                lastmod TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                entry TEXT,
+                full_entry TEXT,
+                duplicate_of TEXT,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pages)")}
+        if 'duplicate_of' not in columns:
+            # Stores from before near-duplicates were recorded
+            self.conn.execute("ALTER TABLE pages ADD COLUMN duplicate_of TEXT")
+        self.conn.commit()
+    
+    def get(self, url: str) -> Optional[Dict[str, str]]:
+        row = self.conn.execute(
+            f"SELECT {', '.join(self.FIELDS)} FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return dict(zip(self.FIELDS, row)) if row else None
+    
+    def put(self, url: str, **fields):
+        """Insert or update a page; fields left out keep their stored value"""
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown page state fields: {', '.join(sorted(unknown))}")
+        
+        record = self.get(url) or {}
+        record.update(fields)
+        values = [record.get(field) for field in self.FIELDS]
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO pages (url, {', '.join(self.FIELDS)}, updated_at) "
+            f"VALUES (?, {', '.join('?' for _ in self.FIELDS)}, ?)",
+            (url, *values, time.time())
+        )
+        self.conn.commit()
+    
+    def urls(self) -> List[str]:
+        """URLs with a stored entry, most recently updated first"""
+        rows = self.conn.execute("SELECT url FROM pages WHERE entry IS NOT NULL ORDER BY updated_at DESC")
+        return [url for url, in rows]
+    
+    @staticmethod
+    def is_unchanged(record: Optional[Dict[str, str]], lastmod: str = '', etag: str = '',
+                     last_modified: str = '') -> bool:
+        """Decide from cheap validators whether a page can skip scraping
+        
+        Sitemap lastmod wins when both sides have it, then ETag, then
+        Last-Modified. Without any comparable validator the page is treated
+        as changed.
+        """
+        if not record or not record.get('entry'):
+            return False
+        if lastmod and record.get('lastmod'):
+            return lastmod == record['lastmod']
+        if etag and record.get('etag'):
+            return etag == record['etag']
+        if last_modified and record.get('last_modified'):
+            return last_modified == record['last_modified']
+        return False
+    
+    def close(self):
+        self.conn.close()
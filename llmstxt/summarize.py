@@ -0,0 +1,197 @@
+"""
+Local extractive page summaries, used instead of or ahead of the LLM
+"""
+
+import re
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    # Imported on first use so that CLIs which may never summarize locally start fast
+    import numpy as np
+
+# openai: every page goes to the LLM; local: none do; hybrid: only pages the
+# local summarizer is unsure about
+SUMMARIZER_MODES = ('openai', 'local', 'hybrid')
+DEFAULT_MIN_CONFIDENCE = 0.5
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further get got had has have having he her
+here hers him his how i if in into is it its itself just let me more most my no nor not now of off on once
+only or other our ours out over own same she should so some such than that the their theirs them then there
+these they this those through to too under until up us very was we were what when where which while who whom
+why will with would you your yours
+""".split())
+
+CODE_FENCE = re.compile(r'```.*?```', re.S)
+IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+LINK = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+BARE_URL = re.compile(r'https?://\S+')
+HTML_TAG = re.compile(r'<[^>]+>')
+HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+LIST_MARKER = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+EMPHASIS = re.compile(r'[*`]+|(?<!\w)_+|_+(?!\w)')
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=["“(]?[A-Z0-9])')
+TERM = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+TITLE_SEPARATOR = re.compile(r'\s+[|–—-]\s+|:\s+')
+
+# Sentences outside this word range make poor one-line descriptions
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 40
+DESCRIPTION_MAX_WORDS = 25
+TITLE_MAX_WORDS = 8
+# TextRank cost is quadratic in sentences; later ones rarely describe the page anyway
+MAX_SENTENCES = 150
+DAMPING = 0.85
+
+
+class Summary(NamedTuple):
+    title: str
+    description: str
+    # 0..1, how much the summary can be trusted without an LLM second opinion
+    confidence: float
+
+
+def _plain(text: str) -> str:
+    """Markdown inline text reduced to plain words"""
+    text = IMAGE.sub('', text)
+    text = LINK.sub(r'\1', text)
+    text = BARE_URL.sub('', text)
+    text = HTML_TAG.sub('', text)
+    return ' '.join(EMPHASIS.sub('', text).split())
+
+
+def parse_markdown(content: str) -> Tuple[List[Tuple[int, str]], List[str]]:
+    """Headings as (level, text) and prose sentences of a markdown page, in page order"""
+    headings: List[Tuple[int, str]] = []
+    sentences: List[str] = []
+    paragraph: List[str] = []
+    
+    def flush():
+        if paragraph:
+            sentences.extend(SENTENCE_SPLIT.split(' '.join(paragraph)))
+            paragraph.clear()
+    
+    for line in CODE_FENCE.sub('\n', content).split('\n'):
+        heading = HEADING.match(line)
+        if heading:
+            flush()
+            text = _plain(heading.group(2))
+            if text:
+                headings.append((len(heading.group(1)), text))
+            continue
+        if not line.strip() or line.count('|') >= 2 or LIST_MARKER.match(line):
+            # Tables and list items are rarely self-contained sentences
+            flush()
+            continue
+        text = _plain(line)
+        if text:
+            paragraph.append(text)
+    flush()
+    return headings, [sentence.strip() for sentence in sentences if sentence.strip()]
+
+
+def textrank(sentences: List[str]) -> 'np.ndarray':
+    """TextRank centrality of each sentence over TF-IDF cosine similarity"""
+    import numpy as np
+    terms = [[term for term in TERM.findall(sentence.lower()) if term not in STOPWORDS] for sentence in sentences]
+    vocabulary = {}
+    rows, cols = [], []
+    for row, sentence_terms in enumerate(terms):
+        for term in sentence_terms:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    count = len(sentences)
+    if not vocabulary:
+        return np.full(count, 1.0 / count)
+    
+    tf = np.zeros((count, len(vocabulary)))
+    np.add.at(tf, (rows, cols), 1.0)
+    tf = np.log1p(tf)
+    idf = np.log((1 + count) / (1 + np.count_nonzero(tf, axis=0))) + 1.0
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1.0, norms)
+    
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no terms with any other link to every sentence equally
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight == 0, 1.0, out_weight), 1.0 / count)
+    
+    scores = np.full(count, 1.0 / count)
+    for _ in range(50):
+        updated = (1 - DAMPING) / count + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def _clip_words(text: str, limit: int) -> str:
+    words = text.split()
+    if len(words) <= limit:
+        return text
+    return ' '.join(words[:limit]).rstrip(',;:') + '…'
+
+
+def title_from_url(url: str) -> str:
+    """'https://site/blog/ai-agents-101' -> 'Ai Agents 101'; the site name for the home page"""
+    parsed = urlparse(url)
+    slug = parsed.path.rstrip('/').rsplit('/', 1)[-1]
+    slug = re.sub(r'\.\w+$', '', slug)
+    words = re.split(r'[-_+]+', slug)
+    if not any(words):
+        return parsed.netloc.removeprefix('www.').capitalize() or 'Page'
+    return ' '.join(word.capitalize() for word in words if word)
+
+
+class LocalSummarizer:
+    """Title and one-sentence description of a page without any API call
+    
+    The title is the page's first top-level heading (its first part, before
+    any " | Site name" suffix), falling back to the URL slug. The
+    description is the most central prose sentence by TextRank over TF-IDF
+    vectors, nudged towards the top of the page where pages usually say
+    what they are about. Confidence is low when the page has little prose
+    or no heading, so hybrid runs send just those pages to the LLM.
+    """
+    
+    def __init__(self, position_weight: float = 1.0):
+        self.position_weight = position_weight
+    
+    def pick_title(self, url: str, headings: List[Tuple[int, str]]) -> Tuple[str, bool]:
+        """Title for the page and whether it came from the page itself"""
+        if headings:
+            top = min(level for level, _ in headings)
+            text = next(text for level, text in headings if level == top)
+            text = TITLE_SEPARATOR.split(text)[0].strip() or text
+            return _clip_words(text, TITLE_MAX_WORDS), True
+        return title_from_url(url), False
+    
+    def summarize(self, url: str, content: str) -> Summary:
+        import numpy as np
+        headings, sentences = parse_markdown(content or '')
+        title, titled = self.pick_title(url, headings)
+        
+        candidates = [
+            sentence for sentence in sentences[:MAX_SENTENCES]
+            if MIN_SENTENCE_WORDS <= len(sentence.split()) <= MAX_SENTENCE_WORDS
+        ]
+        if not candidates:
+            fallback: Optional[str] = sentences[0] if sentences else None
+            description = _clip_words(fallback, DESCRIPTION_MAX_WORDS) if fallback else "Content summary"
+            return Summary(title, description, 0.0)
+        
+        scores = textrank(candidates)
+        # Centrality times a prior that decays with position on the page
+        weighted = scores * (1 + self.position_weight / (1 + np.arange(len(candidates))))
+        best = int(np.argmax(weighted))
+        description = _clip_words(candidates[best], DESCRIPTION_MAX_WORDS)
+        
+        # Enough prose to rank, a sentence that stands out, and a real title
+        volume = min(1.0, len(candidates) / 6)
+        standout = min(1.0, max(0.0, float(scores[best]) * len(candidates) - 0.8))
+        confidence = 0.4 * volume + 0.3 * standout + (0.3 if titled else 0.0)
+        return Summary(title, description, round(confidence, 3))
@@ -0,0 +1,199 @@
+"""
+Local token estimates and token-budgeted prompt packing
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# Prompt budget for the page excerpt sent with each summary request, per model
+PROMPT_TOKEN_BUDGETS: Dict[str, int] = {
+    'gpt-4o-mini': 750,
+    'gpt-4o': 750,
+    'gpt-3.5-turbo': 750,
+}
+DEFAULT_PROMPT_TOKENS = 750
+
+TOKEN_PATTERN = re.compile(r'\d+|[^\W\d_]+|[^\w\s]+|_+')
+HEADING = re.compile(r'#{1,6}\s')
+LINK = re.compile(r'!?\[[^\]]*\]\([^)]*\)')
+# Places text may be cut: after a sentence or between blocks
+BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n[ \t]*\n')
+# Fallback cut points when no boundary fits
+LINE_BREAK = re.compile(r'\n')
+SPACE = re.compile(r'\s+')
+FENCE = re.compile(r'^[ \t]*```', re.MULTILINE)
+# Characters per token when even a single token is over budget
+CHARS_PER_TOKEN = 4
+
+# Smallest leftover budget worth filling with a partial paragraph
+MIN_PARTIAL_TOKENS = 24
+
+
+def prompt_budget(model: str) -> int:
+    return PROMPT_TOKEN_BUDGETS.get(model, DEFAULT_PROMPT_TOKENS)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count without a tokenizer
+    
+    Short words are one token and long ones one more per ~8 characters,
+    numbers split every 3 digits and punctuation runs every 2 characters,
+    which tracks OpenAI's encodings closely enough for budgeting.
+    """
+    total = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        first = piece[0]
+        if first.isdigit():
+            total += (len(piece) + 2) // 3
+        elif first.isalpha():
+            total += 1 + len(piece) // 8
+        else:
+            total += (len(piece) + 1) // 2
+    return total
+
+
+def _prefix_end(text: str, budget: int, pattern: re.Pattern) -> Tuple[int, int]:
+    """End of the longest prefix within `budget` tokens that stops where `pattern` matches, and its tokens"""
+    cut = start = used = kept = 0
+    for match in pattern.finditer(text):
+        used += estimate_tokens(text[start:match.start()])
+        if used > budget:
+            break
+        cut = start = match.start()
+        kept = used
+    return cut, kept
+
+
+def _hard_cut(text: str, budget: int) -> int:
+    """Where to cut text that has no sentence or block boundary within `budget` tokens
+    
+    Prefers a line break, unless a space keeps much more, then the last
+    whole token, then a character estimate for one enormous token.
+    """
+    cut, used = _prefix_end(text, budget, LINE_BREAK)
+    if used < budget // 2:
+        cut = max(cut, _prefix_end(text, budget, SPACE)[0])
+    if cut:
+        return cut
+    used = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        used += estimate_tokens(match.group())
+        if used > budget:
+            break
+        cut = match.end()
+    return cut or max(1, budget * CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Longest prefix of `text` within `budget` tokens that ends on a sentence or block boundary
+    
+    A trailing heading left without its text is dropped as well. Text with
+    no boundary that fits (tables, code, unpunctuated prose) is cut at a
+    line break or space instead, and a code fence left open is closed, so
+    non-empty text never comes back empty.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    kept = text[:_prefix_end(text, budget, BOUNDARY)[0]].rstrip()
+    last_block = kept.rsplit('\n\n', 1)[-1]
+    if HEADING.match(last_block) and '\n' not in last_block:
+        kept = kept[:len(kept) - len(last_block)].rstrip()
+    if not kept:
+        text = text.strip()
+        kept = text[:_hard_cut(text, budget)].rstrip()
+        if len(FENCE.findall(kept)) % 2:
+            kept += '\n```'
+    return kept
+
+
+def _sections(content: str) -> List[Tuple[str, List[str]]]:
+    """Group markdown blocks into (heading, paragraphs) sections; text before the first heading has heading ''"""
+    sections: List[Tuple[str, List[str]]] = [('', [])]
+    for block in re.split(r'\n[ \t]*\n', content.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        lines = block.split('\n')
+        if HEADING.match(lines[0]):
+            sections.append((lines[0].strip(), []))
+            rest = '\n'.join(lines[1:]).strip()
+            if rest:
+                sections[-1][1].append(rest)
+        else:
+            sections[-1][1].append(block)
+    return [section for section in sections if section[0] or section[1]]
+
+
+def _is_link_heavy(block: str) -> bool:
+    return len(''.join(LINK.findall(block))) > len(block) / 2
+
+
+def pack_sections(content: str, budget: int) -> str:
+    """Pick the most informative parts of a markdown page that fit in `budget` tokens
+    
+    Fills the budget in priority order: the page title and lead paragraph
+    (up to half the budget), then every heading with its first paragraph
+    (sharing what is left evenly), then remaining paragraphs, then
+    link-heavy blocks. Headings are only taken together with some of
+    their text, a paragraph that does not fit whole is cut at a sentence
+    boundary (or, failing that, a line break or space), and the result
+    keeps the page's original order.
+    """
+    if estimate_tokens(content) <= budget:
+        return content.strip()
+    
+    # (priority, position, paragraph, position of its section heading or -1)
+    units: List[Tuple[int, int, str, int]] = []
+    headings: Dict[int, str] = {}
+    position = 0
+    for index, (heading, paragraphs) in enumerate(_sections(content)):
+        lead_section = index == 0 or (index == 1 and heading.startswith('# '))
+        heading_position = -1
+        if heading:
+            heading_position = position
+            headings[position] = heading
+            position += 1
+        for number, paragraph in enumerate(paragraphs):
+            if _is_link_heavy(paragraph):
+                priority = 3
+            elif number == 0:
+                priority = 0 if lead_section else 1
+            else:
+                priority = 2
+            units.append((priority, position, paragraph, heading_position))
+            position += 1
+    units.sort(key=lambda unit: (unit[0], unit[1]))
+    
+    # Section openers share what is left evenly, so one long section cannot crowd out the rest
+    openers_left = sum(1 for unit in units if unit[0] == 1)
+    chosen: Dict[int, str] = {}
+    used = 0
+    for priority, pos, text, heading_position in units:
+        if budget - used < MIN_PARTIAL_TOKENS:
+            break
+        extra = 0
+        if heading_position >= 0 and heading_position not in chosen:
+            extra = estimate_tokens(headings[heading_position])
+        limit = budget - used - extra
+        if priority == 0:
+            limit = min(limit, budget // 2)
+        elif priority == 1:
+            limit = min(limit, max(MIN_PARTIAL_TOKENS, (budget - used) // openers_left - extra))
+            openers_left -= 1
+        cost = estimate_tokens(text)
+        if cost > limit:
+            if limit < MIN_PARTIAL_TOKENS:
+                continue
+            text = truncate_to_tokens(text, limit)
+            if not text:
+                continue
+            cost = estimate_tokens(text)
+        if extra:
+            chosen[heading_position] = headings[heading_position]
+        chosen[pos] = text
+        used += extra + cost
+    
+    if not chosen:
+        # Nothing but headings, or a first block too long to cut cleanly
+        return truncate_to_tokens(content.strip(), budget)
+    return '\n\n'.join(chosen[pos] for pos in sorted(chosen))
@@ -0,0 +1,277 @@
+"""
+Streaming, order-preserving output writer
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only the gzip variant is written
+    brotli = None
+
+# Precompressed variants a static host can serve directly, by Content-Encoding
+ENCODINGS = {'gzip': '.gz', 'br': '.br'}
+DEFAULT_ENCODINGS = ('gzip', 'br')
+COPY_CHUNK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def temp_path_for(path: str) -> str:
+    """Empty temp file next to `path`, for an atomic rename onto it"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    os.close(fd)
+    return tmp_path
+
+
+def compress_file(source_path: str, target_path: str, encoding: str) -> str:
+    """Compress `source_path` in chunks into a temp file next to `target_path` and return its path"""
+    tmp_path = temp_path_for(target_path)
+    with open(source_path, 'rb') as source, open(tmp_path, 'wb') as out:
+        if encoding == 'gzip':
+            # mtime=0 keeps the bytes (and so CDN ETags) stable across identical runs
+            with gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=out, mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed, COPY_CHUNK)
+        else:
+            compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=11)
+            for chunk in iter(lambda: source.read(COPY_CHUNK), b''):
+                out.write(compressor.process(chunk))
+            out.write(compressor.finish())
+        out.flush()
+        os.fsync(out.fileno())
+    return tmp_path
+
+
+def usable_encodings(encodings: Sequence[str]) -> List[str]:
+    """Validate precompression encodings, dropping 'br' when brotli is not installed"""
+    unknown = set(encodings) - set(ENCODINGS)
+    if unknown:
+        raise ValueError(f"Unknown encodings {sorted(unknown)}, expected some of {', '.join(ENCODINGS)}")
+    encodings = list(encodings)
+    if 'br' in encodings and brotli is None:
+        print("brotli is not installed; skipping the .br variant")
+        encodings.remove('br')
+    return encodings
+
+
+class StreamingWriter:
+    """Write numbered sections to a temp file in index order, then publish atomically
+    
+    Sections may arrive out of order; they are held in a reorder buffer until
+    every lower index has been written or skipped. Async producers call
+    `reserve(index)` before starting work on an index, which keeps at most
+    `window` sections buffered no matter how large the site is.
+    
+    With `index_path`, the byte offset and length of every section in the
+    published file are written there as compact JSON along with its page
+    number (index + 1) and URL, so a single page can be served with a range
+    read. `encodings` ('gzip', 'br') adds precompressed copies next to the
+    file, published together with it.
+    
+    A commit whose bytes match the published file leaves it and its
+    companions untouched (`changed` is then False), so an unchanged site
+    costs no rewrite, recompression or new mtime.
+    """
+    
+    def __init__(self, path: str, header: str = '', separator: str = '\n', window: int = 64,
+                 index_path: Optional[str] = None, encodings: Sequence[str] = ()):
+        self.path = path
+        self.separator = separator
+        self.window = max(1, window)
+        self.index_path = index_path
+        self.encodings = usable_encodings(encodings)
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+        self.file.write(header)
+        
+        self.next_index = 0
+        self.sections = 0
+        self.offset = len(header.encode('utf-8'))
+        # (page number, URL, byte offset, byte length) of each written section
+        self.entries: List[Tuple[int, Optional[str], int, int]] = []
+        self.pending: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        self.committed = False
+        self.changed = True
+        self.digest: Optional[str] = None
+        self._advanced: Optional[asyncio.Future] = None
+    
+    def write(self, index: int, text: Optional[str], url: Optional[str] = None):
+        """Hand over the section for `index` (None skips it) and flush whatever is now in order
+        
+        `url` identifies the section's page in the index.
+        """
+        if index < self.next_index or index in self.pending:
+            raise ValueError(f"Section {index} was already written")
+        
+        self.pending[index] = (text, url)
+        while self.next_index in self.pending:
+            self._emit(self.next_index, *self.pending.pop(self.next_index))
+            self.next_index += 1
+        
+        if self._advanced and not self._advanced.done():
+            self._advanced.set_result(None)
+    
+    def skip(self, index: int):
+        self.write(index, None)
+    
+    def _emit(self, index: int, text: Optional[str], url: Optional[str]):
+        if text is None:
+            return
+        if self.sections:
+            self.file.write(self.separator)
+            self.offset += len(self.separator.encode('utf-8'))
+        self.file.write(text)
+        length = len(text.encode('utf-8'))
+        self.entries.append((index + 1, url, self.offset, length))
+        self.offset += length
+        self.sections += 1
+    
+    async def reserve(self, index: int):
+        """Wait until `index` falls inside the reorder window"""
+        while index >= self.next_index + self.window:
+            if self._advanced is None or self._advanced.done():
+                self._advanced = asyncio.get_running_loop().create_future()
+            await self._advanced
+    
+    def commit(self, header: Optional[str] = None, order: Optional[Callable[[Optional[str]], Any]] = None):
+        """Flush, optionally prepend a header known only at the end, and rename into place
+        
+        With `order`, sections are published sorted by `order(url)` rather
+        than by index, for callers whose indexes follow timing (such as
+        crawl order) but whose output should not. They are copied from the
+        temp file in that order, so nothing is held in memory, and their
+        page numbers follow the new order.
+        The index and compressed variants are built from the finished temp
+        file first and renamed into place just before it, so a reader never
+        pairs a new file with an old index for long. Compressed variants of
+        encodings not in `encodings` are deleted. Afterwards `entries` holds
+        the sections' offsets in the published file.
+        """
+        for index in sorted(self.pending):
+            self._emit(index, *self.pending.pop(index))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        
+        if order is not None:
+            self._reorder(order)
+        if header:
+            body_path = self.tmp_path
+            self.tmp_path = temp_path_for(self.path)
+            with open(self.tmp_path, 'w', encoding='utf-8') as out, open(body_path, 'r', encoding='utf-8') as body:
+                out.write(header)
+                shutil.copyfileobj(body, out)
+                out.flush()
+                os.fsync(out.fileno())
+            os.remove(body_path)
+            shift = len(header.encode('utf-8'))
+            self.entries = [(page, url, offset + shift, length) for page, url, offset, length in self.entries]
+        
+        self.digest = file_digest(self.tmp_path)
+        # Variants no longer produced (precompression turned off, brotli missing) would be stale
+        for encoding, suffix in ENCODINGS.items():
+            if encoding not in self.encodings and os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        companion_paths = [self.path + ENCODINGS[encoding] for encoding in self.encodings]
+        if self.index_path:
+            companion_paths.append(self.index_path)
+        if (os.path.exists(self.path) and all(os.path.exists(path) for path in companion_paths)
+                and file_digest(self.path) == self.digest):
+            # Same bytes as what is published: keep those files, mtimes and all
+            os.remove(self.tmp_path)
+            self.changed = False
+            self.committed = True
+            return
+        
+        companions = []
+        try:
+            for encoding in self.encodings:
+                companions.append((compress_file(self.tmp_path, self.path + ENCODINGS[encoding], encoding),
+                                   self.path + ENCODINGS[encoding]))
+            if self.index_path:
+                companions.append((self._write_index(), self.index_path))
+        except BaseException:
+            for tmp_path, _ in companions:
+                os.remove(tmp_path)
+            raise
+        for tmp_path, final_path in companions:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, final_path)
+        
+        os.chmod(self.tmp_path, 0o644)
+        os.replace(self.tmp_path, self.path)
+        self.committed = True
+    
+    def _reorder(self, order: Callable[[Optional[str]], Any]):
+        """Rewrite the temp file with its sections sorted by `order(url)`"""
+        if not self.entries:
+            return
+        ordered = sorted(self.entries, key=lambda entry: order(entry[1]))
+        separator = self.separator.encode('utf-8')
+        body_path = self.tmp_path
+        self.tmp_path = temp_path_for(self.path)
+        entries = []
+        with open(self.tmp_path, 'wb') as out, open(body_path, 'rb') as body:
+            # Bytes before the first section: the header passed to the constructor
+            out.write(body.read(self.entries[0][2]))
+            for page, (_, url, offset, length) in enumerate(ordered, 1):
+                if page > 1:
+                    out.write(separator)
+                body.seek(offset)
+                entries.append((page, url, out.tell(), length))
+                out.write(body.read(length))
+            out.flush()
+            os.fsync(out.fileno())
+        os.remove(body_path)
+        self.entries = entries
+    
+    def _write_index(self) -> str:
+        """Write the section index for the finished temp file and return the index temp file's path"""
+        tmp_path = temp_path_for(self.index_path)
+        index = {
+            'file': os.path.basename(self.path),
+            'size': os.path.getsize(self.tmp_path),
+            'encodings': {encoding: os.path.basename(self.path) + ENCODINGS[encoding] for encoding in self.encodings},
+            'fields': ['page', 'offset', 'length', 'url'],
+            'pages': [[page, offset, length, url] for page, url, offset, length in self.entries]
+        }
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_path
+    
+    def abort(self):
+        """Discard the temp file; a no-op once committed"""
+        if self.committed:
+            return
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if not self.committed:
+            self.abort()
+        return False
@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The mock Firecrawl/OpenAI API used by the benchmarks
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from mock_api import EndpointProfile, MockConfig, MockServer
+from generate_sidetool_llmstxt import (BATCH_PROMPT_TEMPLATE, SUMMARY_MODEL, SUMMARY_PROMPT_TEMPLATE,
+                                       SUMMARY_SYSTEM_PROMPT, SidetoolLLMSTxtGenerator, parse_batch_summaries)
+from llmstxt.cache import SummaryCache
+from llmstxt.metrics import RunMetrics
+from llmstxt.ratelimit import TokenBudget
+
+URLS = ['https://example.com/a', 'https://example.com/b/']
+
+
+def test_parse_keeps_valid_entries_for_requested_urls():
+    text = json.dumps({'pages': [
+        {'url': 'https://example.com/a/', 'title': ' Title A ', 'description': 'About A'},
+        {'url': 'https://example.com/b', 'title': 'Title B', 'description': 'About B'},
+        {'url': 'https://example.com/a', 'title': 'Again', 'description': 'Repeated'},
+        {'url': 'https://example.com/unknown', 'title': 'X', 'description': 'Not asked for'},
+    ]})
+    assert parse_batch_summaries(text, URLS) == {
+        'https://example.com/a': ('Title A', 'About A'),
+        'https://example.com/b/': ('Title B', 'About B'),
+    }
+
+
+def test_parse_drops_incomplete_entries_and_bad_json():
+    text = json.dumps([
+        {'url': URLS[0], 'title': '', 'description': 'No title'},
+        {'url': URLS[1], 'title': 'Title B', 'description': 3},
+        'not an object',
+    ])
+    assert parse_batch_summaries(text, URLS) == {}
+    assert parse_batch_summaries('{"pages": "nope"}', URLS) == {}
+    assert parse_batch_summaries('not json', URLS) == {}
+
+
+def test_parse_accepts_a_fenced_response():
+    text = '```json\n' + json.dumps({'pages': [{'url': URLS[0], 'title': 'A', 'description': 'About A'}]}) + '\n```'
+    assert parse_batch_summaries(text, URLS) == {URLS[0]: ('A', 'About A')}
+
+
+@pytest.fixture
+def api():
+    server = MockServer(MockConfig(chat=EndpointProfile(median_ms=1, sigma=0.01))).start()
+    yield server
+    server.stop()
+
+
+def test_batched_summaries_are_cached_under_the_batch_prompt(api, tmp_path):
+    cache = SummaryCache(str(tmp_path / 'cache.sqlite3'))
+    gen = SidetoolLLMSTxtGenerator('key', 'key', openai_api_url=api.url, summary_cache=cache,
+                                   summary_batch=2, openai_rate=500)
+    gen.metrics = RunMetrics()
+    gen.token_budget = TokenBudget(gen.tokens_per_minute)
+    pages = [(url, f"Page {url} " + "text " * 50) for url in URLS]
+    
+    async def summarize():
+        try:
+            return await gen.generate_summaries(pages)
+        finally:
+            await gen.close()
+    
+    summaries = asyncio.run(summarize())
+    assert api.requests['chat'] == 1
+    for (url, content), summary in zip(pages, summaries):
+        keys = [SummaryCache.make_key(url, content, SUMMARY_SYSTEM_PROMPT + template, SUMMARY_MODEL)
+                for template in (SUMMARY_PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE)]
+        assert cache.get(keys[0]) is None
+        assert json.loads(cache.get(keys[1])) == list(summary)
+    
+    # A later run finds them whether or not it batches
+    gen = SidetoolLLMSTxtGenerator('key', 'key', openai_api_url=api.url, summary_cache=cache, openai_rate=500)
+    gen.metrics = RunMetrics()
+    gen.token_budget = TokenBudget(gen.tokens_per_minute)
+    assert [asyncio.run(gen.generate_summary(url, content)) for url, content in pages] == summaries
+    assert api.requests['chat'] == 1
+    cache.close()
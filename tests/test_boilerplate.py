@@ -0,0 +1,56 @@
+import itertools
+
+from llmstxt.boilerplate import BoilerplateModel, analyze_page, block_key, clean_page, split_blocks, strip_boilerplate
+from llmstxt.dedup import fingerprint
+
+NAV = "[Home](/) | [Blog](/blog) | [Pricing](/pricing)"
+FOOTER = "© Example. All rights reserved."
+
+
+def page(body: str) -> str:
+    return f"{NAV}\n\n{body}\n \n{FOOTER}\n"
+
+
+def test_blocks_split_on_blank_lines_and_keys_ignore_case_and_spacing():
+    assert split_blocks(page("# Title\nText")) == [NAV, "# Title\nText", FOOTER]
+    assert block_key("Hello   World\n") == block_key("hello world")
+    assert block_key("hello world") != block_key("hello world!")
+
+
+def test_a_block_needs_enough_pages_and_a_large_enough_share():
+    model = BoilerplateModel(min_pages=3, min_share=0.5)
+    for i in range(3):
+        model.observe(analyze_page(page(f"body {i}"))[1])
+    assert model.boilerplate() == {block_key(NAV), block_key(FOOTER)}
+    
+    # A block on three pages stops counting once it is on less than half of them
+    for i in range(4):
+        model.observe(analyze_page(f"only body {i}")[1])
+    assert model.boilerplate() == frozenset()
+
+
+def test_the_learned_set_does_not_depend_on_observation_order():
+    pages = [page(f"body {i}") for i in range(4)] + ["unrelated", f"{NAV}\n\nshared"]
+    learned = set()
+    for order in itertools.permutations(pages):
+        model = BoilerplateModel()
+        for content in order:
+            model.observe(analyze_page(content)[1])
+        learned.add(model.boilerplate())
+    assert learned == {frozenset({block_key(NAV), block_key(FOOTER)})}
+
+
+def test_strip_keeps_a_page_that_is_all_boilerplate():
+    boilerplate = frozenset({block_key(NAV), block_key(FOOTER)})
+    assert strip_boilerplate(page("# Title"), boilerplate) == "# Title"
+    assert strip_boilerplate(f"{NAV}\n\n{FOOTER}", boilerplate) == f"{NAV}\n\n{FOOTER}"
+    assert strip_boilerplate(page("# Title"), frozenset()) == page("# Title")
+
+
+def test_clean_page_fingerprints_the_stripped_text():
+    body = ' '.join(f"word{i}" for i in range(60))
+    boilerplate = frozenset({block_key(NAV), block_key(FOOTER)})
+    cleaned, page_fingerprint = clean_page(page(body), boilerplate)
+    assert cleaned == body
+    assert page_fingerprint == fingerprint(body)
+    assert clean_page(page(body), boilerplate, False) == (body, None)
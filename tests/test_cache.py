@@ -0,0 +1,64 @@
+import pytest
+
+from llmstxt import cache as cache_module
+from llmstxt.cache import SummaryCache
+
+URL = 'https://example.com/a'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'time', clock)
+    return clock
+
+
+def test_keys_ignore_whitespace_but_not_what_is_sent():
+    key = SummaryCache.make_key(URL, "Some  page\n\ntext ", 'prompt', 'model')
+    assert key == SummaryCache.make_key(URL, "Some page text", 'prompt', 'model')
+    assert key != SummaryCache.make_key(URL, "Some page text!", 'prompt', 'model')
+    assert key != SummaryCache.make_key(URL, "Some page text", 'other prompt', 'model')
+    assert key != SummaryCache.make_key(URL, "Some page text", 'prompt', 'other model')
+    assert key != SummaryCache.make_key('https://example.com/b', "Some page text", 'prompt', 'model')
+
+
+def test_values_persist_and_expire(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = SummaryCache(path, max_age_days=1)
+    assert cache.get('key') is None
+    cache.set('key', 'summary')
+    cache.close()
+    
+    cache = SummaryCache(path, max_age_days=1)
+    assert cache.get('key') == 'summary'
+    clock.now += 86400 + 1
+    assert cache.get('key') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    assert cache.evict() == 1
+    assert cache.stats()['entries'] == 0
+    cache.close()
+
+
+def test_evict_drops_the_least_recently_used_first(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path / 'cache.sqlite3'), max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, 'x' * 10)
+        clock.now += 1
+    cache.get('a')
+    
+    assert cache.evict() == 1
+    assert cache.get('b') is None
+    assert cache.get('a') == cache.get('c') == 'x' * 10
+    
+    cache.max_bytes = 15
+    assert cache.evict() == 1
+    assert cache.stats()['entries'] == 1
+    cache.close()
@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+import mock_api
+from mock_api import SITE_URL, EndpointProfile, MockConfig, MockServer, render_page
+from generate_sidetool_llmstxt import SidetoolLLMSTxtGenerator
+from llmstxt.dedup import SimHashIndex, canonicalize_url, dedupe_urls, fingerprint
+from llmstxt.metrics import RunMetrics
+from llmstxt.state import PageStateStore
+
+CONFIG = MockConfig(page_kb=2)
+
+
+def tag_page(url: str) -> str:
+    """A tag page: the first post's body under a heading of its own"""
+    return f"# Tag {url}\n\n" + render_page(f'{SITE_URL}/blog/post-0', CONFIG)['markdown']
+
+
+def test_canonicalize_url_folds_trivial_differences():
+    assert canonicalize_url('HTTPS://Example.com:443/Blog//Post/?utm_source=x&b=2&a=1#top') == \
+        'https://example.com/Blog/Post?a=1&b=2'
+    assert canonicalize_url('http://example.com:8080/docs/index.html?fbclid=1') == 'http://example.com:8080/docs'
+    assert canonicalize_url('https://example.com') == 'https://example.com/'
+
+
+def test_dedupe_urls_keeps_the_first_spelling_in_order():
+    urls = ['https://example.com/b/', 'https://example.com/a', 'https://example.com/b?ref=x']
+    assert dedupe_urls(urls) == ['https://example.com/b', 'https://example.com/a']
+
+
+def test_short_pages_are_not_fingerprinted():
+    assert fingerprint('too few words to compare') is None
+    assert fingerprint(tag_page('x')) is not None
+
+
+def test_index_matches_near_pages_only():
+    index = SimHashIndex()
+    post = render_page(f'{SITE_URL}/blog/post-0', CONFIG)['markdown']
+    assert index.match_or_add('post-0', fingerprint(post)) is None
+    assert index.match_or_add('tag', fingerprint(tag_page('tag'))) == 'post-0'
+    other = render_page(f'{SITE_URL}/blog/post-1', CONFIG)['markdown']
+    assert index.match_or_add('post-1', fingerprint(other)) is None
+    assert index.match_or_add('short', None) is None
+    assert index.size == 2
+
+
+def test_index_returns_the_earliest_match():
+    index = SimHashIndex(max_distance=2)
+    index.add('first', 0b0011)
+    index.add('second', 0b0001)
+    assert index.find(0b0001) == 'first'
+    assert index.find(0b0111) == 'first'
+    assert index.find(0b1111 << 40) is None
+
+
+def run_pipeline(urls, delays):
+    """Scrape `urls` with fixed per-page delays and return each page's (duplicate_of, content)"""
+    gen = SidetoolLLMSTxtGenerator('key', None, concurrency=len(urls), summarizer='local', cleanup_workers=0)
+    gen.metrics = RunMetrics()
+    
+    async def fetch_page(session, url):
+        await asyncio.sleep(delays[url])
+        content = tag_page(url) if '/tag/' in url else render_page(url, CONFIG)['markdown']
+        return {'url': url, 'content': content, 'success': True, 'content_hash': ''}
+    
+    gen.fetch_page = fetch_page
+    results = {}
+    
+    def on_result(idx, data):
+        results[data['url']] = (data.get('duplicate_of'), data['content'])
+    
+    asyncio.run(gen.process_all_urls(urls, on_result))
+    return results
+
+
+def test_cleanup_does_not_depend_on_completion_order():
+    urls = []
+    for i in range(12):
+        urls.append(f'{SITE_URL}/blog/post-{i}')
+        if i % 3 == 2:
+            urls.append(f'{SITE_URL}/tag/t{i}')
+    in_order = run_pipeline(urls, {url: 0.005 * i for i, url in enumerate(urls)})
+    reversed_order = run_pipeline(urls, {url: 0.005 * (len(urls) - i) for i, url in enumerate(urls)})
+    
+    assert in_order == reversed_order
+    # The highest-ranked page of a near-duplicate group is the original, whichever finished first
+    assert {url: original for url, (original, _) in in_order.items() if original} == {
+        url: f'{SITE_URL}/blog/post-0' for url in urls if '/tag/' in url
+    }
+    assert mock_api.BOILERPLATE_FOOTER not in in_order[f'{SITE_URL}/blog/post-5'][1]
+
+
+@pytest.fixture
+def api(monkeypatch):
+    def render(url, config):
+        if '/page-' in url:
+            return {'markdown': tag_page(url), 'metadata': {'title': 'Tag', 'sourceURL': url}}
+        return render_page(url, config)
+    
+    monkeypatch.setattr(mock_api, 'render_page', render)
+    server = MockServer(MockConfig(
+        map=EndpointProfile(median_ms=1, sigma=0.01),
+        scrape=EndpointProfile(median_ms=1, sigma=0.01),
+        chat=EndpointProfile(median_ms=1, sigma=0.01),
+        page_kb=2
+    )).start()
+    yield server
+    server.stop()
+
+
+def test_new_near_duplicate_of_a_stored_page_is_caught(api, tmp_path):
+    store = PageStateStore(str(tmp_path / 'state.sqlite3'))
+    
+    async def only_new_pages(urls):
+        return [url for url in urls if not store.get(url)], {}
+    
+    for max_urls in (6, 10):
+        # The map lists /page-N for every third N, so the second run adds /page-6 and /page-9
+        gen = SidetoolLLMSTxtGenerator('key', None, max_urls=max_urls, firecrawl_api_url=api.url,
+                                       openai_api_url=api.url, base_url=SITE_URL, state_store=store,
+                                       summarizer='local', cleanup_workers=0, firecrawl_rate=500, openai_rate=500)
+        gen.find_changed_urls = only_new_pages
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(gen.generate(output_dir=str(tmp_path / 'out')))
+    
+    assert store.get(f'{SITE_URL}/blog/post-1')['duplicate_of'] is None
+    for n in (3, 6, 9):
+        assert store.get(f'{SITE_URL}/page-{n}')['duplicate_of'] == f'{SITE_URL}/page-0'
+    assert f'{SITE_URL}/page-9' in (tmp_path / 'out' / 'llms.txt').read_text()
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from llmstxt.deadline import Deadline
+from llmstxt.discovery import Frontier
+
+SITE = 'https://example.com'
+
+
+def test_pop_stops_waiting_at_the_deadline():
+    release = threading.Event()
+    frontier = Frontier(SITE, deadline=Deadline(0.5, reserve=0))
+    frontier.produce(release.wait, 10)  # a map call that outlives the deadline
+    started = time.monotonic()
+    assert list(frontier) == []
+    assert time.monotonic() - started < 2
+    assert frontier.closed
+    release.set()
+
+
+def test_pop_drains_queued_urls_before_the_deadline_stops_it():
+    release = threading.Event()
+    frontier = Frontier(SITE, deadline=Deadline(0.5, reserve=0))
+    frontier.add_all([(f'{SITE}/a', ''), (f'{SITE}/b/c', '')])
+    frontier.produce(release.wait, 10)
+    assert list(frontier) == [f'{SITE}/a', f'{SITE}/b/c']
+    release.set()
+
+
+def test_limit_caps_the_queue_and_closes_the_frontier():
+    frontier = Frontier(SITE, limit=3)
+    for i in range(100):
+        frontier.add(f'{SITE}/{"deep/" * (i % 5)}page-{i}')
+    assert len(frontier.heap) <= 6
+    taken = list(frontier)
+    assert len(taken) == 3
+    # The shallowest pages win even though the queue was trimmed along the way
+    assert all(url.count('/') == 3 for url in taken)
+    assert frontier.closed
+    assert not frontier.add(f'{SITE}/late')
+
+
+def test_producer_stops_once_the_limit_is_taken():
+    added = []
+    
+    def produce(frontier):
+        for i in range(10000):
+            if frontier.closed:
+                return
+            added.append(frontier.add(f'{SITE}/page-{i}'))
+            time.sleep(0.001)
+    
+    frontier = Frontier(SITE, limit=2)
+    thread = frontier.produce(produce, frontier)
+    assert len(list(frontier)) == 2
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert len(added) < 10000
+
+
+def test_publish_key_ignores_crawl_order_and_clock():
+    urls = [f'{SITE}/blog/b', f'{SITE}/docs/x/y', f'{SITE}/about', f'{SITE}/docs/a']
+    early = Frontier(SITE, ['/docs', '/blog'], now=0)
+    late = Frontier(SITE, ['/docs', '/blog'], now=10 ** 9)
+    assert sorted(urls, key=early.publish_key) == sorted(reversed(urls), key=late.publish_key) == [
+        f'{SITE}/docs/a', f'{SITE}/docs/x/y', f'{SITE}/blog/b', f'{SITE}/about']
@@ -0,0 +1,50 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+from mock_api import BOILERPLATE_FOOTER, BOILERPLATE_HEADER, SITE_URL, EndpointProfile, MockConfig, MockServer
+from generate_sidetool_llmstxt import SidetoolLLMSTxtGenerator
+from llmstxt.state import PageStateStore
+
+
+@pytest.fixture
+def api():
+    server = MockServer(MockConfig(
+        map=EndpointProfile(median_ms=1, sigma=0.01),
+        scrape=EndpointProfile(median_ms=1, sigma=0.01),
+        chat=EndpointProfile(median_ms=1, sigma=0.01),
+        page_kb=2
+    )).start()
+    yield server
+    server.stop()
+
+
+def run(api, output_dir, store):
+    gen = SidetoolLLMSTxtGenerator('key', None, max_urls=30, firecrawl_api_url=api.url, openai_api_url=api.url,
+                                   base_url=SITE_URL, state_store=store, summarizer='local', cleanup_workers=0,
+                                   firecrawl_rate=500, openai_rate=500)
+    
+    async def nothing_validated(urls):
+        # No sitemap lastmod or ETag to go by, so every page is scraped again
+        return list(urls), {}
+    
+    gen.find_changed_urls = nothing_validated
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(gen.generate(output_dir=str(output_dir)))
+    return (output_dir / 'llms-full.txt').read_text()
+
+
+def test_rescraped_unchanged_pages_keep_their_boilerplate_stripped(api, tmp_path):
+    store = PageStateStore(str(tmp_path / 'state.sqlite3'))
+    first = run(api, tmp_path / 'out', store)
+    assert BOILERPLATE_FOOTER not in first
+    
+    for _ in range(2):
+        again = run(api, tmp_path / 'out', store)
+        assert BOILERPLATE_FOOTER not in again
+        assert BOILERPLATE_HEADER not in again
+        assert again == first
+    for url in store.urls():
+        assert BOILERPLATE_FOOTER not in (store.get(url)['full_entry'] or '')
@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+import mock_api
+from mock_api import SITE_URL, EndpointProfile, MockConfig, MockServer, render_page
+from generate_sidetool_llmstxt import SidetoolLLMSTxtGenerator
+from llmstxt.journal import RunJournal
+
+SITE = 'https://example.com'
+
+
+def test_finished_pages_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    assert journal.start(SITE) == 0
+    journal.append(f'{SITE}/a', entry='- [A](/a)', full_entry='A')
+    journal.append(f'{SITE}/b', entry='- [B](/b)', full_entry=None, duplicate_of=f'{SITE}/a')
+    journal.close()
+    
+    journal = RunJournal(path, resume=True)
+    assert journal.start(SITE) == 2
+    assert f'{SITE}/a' in journal
+    assert journal.get(f'{SITE}/b') == {'url': f'{SITE}/b', 'entry': '- [B](/b)', 'full_entry': None,
+                                        'duplicate_of': f'{SITE}/a'}
+    assert journal.get(f'{SITE}/c') is None
+    journal.finish()
+    assert not (tmp_path / 'journal.jsonl').exists()
+
+
+def test_without_resume_the_journal_starts_over(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.start(SITE)
+    journal.append(f'{SITE}/a', entry='A')
+    journal.close()
+    
+    assert RunJournal(path).start(SITE) == 0
+    assert RunJournal(path, resume=True).start('https://other.example') == 0
+
+
+def test_a_torn_last_line_is_cut_off(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = RunJournal(str(path))
+    journal.start(SITE)
+    journal.append(f'{SITE}/a', entry='A')
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"url": "https://example.com/b", "ent')
+    
+    journal = RunJournal(str(path), resume=True)
+    assert journal.start(SITE) == 1
+    journal.append(f'{SITE}/c', entry='C')
+    journal.close()
+    assert RunJournal(str(path), resume=True).start(SITE) == 2
+
+
+@pytest.fixture
+def api(monkeypatch):
+    def render(url, config):
+        if '/page-' in url:
+            # Every page-N carries the same body, so all but the first are near-duplicates
+            body = render_page(f'{SITE_URL}/blog/post-0', config)['markdown']
+            return {'markdown': f"# Tag {url}\n\n{body}", 'metadata': {'title': 'Tag', 'sourceURL': url}}
+        return render_page(url, config)
+    
+    monkeypatch.setattr(mock_api, 'render_page', render)
+    server = MockServer(MockConfig(
+        map=EndpointProfile(median_ms=1, sigma=0.01),
+        scrape=EndpointProfile(median_ms=1, sigma=0.01),
+        page_kb=2
+    )).start()
+    yield server
+    server.stop()
+
+
+def test_resume_does_not_scrape_near_duplicates_again(api, tmp_path, monkeypatch):
+    path = str(tmp_path / 'journal.jsonl')
+    output_dir = tmp_path / 'out'
+    
+    def run(resume):
+        gen = SidetoolLLMSTxtGenerator('key', None, max_urls=10, firecrawl_api_url=api.url, base_url=SITE_URL,
+                                       journal=RunJournal(path, resume=resume), summarizer='local',
+                                       cleanup_workers=0, firecrawl_rate=500)
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(gen.generate(output_dir=str(output_dir)))
+        return (output_dir / 'llms.txt').read_text(), (output_dir / 'llms-full.txt').read_text()
+    
+    # Stand in for a run cut off after its last page: the journal is left behind
+    with monkeypatch.context() as m:
+        m.setattr(RunJournal, 'finish', RunJournal.close)
+        first = run(resume=False)
+    scrapes = api.requests['scrape']
+    journal = RunJournal(path, resume=True)
+    journal.start(SITE_URL)
+    assert journal.get(f'{SITE_URL}/page-3')['duplicate_of'] == f'{SITE_URL}/page-0'
+    journal.close()
+    
+    assert run(resume=True) == first
+    assert api.requests['scrape'] == scrapes
+    assert f'{SITE_URL}/page-3' in first[0]
+    assert f'# Tag {SITE_URL}/page-3' not in first[1]
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from llmstxt.ratelimit import AdaptiveLimiter, TokenBudget, parse_retry_after
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 28 < parse_retry_after(later) <= 30
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+def test_limiter_grows_additively_and_cuts_once_per_cooldown():
+    limiter = AdaptiveLimiter('api', rate=4.0, concurrency=4, cooldown=60)
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.rate == pytest.approx(5.0, abs=0.1)
+    assert limiter.concurrency == pytest.approx(5.0, abs=0.1)
+    
+    rate, concurrency = limiter.rate, limiter.concurrency
+    limiter.on_throttle()
+    limiter.on_timeout()
+    assert limiter.rate == pytest.approx(rate / 2)
+    assert limiter.concurrency == pytest.approx(concurrency / 2)
+    assert (limiter.throttled, limiter.timeouts) == (1, 1)
+
+
+def test_limiter_stays_within_its_bounds():
+    limiter = AdaptiveLimiter('api', rate=1.0, min_rate=0.5, max_rate=2.0, concurrency=1, max_concurrency=2,
+                              cooldown=0)
+    for _ in range(50):
+        limiter.on_success()
+    assert (limiter.rate, limiter.concurrency) == (2.0, 2.0)
+    for _ in range(10):
+        limiter.on_timeout()
+    assert (limiter.rate, limiter.concurrency) == (0.5, 1.0)
+
+
+def test_retry_after_pauses_every_caller():
+    limiter = AdaptiveLimiter('api', rate=1000.0)
+    limiter.on_throttle(retry_after=0.2)
+    started = time.monotonic()
+    limiter.wait()
+    assert time.monotonic() - started >= 0.15
+    
+    async def send():
+        async with limiter.slot():
+            pass
+    
+    limiter.on_throttle(retry_after=0.2)
+    started = time.monotonic()
+    asyncio.run(send())
+    assert time.monotonic() - started >= 0.15
+
+
+def test_slots_respect_the_concurrency_cap():
+    limiter = AdaptiveLimiter('api', rate=1000.0, concurrency=2)
+    peak = 0
+    
+    async def send():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+    
+    async def main():
+        await asyncio.gather(*(send() for _ in range(6)))
+    
+    asyncio.run(main())
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+
+def test_token_budget_waits_for_the_refill():
+    async def spend():
+        budget = TokenBudget(6000)
+        await budget.acquire(6000)
+        started = time.monotonic()
+        await budget.acquire(20)
+        return time.monotonic() - started
+    
+    # 6000 tokens per minute refill 100 a second
+    assert 0.15 < asyncio.run(spend()) < 1
@@ -0,0 +1,72 @@
+import asyncio
+
+from llmstxt.scheduler import CrawlScheduler
+
+
+def run_requests(scheduler, requests):
+    """Send (domain, count) requests in that order; return the order slots were granted in and the peaks"""
+    order = []
+    peaks = {'global': 0}
+    
+    async def request(domain):
+        async with scheduler.slot(domain):
+            order.append(domain)
+            peaks['global'] = max(peaks['global'], scheduler.active)
+            peaks[domain] = max(peaks.get(domain, 0), scheduler.running[domain])
+            await asyncio.sleep(0.01)
+    
+    async def main():
+        await asyncio.gather(*(request(domain) for domain, count in requests for _ in range(count)))
+    
+    asyncio.run(main())
+    return order, peaks
+
+
+def test_a_large_site_does_not_starve_a_small_one():
+    scheduler = CrawlScheduler(global_limit=2, per_domain_limit=2)
+    order, _ = run_requests(scheduler, [('big.example', 10), ('small.example', 2)])
+    # After big's first two, freed slots alternate between the waiting sites
+    assert order[:6] == ['big.example', 'big.example', 'big.example', 'small.example',
+                         'big.example', 'small.example']
+    assert scheduler.snapshot() == {
+        'big.example': {'granted': 10, 'in_flight': 0, 'queued': 0},
+        'small.example': {'granted': 2, 'in_flight': 0, 'queued': 0}
+    }
+
+
+def test_requests_stay_within_the_global_and_per_site_caps():
+    scheduler = CrawlScheduler(global_limit=4, per_domain_limit=2)
+    _, peaks = run_requests(scheduler, [('a.example', 5), ('b.example', 5), ('c.example', 5)])
+    assert peaks['global'] == 4
+    assert max(peaks[domain] for domain in ('a.example', 'b.example', 'c.example')) == 2
+    assert scheduler.active == 0
+
+
+def test_a_cancelled_waiter_gives_up_its_place():
+    scheduler = CrawlScheduler(global_limit=1, per_domain_limit=1)
+    
+    async def main():
+        release = asyncio.Event()
+        
+        async def hold():
+            async with scheduler.slot('a.example'):
+                await release.wait()
+        
+        async def wait_for_slot():
+            async with scheduler.slot('b.example'):
+                pass
+        
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(wait_for_slot())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await holder
+        # The freed slot is not held by the cancelled request
+        async with scheduler.slot('c.example'):
+            assert scheduler.running['b.example'] == 0
+    
+    asyncio.run(main())
+    assert scheduler.active == 0
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from mock_api import EndpointProfile, MockConfig, MockServer
+from generate_sidetool_blog import SidetoolLLMsGenerator
+from generate_sidetool_llmstxt import SidetoolLLMSTxtGenerator
+from llmstxt.metrics import RunMetrics
+from llmstxt.scrape import HedgePolicy, UrlDeadline, scrape_request, url_class
+
+
+def test_scrape_options_follow_the_url_class():
+    assert url_class('https://example.com/Docs/api') == 'docs'
+    assert url_class('https://example.com/blog/post') == 'blog'
+    assert url_class('https://example.com/pricing') == 'page'
+    assert scrape_request('https://example.com/docs/api')['waitFor'] == 0
+    assert scrape_request('https://example.com/')['formats'] == ['markdown']
+
+
+def test_hedge_delay_needs_enough_samples_and_has_a_floor():
+    policy = HedgePolicy(min_samples=20, min_delay=1.0)
+    for _ in range(19):
+        policy.observe('blog', 5.0)
+    assert policy.delay('blog') is None
+    policy.observe('blog', 5.0)
+    assert policy.delay('blog') == pytest.approx(5.0)
+    assert policy.delay('docs') is None
+    
+    for _ in range(20):
+        policy.observe('docs', 0.01)
+    assert policy.delay('docs') == 1.0
+
+
+def test_hedges_stay_within_the_budget():
+    policy = HedgePolicy(budget=0.1)
+    for _ in range(20):
+        policy.started()
+    assert [policy.allow_hedge() for _ in range(3)] == [True, True, False]
+
+
+def test_url_deadline_starts_with_the_first_request():
+    deadline = UrlDeadline(10)
+    assert deadline.remaining() is None
+    deadline.start()
+    first = deadline.give_up
+    deadline.start()
+    assert deadline.give_up == first
+    assert 9 < deadline.remaining() <= 10
+
+
+@pytest.fixture
+def api():
+    server = MockServer(MockConfig(scrape=EndpointProfile(median_ms=1, sigma=0.01), page_kb=1)).start()
+    yield server
+    server.stop()
+
+
+def test_rate_limiter_wait_does_not_count_toward_the_url_deadline(api):
+    gen = SidetoolLLMSTxtGenerator('key', None, firecrawl_api_url=api.url, summarizer='local',
+                                   url_deadline=0.3, hedge=False)
+    gen.metrics = RunMetrics()
+    
+    async def scrape():
+        # As after a Retry-After: nothing may be sent for longer than the URL deadline
+        gen.firecrawl_limiter.blocked_until = time.monotonic() + 0.6
+        async with gen.firecrawl_session(1) as session:
+            return await gen.scrape_url(session, 'https://example.com/blog/post')
+    
+    result = asyncio.run(scrape())
+    assert result['success'], result.get('error')
+
+
+def test_rate_limiter_wait_does_not_count_toward_the_url_deadline_in_the_blog_generator(api):
+    gen = SidetoolLLMsGenerator({'firecrawl': 'key', 'openai': 'key'}, firecrawl_api_url=api.url,
+                                openai_api_url=api.url, summarizer='local', url_deadline=0.3, hedge=False)
+    gen.metrics = RunMetrics()
+    gen.firecrawl.metrics = gen.metrics
+    gen.firecrawl_limiter.blocked_until = time.monotonic() + 0.6
+    try:
+        assert gen.scrape_url('https://example.com/blog/post')['markdown']
+    finally:
+        gen.close()
@@ -0,0 +1,54 @@
+import os
+import random
+
+from llmstxt.shards import publish_shards
+from llmstxt.writer import StreamingWriter
+
+
+def page(url):
+    """Deterministic markdown of about 6 KB for a URL"""
+    rng = random.Random(url)
+    words = ['token', 'stream', 'shard', 'index', 'crawl', 'summary', 'cache', 'page', 'site', 'model']
+    return f"# {url}\n\n" + ' '.join(rng.choice(words) for _ in range(900))
+
+
+def publish(tmp_path, urls):
+    """Write llms-full.txt the way the generator does, with crawl-position markers, then shard it"""
+    path = str(tmp_path / 'llms-full.txt')
+    writer = StreamingWriter(path)
+    for idx, url in enumerate(urls):
+        writer.write(idx, f"<|firecrawl-page-{idx + 1}-lllmstxt|>\n{page(url)}\n", url)
+    writer.commit()
+    return publish_shards(path, writer.entries, str(tmp_path / 'llms-full'), str(tmp_path / 'manifest.json'))
+
+
+def shard_names(tmp_path):
+    return set(os.listdir(tmp_path / 'llms-full'))
+
+
+URLS = [f"https://example.com/docs/page-{i:03d}" for i in range(150)]
+
+
+def test_unchanged_site_rewrites_nothing(tmp_path):
+    first = publish(tmp_path, URLS)
+    assert first['shards'] > 3
+    second = publish(tmp_path, URLS)
+    assert second == {**second, 'written': 0, 'removed': 0, 'manifest_changed': 0}
+    assert second['kept'] == first['shards']
+
+
+def test_inserting_a_page_changes_one_shard(tmp_path):
+    publish(tmp_path, URLS)
+    before = shard_names(tmp_path)
+    # Crawled first, so every other page's position marker shifts by one
+    stats = publish(tmp_path, ['https://example.com/docs/page-070a'] + URLS)
+    assert (stats['written'], stats['removed']) == (1, 1)
+    assert len(before - shard_names(tmp_path)) == 1
+
+
+def test_removing_a_page_changes_one_shard(tmp_path):
+    publish(tmp_path, URLS)
+    before = shard_names(tmp_path)
+    stats = publish(tmp_path, URLS[:1] + URLS[2:])
+    assert (stats['written'], stats['removed']) == (1, 1)
+    assert len(before - shard_names(tmp_path)) == 1
@@ -0,0 +1,53 @@
+from llmstxt.summarize import LocalSummarizer, parse_markdown, title_from_url
+
+PAGE = """# Acme Analytics | Acme
+
+Acme Analytics turns raw product events into dashboards that every team can read.
+
+```python
+print("Code samples are not prose and never become the description.")
+```
+
+| Plan | Price |
+| --- | --- |
+| Pro | $20 |
+
+- Lists are skipped as well, however long their items happen to be.
+
+Product teams use Acme Analytics dashboards to see which features customers adopt.
+Dashboards in Acme Analytics update within seconds of each new product event.
+Our office dog is called Biscuit and enjoys long walks on the beach.
+Acme Analytics exports dashboards and product events to your data warehouse every night.
+Support teams read the same Acme Analytics dashboards to answer customer questions quickly.
+"""
+
+
+def test_parse_markdown_keeps_headings_and_prose_only():
+    headings, sentences = parse_markdown("## Intro [link](/x)\n\nSee the [docs](/docs) now. Then *try* it!\n\n- item\n")
+    assert headings == [(2, 'Intro link')]
+    assert sentences == ['See the docs now.', 'Then try it!']
+
+
+def test_title_comes_from_the_top_heading_without_the_site_name():
+    summary = LocalSummarizer().summarize('https://acme.example/analytics', PAGE)
+    assert summary.title == 'Acme Analytics'
+
+
+def test_description_is_a_central_prose_sentence():
+    summary = LocalSummarizer().summarize('https://acme.example/analytics', PAGE)
+    assert 'Acme Analytics' in summary.description
+    assert 'Biscuit' not in summary.description
+    assert summary.confidence >= 0.5
+
+
+def test_pages_without_prose_or_heading_have_low_confidence():
+    summary = LocalSummarizer().summarize('https://acme.example/blog/ai-agents-101', "- just\n- a list\n")
+    assert summary == ('Ai Agents 101', 'Content summary', 0.0)
+    untitled = LocalSummarizer().summarize('https://acme.example/about', PAGE.split('\n', 1)[1])
+    assert untitled.title == 'About'
+    assert untitled.confidence < LocalSummarizer().summarize('https://acme.example/about', PAGE).confidence
+
+
+def test_title_from_url_falls_back_to_the_site_name():
+    assert title_from_url('https://www.acme.example/') == 'Acme.example'
+    assert title_from_url('https://acme.example/docs/getting_started.html') == 'Getting Started'
@@ -0,0 +1,52 @@
+from llmstxt.tokens import estimate_tokens, pack_sections, truncate_to_tokens
+
+TABLE = '| Plan | Seats | Price | Notes |\n|---|---|---|---|\n' + ''.join(
+    f'| plan {i} | {i * 5} | {i * 12} USD | billed yearly with support tier {i} |\n' for i in range(200))
+CODE = '```python\n' + ''.join(f'result_{i} = compute(value_{i}, scale={i})\n' for i in range(200)) + '```\n'
+PROSE = ' '.join(['the crawler keeps reading pages and writing summaries without ever stopping'] * 200)
+
+
+def check_truncated(text, budget):
+    kept = truncate_to_tokens(text, budget)
+    assert kept
+    assert estimate_tokens(kept) <= budget + 2  # a closing code fence may be added
+    assert estimate_tokens(kept) >= budget // 2
+    assert text.startswith(kept.removesuffix('\n```'))
+    return kept
+
+
+def test_truncates_table_at_a_row():
+    kept = check_truncated(TABLE, 120)
+    assert kept.endswith('|')
+
+
+def test_truncates_code_block_and_closes_fence():
+    kept = check_truncated(CODE, 120)
+    assert kept.startswith('```python\n')
+    assert kept.endswith('\n```')
+
+
+def test_truncates_unpunctuated_prose():
+    check_truncated(PROSE, 120)
+
+
+def test_truncates_single_huge_token():
+    assert truncate_to_tokens('x' * 10000, 50)
+
+
+def test_keeps_heading_when_its_text_has_no_boundary():
+    kept = check_truncated('# Pricing\n\n' + PROSE, 120)
+    assert kept.startswith('# Pricing\n\nthe crawler')
+
+
+def test_sentence_boundaries_still_win():
+    text = 'First sentence here. ' * 100
+    kept = truncate_to_tokens(text, 40)
+    assert kept.endswith('here.')
+
+
+def test_pack_sections_never_empty():
+    for content in (TABLE, CODE, PROSE, '# Plans\n\n' + TABLE + '\n\n## Usage\n\n' + CODE):
+        packed = pack_sections(content, 100)
+        assert packed
+        assert estimate_tokens(packed) <= 102
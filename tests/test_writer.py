@@ -0,0 +1,77 @@
+import gzip
+import os
+
+from llmstxt.writer import StreamingWriter
+
+
+def publish(path, sections, encodings=()):
+    writer = StreamingWriter(str(path), encodings=encodings)
+    for idx, text in enumerate(sections):
+        writer.write(idx, text)
+    writer.commit()
+    return writer
+
+
+def test_sections_published_in_index_order(tmp_path):
+    path = tmp_path / 'llms-full.txt'
+    writer = StreamingWriter(str(path), header='# Site\n\n')
+    writer.write(1, 'second', 'https://example.com/b')
+    writer.write(0, 'first', 'https://example.com/a')
+    writer.commit()
+    assert path.read_text() == '# Site\n\nfirst\nsecond'
+    assert [url for _, url, _, _ in writer.entries] == ['https://example.com/a', 'https://example.com/b']
+
+
+def test_unchanged_commit_leaves_files_alone(tmp_path):
+    path = tmp_path / 'llms-full.txt'
+    publish(path, ['a', 'b'], encodings=['gzip'])
+    mtime = os.stat(path).st_mtime_ns
+    writer = publish(path, ['a', 'b'], encodings=['gzip'])
+    assert not writer.changed
+    assert os.stat(path).st_mtime_ns == mtime
+
+
+def test_dropped_encoding_removes_its_stale_copy(tmp_path):
+    path = tmp_path / 'llms-full.txt'
+    publish(path, ['a', 'b'], encodings=['gzip'])
+    assert gzip.decompress((tmp_path / 'llms-full.txt.gz').read_bytes()) == b'a\nb'
+    
+    publish(path, ['a', 'c'])
+    assert path.read_text() == 'a\nc'
+    assert not (tmp_path / 'llms-full.txt.gz').exists()
+
+
+def test_dropped_encoding_removed_even_when_content_is_unchanged(tmp_path):
+    path = tmp_path / 'llms-full.txt'
+    publish(path, ['a', 'b'], encodings=['gzip'])
+    writer = publish(path, ['a', 'b'])
+    assert not writer.changed
+    assert not (tmp_path / 'llms-full.txt.gz').exists()
+
+
+def test_order_publishes_sections_sorted_with_matching_index(tmp_path):
+    path = tmp_path / 'llms-full.txt'
+    writer = StreamingWriter(str(path), header='# Site\n\n', index_path=str(tmp_path / 'index.json'))
+    for idx, url in enumerate(['https://example.com/c', 'https://example.com/a', 'https://example.com/b']):
+        writer.write(idx, f'page {url[-1]}', url)
+    writer.commit('# Pages: 3\n', order=lambda url: url)
+    text = path.read_text()
+    assert text == '# Pages: 3\n# Site\n\npage a\npage b\npage c'
+    data = text.encode('utf-8')
+    for page, url, offset, length in writer.entries:
+        assert data[offset:offset + length].decode('utf-8') == f'page {url[-1]}'
+    assert [page for page, _, _, _ in writer.entries] == [1, 2, 3]
+
+
+def test_order_makes_crawl_order_irrelevant(tmp_path):
+    urls = [f'https://example.com/{name}' for name in 'dbca']
+    published = []
+    for crawl in (urls, list(reversed(urls))):
+        path = tmp_path / 'llms.txt'
+        writer = StreamingWriter(str(path))
+        for idx, url in enumerate(crawl):
+            writer.write(idx, url, url)
+        writer.commit(order=lambda url: url)
+        published.append((path.read_text(), writer.changed))
+    assert published[0][0] == published[1][0]
+    assert published[1][1] is False